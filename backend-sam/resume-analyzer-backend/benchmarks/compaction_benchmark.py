@@ -0,0 +1,105 @@
+"""
+Byte savings of the upload-time PDF compaction, and how much faster the process
+function extracts the analysis copy than the original.
+
+    python benchmarks/compaction_benchmark.py [directory of PDFs]
+
+Without a directory, a corpus shaped like designer-tool exports is generated: one or
+two pages of text set in several fully embedded TrueType fonts, with a photo and a
+background image per page. Extraction uses the process function's own extractor, and
+the lines are checked to be identical for both versions.
+"""
+import os
+import sys
+import glob
+import time
+import random
+import logging
+
+HERE = os.path.dirname(__file__)
+sys.path.insert(0, os.path.join(HERE, '..', 'common_layer'))
+sys.path.insert(0, os.path.join(HERE, '..', 'upload_resume_function'))
+sys.path.insert(0, os.path.join(HERE, '..', 'process_resume_function'))
+
+import fitz # noqa: E402
+import pdf_compaction # noqa: E402
+from text_extractor import extract_lines_from_pdf # noqa: E402
+
+RUNS = 5
+FONT_FILES = sorted(glob.glob('/usr/share/fonts/**/*.ttf', recursive=True))[:4]
+
+
+def noise_image(width, height, seed):
+    """A photo-like (poorly compressible) RGB image."""
+    samples = random.Random(seed).randbytes(width * height * 3)
+    return fitz.Pixmap(fitz.csRGB, width, height, samples, False)
+
+
+def designer_pdf(pages, seed):
+    doc = fitz.open()
+    for number in range(pages):
+        page = doc.new_page()
+        page.insert_image(fitz.Rect(0, 0, page.rect.width, 160), pixmap=noise_image(300, 80, seed + number))
+        page.insert_image(fitz.Rect(430, 30, 560, 160), pixmap=noise_image(260, 260, seed + 7 * number))
+        y = 200
+        for index, section in enumerate(("EXPERIENCE", "SKILLS", "EDUCATION")):
+            font_name = f"F{index}"
+            if FONT_FILES:
+                page.insert_font(fontname=font_name, fontfile=FONT_FILES[index % len(FONT_FILES)])
+            else:
+                font_name = "helv"
+            page.insert_text((60, y), section, fontname=font_name, fontsize=14)
+            for line in range(8):
+                y += 16
+                page.insert_text((60, y), f"Delivered project {seed}-{number}-{line} in Python, SQL and AWS.", fontname=font_name, fontsize=10)
+            y += 40
+    return doc.tobytes(garbage=1)
+
+
+def corpus():
+    if len(sys.argv) > 1:
+        for path in sorted(glob.glob(os.path.join(sys.argv[1], '*.pdf'))):
+            with open(path, 'rb') as f:
+                yield os.path.basename(path), f.read()
+        return
+    for seed in range(6):
+        yield f"designer-{seed}.pdf", designer_pdf(1 + seed % 2, seed)
+
+
+def extract_ms(pdf_bytes):
+    timings = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        lines = extract_lines_from_pdf(pdf_bytes)
+        timings.append(time.perf_counter() - started)
+    return sorted(timings)[RUNS // 2] * 1000, [line.text for line in lines]
+
+
+def main():
+    logging.getLogger().setLevel(logging.WARNING)
+    pdf_compaction.PDF_COMPACTION_MIN_BYTES = 0
+    print(f"{'file':<18} {'original KB':>11} {'copy KB':>8} {'saved':>6} {'compact ms':>10} {'extract ms':>10} {'copy ms':>8}")
+    totals = [0, 0, 0.0, 0.0]
+    for name, pdf_bytes in corpus():
+        started = time.perf_counter()
+        compact = pdf_compaction.compact_pdf(pdf_bytes)
+        compact_ms = (time.perf_counter() - started) * 1000
+        original_ms, original_lines = extract_ms(pdf_bytes)
+        if compact is None:
+            print(f"{name:<18} {len(pdf_bytes) / 1024:>11.0f} {'-':>8} {'-':>6} {compact_ms:>10.1f} {original_ms:>10.2f} {'-':>8}")
+            continue
+        copy_ms, copy_lines = extract_ms(compact)
+        assert copy_lines == original_lines, f"{name}: extracted lines differ"
+        totals = [totals[0] + len(pdf_bytes), totals[1] + len(compact), totals[2] + original_ms, totals[3] + copy_ms]
+        print(
+            f"{name:<18} {len(pdf_bytes) / 1024:>11.0f} {len(compact) / 1024:>8.0f} "
+            f"{100 * (1 - len(compact) / len(pdf_bytes)):>5.0f}% {compact_ms:>10.1f} {original_ms:>10.2f} {copy_ms:>8.2f}"
+        )
+    if totals[0]:
+        print(f"\ncompacted files: {totals[0] / 1024:.0f} KB -> {totals[1] / 1024:.0f} KB "
+              f"({100 * (1 - totals[1] / totals[0]):.0f}% saved), extraction {totals[2]:.1f} ms -> {totals[3]:.1f} ms "
+              f"({totals[2] / totals[3]:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
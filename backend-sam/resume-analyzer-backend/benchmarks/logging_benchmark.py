@@ -0,0 +1,144 @@
+"""
+Per-invocation logging overhead, before and after the structured logger.
+
+"before" replays the handlers' original print statements (full event dumps, raw
+Claude output); "after" makes the structured_logger calls that replaced them.
+Both write to a null stream through a JSON formatter, so the numbers are the CPU
+cost of building and formatting log lines plus the bytes CloudWatch would ingest.
+
+    python benchmarks/logging_benchmark.py
+"""
+import io
+import os
+import sys
+import json
+import time
+import base64
+import logging
+import contextlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'common_layer'))
+
+import structured_logger # noqa: E402
+from structured_logger import get_logger, start_invocation, event_summary # noqa: E402
+
+RUNS = 20
+UPLOAD_MB = 2
+SQS_RECORDS = 10
+
+
+class CountingSink(io.TextIOBase):
+    def __init__(self):
+        self.chars = 0
+
+    def write(self, text):
+        self.chars += len(text)
+        return len(text)
+
+
+def upload_event():
+    data = os.urandom(UPLOAD_MB * 2**20)
+    return {
+        'httpMethod': 'POST',
+        'resource': '/upload-resume',
+        'headers': {'Content-Type': 'application/json', 'User-Agent': 'benchmark'},
+        'body': json.dumps({
+            'file_content_base64': base64.b64encode(data).decode('ascii'),
+            'file_name': 'resume.pdf',
+            'content_type': 'application/pdf'
+        })
+    }
+
+
+def sqs_event():
+    return {'Records': [
+        {
+            'messageId': f'message-{i}',
+            'receiptHandle': 'AQEB' + 'x' * 300,
+            'body': json.dumps({'resume_id': f'resume-{i}', 's3_bucket': 'bucket', 's3_key': f'resume-{i}.pdf'}),
+            'attributes': {'ApproximateReceiveCount': '1', 'SentTimestamp': '1700000000000'},
+            'eventSource': 'aws:sqs'
+        }
+        for i in range(SQS_RECORDS)
+    ]}
+
+
+COMPLETION = json.dumps({
+    "compatibility_score": 72,
+    "top_technical_skills_found": ["Python", "SQL", "Excel", "Tableau", "Customer Support"],
+    "compatibility_explanation": "Strong analytical background with customer-facing experience. " * 4,
+    "suggested_keywords": ["data analysis", "automation", "dashboards", "ticketing", "SLA"]
+})
+
+
+def upload_before(event):
+    print(f"Received event: {json.dumps(event)}")
+    print("Resume resume-1.pdf saved to S3 bucket bucket")
+    print("DynamoDB record created for resume_id: resume-1")
+    print("Message sent to SQS for resume_id: resume-1")
+
+
+def upload_after(event, log):
+    start_invocation()
+    log.info("Received event", **event_summary(event))
+    log.info("Resume saved to S3", s3_bucket='bucket', s3_key='resume-1.pdf', size_bytes=UPLOAD_MB * 2**20)
+    log.info("DynamoDB record created", resume_id='resume-1')
+    log.info("Message sent to SQS", resume_id='resume-1')
+
+
+def process_before(event):
+    print(f"Received SQS event: {json.dumps(event)}")
+    for record in event['Records']:
+        body = json.loads(record['body'])
+        print(f"Downloading {body['s3_key']} from {body['s3_bucket']}")
+        print("Downloaded 184320 bytes.")
+        print(f"Extracted 96 lines in sections ['header', 'skills', 'experience'] from {body['s3_key']}.")
+        print("Prompt length: 3120 characters, ~820 tokens.")
+        print(f"Bedrock usage: {json.dumps({'input_tokens': 820, 'output_tokens': 150})}")
+        print(f"Claude raw response: {COMPLETION}")
+        print(f"DynamoDB record updated for resume_id: {body['resume_id']} with status 'completed'")
+
+
+def process_after(event, log):
+    start_invocation()
+    log.info("Received SQS event", **event_summary(event))
+    for record in event['Records']:
+        body = json.loads(record['body'])
+        log.debug("Downloading resume", s3_bucket=body['s3_bucket'], s3_key=body['s3_key'])
+        log.info("Downloaded resume", s3_key=body['s3_key'], size_bytes=184320)
+        log.info("Extracted resume text", s3_key=body['s3_key'], line_count=96, sections=['header', 'skills', 'experience'])
+        log.info("Prompt built", resume_id=body['resume_id'], prompt_chars=3120, estimated_input_tokens=820, budget_adjustments=[])
+        log.info("Bedrock usage", input_tokens=820, output_tokens=150)
+        log.debug("Claude raw response", completion=lambda: COMPLETION)
+        log.info("DynamoDB record updated", resume_id=body['resume_id'], status='completed')
+
+
+def run(label, func, event, *args):
+    sink = CountingSink()
+    handler = logging.getLogger().handlers[0]
+    handler.setStream(sink)
+    timings = []
+    with contextlib.redirect_stdout(sink):
+        for _ in range(RUNS):
+            started = time.perf_counter()
+            func(event, *args)
+            timings.append(time.perf_counter() - started)
+    ms = sorted(timings)[len(timings) // 2] * 1000
+    print(f"{label:<22} {ms:>9.3f} {sink.chars // RUNS:>12}")
+
+
+def main():
+    log = get_logger('benchmark')
+    logging.getLogger().setLevel(logging.INFO) # ApplicationLogLevel in template.yaml
+    print(f"{'handler / logging':<22} {'ms/invoke':>9} {'bytes/invoke':>12}")
+    event = upload_event()
+    run('upload  print', upload_before, event)
+    run('upload  structured', upload_after, event, log)
+    event = sqs_event()
+    run('process print', process_before, event)
+    run('process structured', process_after, event, log)
+
+
+if __name__ == '__main__':
+    assert structured_logger.logging.getLogger().handlers, "structured_logger installs a handler outside Lambda"
+    main()
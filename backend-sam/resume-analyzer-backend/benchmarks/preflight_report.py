@@ -0,0 +1,109 @@
+"""
+How many uploads the preflight turns away, by reason, and what the check costs.
+
+Each rejected file is a job that would otherwise have taken an S3 write, a DynamoDB
+record, an SQS message and a process invocation before failing.
+
+    python benchmarks/preflight_report.py [directory of uploaded files]
+
+Without a directory a small synthetic corpus is generated: text PDFs, a scanned
+(image-only) PDF, an encrypted PDF, DOCX, a legacy .doc header, plain text and a zip.
+"""
+import io
+import os
+import sys
+import time
+import zipfile
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'upload_resume_function'))
+
+import fitz # noqa: E402
+import preflight # noqa: E402
+
+
+def text_pdf(pages=2):
+    doc = fitz.open()
+    for number in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"EXPERIENCE page {number + 1}\n" + "Built data pipelines in Python and SQL.\n" * 20)
+    return doc.tobytes()
+
+
+def scanned_pdf():
+    doc = fitz.open()
+    page = doc.new_page()
+    pixmap = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 600, 800), False)
+    pixmap.clear_with(200)
+    page.insert_image(page.rect, pixmap=pixmap)
+    return doc.tobytes()
+
+
+def encrypted_pdf():
+    doc = fitz.open(stream=text_pdf(), filetype="pdf")
+    return doc.tobytes(encryption=fitz.PDF_ENCRYPT_AES_256, owner_pw="owner", user_pw="secret")
+
+
+def docx():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr('[Content_Types].xml', '<Types/>')
+        archive.writestr('word/document.xml', '<w:document><w:body><w:p><w:r><w:t>Resume</w:t></w:r></w:p></w:body></w:document>')
+    return buffer.getvalue()
+
+
+def other_zip():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr('photo.jpg', b'\xff\xd8\xff' + os.urandom(1000))
+    return buffer.getvalue()
+
+
+def synthetic_corpus():
+    corpus = [(f'resume-{i}.pdf', text_pdf(1 + i % 3)) for i in range(12)]
+    corpus += [(f'resume-{i}.docx', docx()) for i in range(6)]
+    corpus += [
+        ('scan.pdf', scanned_pdf()),
+        ('locked.pdf', encrypted_pdf()),
+        ('long.pdf', text_pdf(preflight.PREFLIGHT_MAX_PAGES + 5)),
+        ('old.doc', preflight.CFB_MAGIC + os.urandom(4000)),
+        ('resume.txt', b"Jane Doe\nPython developer\n" * 20),
+        ('portfolio.zip', other_zip()),
+        ('truncated.pdf', b"%PDF-1.7\n" + os.urandom(500)),
+    ]
+    return corpus
+
+
+def directory_corpus(path):
+    corpus = []
+    for name in sorted(os.listdir(path)):
+        full_path = os.path.join(path, name)
+        if os.path.isfile(full_path):
+            with open(full_path, 'rb') as f:
+                corpus.append((name, f.read()))
+    return corpus
+
+
+def main():
+    corpus = directory_corpus(sys.argv[1]) if len(sys.argv) > 1 else synthetic_corpus()
+    outcomes = Counter()
+    timings = []
+    for name, data in corpus:
+        started = time.perf_counter()
+        result = preflight.check(data)
+        timings.append(time.perf_counter() - started)
+        outcomes[result.reason or f"accepted:{result.file_type}"] += 1
+        if result.reason:
+            print(f"  rejected {name:<20} {result.reason}")
+
+    rejected = sum(count for outcome, count in outcomes.items() if not outcome.startswith('accepted'))
+    print(f"\n{'outcome':<28} {'files':>5}")
+    for outcome, count in sorted(outcomes.items()):
+        print(f"{outcome:<28} {count:>5}")
+    timings.sort()
+    print(f"\ndoomed jobs filtered: {rejected} of {len(corpus)} ({100 * rejected / len(corpus):.0f}%)")
+    print(f"check time: median {timings[len(timings) // 2] * 1000:.2f} ms, max {timings[-1] * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""
+Peak memory and latency of the upload handler's body formats on 1, 2 and 4 MB files:
+base64 JSON (the original path), raw binary, and multipart/form-data. A request body
+carries at most MAX_REQUEST_FILE_BYTES (about 4.4 MB, from the 6 MB invoke payload),
+so these sizes cover what the handler can actually receive; every one of them goes
+up as a single PutObject.
+
+S3 is a real boto3 client whose requests are answered in-process just before they
+would be sent, so upload_fileobj runs the actual s3transfer manager (its threshold
+probe, single-part fallback and part reads) and each request body is read as the
+HTTP layer would. DynamoDB and SQS are in-memory stand-ins. Peak memory is measured
+with tracemalloc on top of the already-built API Gateway event; the table also shows
+whether the upload went multipart.
+
+    python benchmarks/upload_body_benchmark.py
+"""
+import os
+import sys
+import json
+import time
+import logging
+import base64
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'upload_resume_function'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'common_layer'))
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('S3_BUCKET_NAME', 'benchmark-bucket')
+
+import boto3 # noqa: E402
+from botocore.awsrequest import AWSResponse # noqa: E402
+import app # noqa: E402
+import fitz # noqa: E402
+
+SIZES_MB = (1, 2, 4)
+RUNS = 3
+BOUNDARY = '----BenchmarkBoundary7MA4YWxkTrZu0gW'
+
+
+class S3:
+    """Answers a real S3 client's requests before they are sent, reading each body."""
+
+    RESPONSES = {
+        'CreateMultipartUpload': {'UploadId': 'benchmark-upload'},
+        'UploadPart': {'ETag': '"part"'},
+        'CompleteMultipartUpload': {},
+        'PutObject': {'ETag': '"object"'},
+        'DeleteObject': {},
+    }
+
+    def __init__(self):
+        self.client = boto3.client('s3', region_name='us-east-1', aws_access_key_id='benchmark', aws_secret_access_key='benchmark')
+        self.client.meta.events.register_first('before-call.s3', self.respond)
+        self.size = 0
+        self.multipart = False
+
+    def respond(self, model, params, **kwargs):
+        body = params.get('body')
+        if model.name in ('PutObject', 'UploadPart'):
+            self.size += len(body if isinstance(body, bytes) else body.read())
+        if model.name == 'CreateMultipartUpload':
+            self.multipart = True
+        return AWSResponse(None, 200, {}, None), self.RESPONSES[model.name]
+
+    def reset(self):
+        self.size = 0
+        self.multipart = False
+
+
+class DynamoDB:
+    def put_item(self, **kwargs):
+        pass
+
+
+class SQS:
+    def send_message(self, **kwargs):
+        pass
+
+
+def resume_pdf(size_bytes):
+    """A one-page text PDF padded to about size_bytes with an (incompressible) attachment."""
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), "EXPERIENCE\n" + "Built data pipelines in Python and SQL.\n" * 10)
+    doc.embfile_add("portfolio.bin", os.urandom(size_bytes))
+    return doc.tobytes()
+
+
+def json_event(data):
+    return {
+        'httpMethod': 'POST',
+        'resource': '/upload-resume',
+        'headers': {'Content-Type': 'application/json'},
+        'body': json.dumps({
+            'file_content_base64': base64.b64encode(data).decode('ascii'),
+            'file_name': 'resume.pdf',
+            'content_type': 'application/pdf'
+        })
+    }
+
+
+def binary_event(data):
+    return {
+        'httpMethod': 'POST',
+        'resource': '/upload-resume',
+        'headers': {'Content-Type': 'application/pdf', 'X-File-Name': 'resume.pdf'},
+        'isBase64Encoded': True,
+        'body': base64.b64encode(data).decode('ascii')
+    }
+
+
+def multipart_event(data):
+    body = (
+        f'--{BOUNDARY}\r\n'
+        'Content-Disposition: form-data; name="file"; filename="resume.pdf"\r\n'
+        'Content-Type: application/pdf\r\n\r\n'
+    ).encode() + data + f'\r\n--{BOUNDARY}--\r\n'.encode()
+    return {
+        'httpMethod': 'POST',
+        'resource': '/upload-resume',
+        'headers': {'Content-Type': f'multipart/form-data; boundary={BOUNDARY}'},
+        'isBase64Encoded': True,
+        'body': base64.b64encode(body).decode('ascii')
+    }
+
+
+def measure(s3, make_event, data):
+    peaks, timings = [], []
+    for _ in range(RUNS):
+        event = make_event(data)
+        s3.reset()
+        tracemalloc.start()
+        started = time.perf_counter()
+        response = app.lambda_handler(event, None)
+        timings.append(time.perf_counter() - started)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        assert response['statusCode'] == 200, response
+        assert s3.size == len(data)
+    return max(peaks) / 2**20, sorted(timings)[len(timings) // 2] * 1000, s3.multipart
+
+
+def main():
+    s3 = S3()
+    app.s3_client, app.dynamodb_client, app.sqs_client = s3.client, DynamoDB(), SQS()
+    # Keep handler log lines out of the results table
+    logging.getLogger().setLevel(logging.WARNING)
+    print(f"{'size':>5}  {'format':<10} {'peak MB':>8} {'ms':>8}  multipart")
+    for size_mb in SIZES_MB:
+        # A real PDF: the base64 JSON path runs the full upload preflight on it
+        data = resume_pdf(size_mb * 2**20)
+        for label, make_event in (('json', json_event), ('binary', binary_event), ('multipart', multipart_event)):
+            peak_mb, ms, multipart = measure(s3, make_event, data)
+            print(f"{size_mb:>4}M  {label:<10} {peak_mb:>8.1f} {ms:>8.1f}  {'yes' if multipart else 'no'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Chunked DynamoDB and SQS batch calls, with retries of the items a call leaves unprocessed.
+
+The batch APIs succeed as a whole even when some items weren't handled (throttling,
+per-request size limits); those come back as UnprocessedItems / UnprocessedKeys /
+Failed and must be resent, with backoff, or they are silently lost.
+"""
+import time
+
+from structured_logger import get_logger
+
+log = get_logger(__name__)
+
+# Per-call limits of the AWS APIs
+BATCH_WRITE_MAX_ITEMS = 25
+BATCH_GET_MAX_KEYS = 100
+SEND_MESSAGE_BATCH_MAX_ENTRIES = 10
+
+MAX_ATTEMPTS = 5
+BACKOFF_BASE_SECONDS = 0.05
+
+
+def chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _backoff(attempt):
+    time.sleep(BACKOFF_BASE_SECONDS * (2 ** attempt))
+
+
+def batch_write_items(dynamodb_client, table_name, items):
+    """
+    Puts every item with BatchWriteItem, 25 per call. Raises RuntimeError if some
+    are still unprocessed after MAX_ATTEMPTS.
+    """
+    for chunk in chunks(items, BATCH_WRITE_MAX_ITEMS):
+        request_items = {table_name: [{'PutRequest': {'Item': item}} for item in chunk]}
+        for attempt in range(MAX_ATTEMPTS):
+            response = dynamodb_client.batch_write_item(RequestItems=request_items)
+            request_items = response.get('UnprocessedItems') or {}
+            if not request_items:
+                break
+            log.info("Retrying unprocessed writes", table=table_name, count=len(request_items.get(table_name, [])), attempt=attempt + 1)
+            _backoff(attempt)
+        else:
+            raise RuntimeError(f"{len(request_items.get(table_name, []))} items unprocessed after {MAX_ATTEMPTS} attempts")
+
+
+def batch_get_items(dynamodb_client, table_name, keys, projection=None, expression_attribute_names=None):
+    """
+    Reads the items for `keys` with BatchGetItem, 100 keys per call, resending
+    UnprocessedKeys. Returns the items found, in no particular order; missing keys
+    are simply absent. `projection` is a ProjectionExpression limiting what is read.
+    """
+    items = []
+    for chunk in chunks(keys, BATCH_GET_MAX_KEYS):
+        request = {'Keys': chunk}
+        if projection:
+            request['ProjectionExpression'] = projection
+        if expression_attribute_names:
+            request['ExpressionAttributeNames'] = expression_attribute_names
+        request_items = {table_name: request}
+        for attempt in range(MAX_ATTEMPTS):
+            response = dynamodb_client.batch_get_item(RequestItems=request_items)
+            items.extend(response.get('Responses', {}).get(table_name, []))
+            request_items = response.get('UnprocessedKeys') or {}
+            if not request_items:
+                break
+            log.info("Retrying unprocessed reads", table=table_name, count=len(request_items[table_name]['Keys']), attempt=attempt + 1)
+            _backoff(attempt)
+        else:
+            raise RuntimeError(f"{len(request_items[table_name]['Keys'])} keys unprocessed after {MAX_ATTEMPTS} attempts")
+    return items
+
+
+def send_message_batches(sqs_client, queue_url, message_bodies):
+    """
+    Sends each body with SendMessageBatch, 10 per call, resending entries that fail
+    with a retryable (non-sender) error. Returns the indexes of bodies that could
+    not be sent.
+    """
+    failed = []
+    indexed = list(enumerate(message_bodies))
+    for chunk in chunks(indexed, SEND_MESSAGE_BATCH_MAX_ENTRIES):
+        entries = [{'Id': str(index), 'MessageBody': body} for index, body in chunk]
+        for attempt in range(MAX_ATTEMPTS):
+            response = sqs_client.send_message_batch(QueueUrl=queue_url, Entries=entries)
+            retry_ids = set()
+            for failure in response.get('Failed', []):
+                if failure.get('SenderFault'):
+                    log.error("Message rejected", entry_id=failure['Id'], code=failure.get('Code'), error=failure.get('Message'))
+                    failed.append(int(failure['Id']))
+                else:
+                    retry_ids.add(failure['Id'])
+            entries = [entry for entry in entries if entry['Id'] in retry_ids]
+            if not entries:
+                break
+            _backoff(attempt)
+        else:
+            failed.extend(int(entry['Id']) for entry in entries)
+    return sorted(failed)
@@ -0,0 +1,130 @@
+import time
+from botocore.exceptions import ClientError
+
+
+class ContentIndex:
+    """
+    Maps the SHA-256 of an uploaded file to the resume job that analyses it, so an
+    identical upload can reuse that job instead of starting another (single-flight).
+
+    One item per hash in its own table (key `content_sha256`):
+      * resume_id / s3_key - the job that owns the hash;
+      * status             - 'processing', 'completed' or 'failed';
+      * waiters            - string set of resume_ids that attached while processing;
+      * expires_at         - TTL, after which the hash can be claimed again.
+
+    The upload function claims or attaches; the process function resolves the hash
+    when its job finishes and gets back the waiters to fan the result out to.
+    Every transition is a single conditional write on the hash's item, so attaching
+    and resolving can't miss each other.
+
+    A 'processing' claim only holds for lease_seconds: a job that never resolves (its
+    upload died before queueing, or the message ended up on the DLQ) frees the hash
+    for the next identical upload, which takes the claim over together with any
+    waiters. Resolving extends the item to the full ttl_seconds.
+    """
+
+    def __init__(self, dynamodb_client, table_name, ttl_seconds, lease_seconds=600):
+        self.dynamodb_client = dynamodb_client
+        self.table_name = table_name
+        self.ttl_seconds = ttl_seconds
+        self.lease_seconds = lease_seconds
+
+    def claim(self, content_sha256, resume_id, s3_key):
+        """
+        Makes resume_id the job for this hash unless a live, non-failed job already owns
+        it; an expired lease is taken over. Returns None when claimed, otherwise the
+        existing item as {'resume_id', 's3_key', 'status'}.
+        """
+        now = int(time.time())
+        try:
+            # An update rather than a put, so waiters of a claim taken over are kept
+            self.dynamodb_client.update_item(
+                TableName=self.table_name,
+                Key={'content_sha256': {'S': content_sha256}},
+                UpdateExpression="SET resume_id = :rid, s3_key = :key, #st = :processing, created_at = :now, #exp = :lease",
+                ConditionExpression="attribute_not_exists(content_sha256) OR #exp < :now OR #st = :failed",
+                ExpressionAttributeNames={'#exp': 'expires_at', '#st': 'status'},
+                ExpressionAttributeValues={
+                    ':rid': {'S': resume_id},
+                    ':key': {'S': s3_key},
+                    ':processing': {'S': 'processing'},
+                    ':now': {'N': str(now)},
+                    ':lease': {'N': str(now + self.lease_seconds)},
+                    ':failed': {'S': 'failed'}
+                },
+                ReturnValuesOnConditionCheckFailure='ALL_OLD'
+            )
+            return None
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+                raise
+            item = e.response.get('Item', {})
+            return {
+                'resume_id': item.get('resume_id', {}).get('S'),
+                's3_key': item.get('s3_key', {}).get('S'),
+                'status': item.get('status', {}).get('S', 'processing')
+            }
+
+    def attach_waiter(self, content_sha256, waiter_resume_id):
+        """
+        Registers a resume to receive the result of the in-flight job for this hash.
+        Returns False if the job finished or its lease ran out in the meantime (nothing
+        was attached).
+        """
+        try:
+            self.dynamodb_client.update_item(
+                TableName=self.table_name,
+                Key={'content_sha256': {'S': content_sha256}},
+                UpdateExpression="ADD waiters :w",
+                ConditionExpression="#st = :processing AND #exp >= :now",
+                ExpressionAttributeNames={'#st': 'status', '#exp': 'expires_at'},
+                ExpressionAttributeValues={
+                    ':w': {'SS': [waiter_resume_id]},
+                    ':processing': {'S': 'processing'},
+                    ':now': {'N': str(int(time.time()))}
+                }
+            )
+            return True
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+                raise
+            return False
+
+    def waiters(self, content_sha256, resume_id):
+        """The resume_ids attached so far to resume_id's job for this hash, without resolving it."""
+        item = self.dynamodb_client.get_item(
+            TableName=self.table_name,
+            Key={'content_sha256': {'S': content_sha256}},
+            ProjectionExpression="resume_id, waiters",
+            ConsistentRead=True
+        ).get('Item') or {}
+        if item.get('resume_id', {}).get('S') != resume_id:
+            return []
+        return item.get('waiters', {}).get('SS', [])
+
+    def resolve(self, content_sha256, resume_id, status):
+        """
+        Records the final status of the job that owns this hash, keeping the item for the
+        full TTL, and returns the resume_ids waiting on it. A job that doesn't own the
+        hash (any more) gets [].
+        """
+        try:
+            response = self.dynamodb_client.update_item(
+                TableName=self.table_name,
+                Key={'content_sha256': {'S': content_sha256}},
+                UpdateExpression="SET #st = :status, #exp = :exp",
+                ConditionExpression="resume_id = :rid",
+                ExpressionAttributeNames={'#st': 'status', '#exp': 'expires_at'},
+                ExpressionAttributeValues={
+                    ':status': {'S': status},
+                    ':rid': {'S': resume_id},
+                    ':exp': {'N': str(int(time.time()) + self.ttl_seconds)}
+                },
+                ReturnValues='ALL_NEW'
+            )
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+                raise
+            return []
+        return response.get('Attributes', {}).get('waiters', {}).get('SS', [])
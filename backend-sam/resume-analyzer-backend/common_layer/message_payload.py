@@ -0,0 +1,47 @@
+"""
+Small uploaded files carried inside the SQS message itself, so the process function can
+skip the S3 GET. The upload function encodes, the process function decodes; larger
+files keep travelling as an S3 reference only.
+
+A message carries the file as:
+  * file_content  - the bytes, base64-encoded, zlib-compressed first when that helps;
+  * file_encoding - 'zlib+base64' or 'base64'.
+"""
+import os
+import zlib
+import base64
+
+# SQS accepts up to 256 KB per message; the rest of the body and the attributes need
+# a little of that.
+INLINE_PAYLOAD_MAX_BYTES = int(os.environ.get('INLINE_PAYLOAD_MAX_BYTES', str(200 * 1024)))
+# PDFs and DOCX are already compressed inside, so compression rarely wins more than this.
+_MAX_COMPRESSION_RATIO = 4
+
+
+def encode_file(file_bytes):
+    """Returns the message fields for file_bytes, or None when they wouldn't fit."""
+    if not file_bytes or len(file_bytes) > INLINE_PAYLOAD_MAX_BYTES * _MAX_COMPRESSION_RATIO:
+        return None
+    compressed = zlib.compress(file_bytes, 6)
+    if len(compressed) < len(file_bytes):
+        encoding, data = 'zlib+base64', compressed
+    else:
+        encoding, data = 'base64', file_bytes
+    encoded = base64.b64encode(data).decode('ascii')
+    if len(encoded) > INLINE_PAYLOAD_MAX_BYTES:
+        return None
+    return {'file_content': encoded, 'file_encoding': encoding}
+
+
+def decode_file(message_body):
+    """The file bytes carried by a message, or None when it only references S3."""
+    encoded = message_body.get('file_content')
+    if not encoded:
+        return None
+    data = base64.b64decode(encoded)
+    encoding = message_body.get('file_encoding', 'base64')
+    if encoding == 'zlib+base64':
+        return zlib.decompress(data)
+    if encoding == 'base64':
+        return data
+    raise ValueError(f"Unknown file_encoding: {encoding}")
@@ -0,0 +1,174 @@
+"""
+Structured logging shared by the Lambda functions (deployed as the CommonLayer).
+
+Built on the standard logging module, so with the template's `LogFormat: JSON` the
+Lambda runtime writes each call as one JSON object: its own timestamp, level,
+message and requestId, plus the keyword fields passed here as top-level keys.
+
+    log = get_logger(__name__)
+    log.info("Resume saved", s3_key=s3_key, size_bytes=len(file_bytes))
+    log.debug("Claude raw response", completion=lambda: completion)
+
+Nothing is built for a call that won't be emitted: the level and sampling checks come
+first, and the message or any field may be a zero-argument callable that is only
+evaluated when the line is actually written. Field values are redacted (see
+REDACTED_FIELDS) and truncated before they reach the formatter.
+"""
+import os
+import sys
+import json
+import random
+import logging
+
+# Longest string kept in a field, and most items kept from a list.
+LOG_MAX_FIELD_CHARS = int(os.environ.get('LOG_MAX_FIELD_CHARS', '500'))
+LOG_MAX_LIST_ITEMS = int(os.environ.get('LOG_MAX_LIST_ITEMS', '20'))
+_MAX_DEPTH = 4
+
+# Per-level sampling, e.g. "DEBUG=0.05,INFO=0.5". Levels not listed are always kept.
+# Sampling is decided once per invocation, so a sampled invocation logs coherently.
+LOG_SAMPLE_RATES = os.environ.get('LOG_SAMPLE_RATES', '')
+
+# Request bodies, file contents, prompts and credentials are never logged.
+REDACTED_FIELDS = frozenset({
+    'body', 'file_content_base64', 'file_content', 'file_bytes', 'raw_output', 'resume_text',
+    'resume_prompt', 'authorization', 'cookie', 'x-api-key', 'x-amz-security-token',
+    'upload_fields', 'signature', 'policy', 'email', 'phone',
+})
+
+# Field names the logging module itself uses on LogRecord; ours get a trailing underscore.
+_RESERVED_ATTRS = frozenset(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+
+def _parse_sample_rates(spec):
+    rates = {}
+    for part in spec.split(','):
+        name, _, rate = part.partition('=')
+        level = logging.getLevelName(name.strip().upper())
+        if isinstance(level, int) and rate.strip():
+            rates[level] = min(1.0, max(0.0, float(rate)))
+    return rates
+
+
+_sample_rates = _parse_sample_rates(LOG_SAMPLE_RATES)
+_sampled_out = set()
+
+
+def start_invocation():
+    """Re-rolls per-level sampling; call once at the top of each handler invocation."""
+    _sampled_out.clear()
+    for level, rate in _sample_rates.items():
+        if random.random() >= rate:
+            _sampled_out.add(level)
+
+
+def sanitize(value, key=None, depth=0):
+    """Returns a JSON-safe copy of `value` with sensitive fields redacted and long values cut."""
+    if key is not None and str(key).lower() in REDACTED_FIELDS:
+        if isinstance(value, (str, bytes)):
+            return f"[redacted {len(value)} chars]"
+        return "[redacted]"
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, str):
+        if len(value) > LOG_MAX_FIELD_CHARS:
+            return f"{value[:LOG_MAX_FIELD_CHARS]}...[{len(value) - LOG_MAX_FIELD_CHARS} more chars]"
+        return value
+    if isinstance(value, (bytes, bytearray)):
+        return f"[{len(value)} bytes]"
+    if depth >= _MAX_DEPTH:
+        return "[...]"
+    if isinstance(value, dict):
+        return {str(k): sanitize(v, k, depth + 1) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = list(value)
+        kept = [sanitize(item, None, depth + 1) for item in items[:LOG_MAX_LIST_ITEMS]]
+        if len(items) > LOG_MAX_LIST_ITEMS:
+            kept.append(f"[{len(items) - LOG_MAX_LIST_ITEMS} more]")
+        return kept
+    return sanitize(str(value), None, depth)
+
+
+def event_summary(event):
+    """The routing facts of an API Gateway or SQS event, without bodies or headers."""
+    if 'Records' in event:
+        return {
+            'record_count': len(event['Records']),
+            'message_ids': [record.get('messageId') for record in event['Records']]
+        }
+    headers = {key.lower(): value for key, value in (event.get('headers') or {}).items()}
+    return {
+        'http_method': event.get('httpMethod'),
+        'resource': event.get('resource'),
+        'path_parameters': event.get('pathParameters'),
+        'query_parameters': event.get('queryStringParameters'),
+        'content_type': headers.get('content-type'),
+        'body_chars': len(event.get('body') or ''),
+        'is_base64_encoded': event.get('isBase64Encoded', False)
+    }
+
+
+class _JsonFormatter(logging.Formatter):
+    """Stand-in for the Lambda runtime's JSON formatter when running outside Lambda."""
+
+    def format(self, record):
+        entry = {
+            'timestamp': self.formatTime(record),
+            'level': record.levelname,
+            'message': record.getMessage(),
+            'logger': record.name
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in _RESERVED_ATTRS})
+        if record.exc_info:
+            entry['stackTrace'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class StructuredLogger:
+    def __init__(self, name):
+        self._logger = logging.getLogger(name)
+
+    def enabled_for(self, level):
+        return level not in _sampled_out and self._logger.isEnabledFor(level)
+
+    def _log(self, level, message, fields, exc_info=False):
+        if not self.enabled_for(level):
+            return
+        if callable(message):
+            message = message()
+        extra = {}
+        for key, value in fields.items():
+            if callable(value):
+                value = value()
+            extra[f"{key}_" if key in _RESERVED_ATTRS else key] = sanitize(value, key)
+        self._logger.log(level, message, extra=extra, exc_info=exc_info, stacklevel=3)
+
+    def debug(self, message, **fields):
+        self._log(logging.DEBUG, message, fields)
+
+    def info(self, message, **fields):
+        self._log(logging.INFO, message, fields)
+
+    def warning(self, message, **fields):
+        self._log(logging.WARNING, message, fields)
+
+    def error(self, message, **fields):
+        self._log(logging.ERROR, message, fields)
+
+    def exception(self, message, **fields):
+        """ERROR with the current exception's stack trace."""
+        self._log(logging.ERROR, message, fields, exc_info=True)
+
+
+def get_logger(name):
+    return StructuredLogger(name)
+
+
+# The Lambda runtime installs its own (JSON) handler on the root logger and sets the
+# level from ApplicationLogLevel. Elsewhere (sam local, scripts) emit the same shape.
+_root = logging.getLogger()
+if not _root.handlers:
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(_JsonFormatter())
+    _root.addHandler(_handler)
+    _root.setLevel(os.environ.get('LOG_LEVEL', 'INFO').upper())
@@ -1,22 +1,273 @@
 import json
 import os
+import time
 import boto3
 from botocore.exceptions import ClientError
 
+from structured_logger import get_logger, start_invocation, event_summary
+from batch_operations import batch_get_items
+from status_cache import StatusCache
+
 dynamodb_client = boto3.client('dynamodb')
 
+log = get_logger(__name__)
+
 DYNAMODB_TABLE_NAME = os.environ.get('DYNAMODB_TABLE_NAME')
+BATCH_TABLE_NAME = os.environ.get('BATCH_TABLE_NAME')
+
+# Per-resume attributes returned by the batch status; analysis_results is left out.
+BATCH_STATUS_PROJECTION = "resume_id, #st, compatibility_score, error_message"
+# Multi-resume status (POST /resume-status/batch): ids per request (one BatchGetItem),
+# the record attributes a caller may ask for, and what it gets by default.
+MAX_STATUS_IDS = 100
+STATUS_FIELDS = (
+    'status', 'compatibility_score', 'error_message', 'top_technical_skills_found', 'suggested_keywords',
+    'compatibility_explanation', 'analysis_results', 'file_name', 'upload_timestamp', 'analysis_timestamp',
+    'version',
+)
+DEFAULT_STATUS_FIELDS = ('status', 'compatibility_score')
+# Long polling (?wait=<seconds>&since=<state>): longest wait, kept under API Gateway's
+# 29 s limit, and the re-check interval, doubling from the first to the last value.
+MAX_WAIT_SECONDS = int(os.environ.get('MAX_WAIT_SECONDS', '20'))
+WAIT_RESERVE_MS = 1500
+WAIT_BACKOFF_SECONDS = (0.25, 2.0)
+# What a waiting request re-reads: enough to tell the state changed and to answer
+# If-None-Match, not the whole result.
+STATE_PROJECTION = "#st, compatibility_score, version"
+# Processing lease bookkeeping; changes without a new version, so it isn't returned.
+INTERNAL_ATTRIBUTES = ('processing_owner', 'lease_expires_at')
+# A completed analysis never changes, so browsers, API Gateway caching or a CDN may keep
+# it; anything else is revalidated with If-None-Match.
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+# Finished resumes' responses kept in the container (see status_cache). Sized for a
+# 128 MB function: a typical completed body is ~1.5 KB.
+STATUS_CACHE_MAX_ENTRIES = int(os.environ.get('STATUS_CACHE_MAX_ENTRIES', '2000'))
+STATUS_CACHE_MAX_BYTES = int(os.environ.get('STATUS_CACHE_MAX_BYTES', str(8 * 1024 * 1024)))
+# A failure can still be superseded by a late completion, so it is kept for less time.
+STATUS_CACHE_TTL_SECONDS = {
+    'completed': int(os.environ.get('STATUS_CACHE_COMPLETED_TTL_SECONDS', str(24 * 3600))),
+    'failed': int(os.environ.get('STATUS_CACHE_FAILED_TTL_SECONDS', '300')),
+}
+status_cache = StatusCache(STATUS_CACHE_MAX_ENTRIES, STATUS_CACHE_MAX_BYTES, STATUS_CACHE_TTL_SECONDS)
+
+
+def parse_item(item):
+    """
+    Convert DynamoDB JSON format to a more readable Python dict
+    This is a common pattern for DynamoDB item deserialization
+    """
+    parsed_item = {}
+    for k, v in item.items():
+        for key_type, value in v.items():
+            if key_type == 'S':
+                parsed_item[k] = value
+            elif key_type == 'N':
+                parsed_item[k] = int(value) if value.isdigit() else float(value)
+            elif key_type == 'BOOL':
+                parsed_item[k] = bool(value)
+            elif key_type == 'L':
+                # Assuming list of strings for simplicity
+                parsed_item[k] = [x['S'] for x in value if 'S' in x]
+            # Add other types (M for Map, SS for String Set, etc.) if your data schema uses them
+    return parsed_item
+
+
+def state_of(item):
+    """
+    Token for what a poller has seen of a resume: its status, and for a resume still
+    processing whether the early compatibility score is out yet.
+    """
+    status = item.get('status', {}).get('S', 'processing')
+    if status == 'processing' and 'compatibility_score' in item:
+        return 'processing:scored'
+    return status
+
+
+def read_progress(resume_id):
+    """The status, score and version from the resume's record, or None if it has none."""
+    return dynamodb_client.get_item(
+        TableName=DYNAMODB_TABLE_NAME,
+        Key={'resume_id': {'S': resume_id}},
+        ProjectionExpression=STATE_PROJECTION,
+        ExpressionAttributeNames={'#st': 'status'}
+    ).get('Item')
+
+
+def etag_for(progress):
+    """
+    ETag of a resume's status response: the version of its record, which every status
+    change bumps. None for a record written before versions were kept.
+    """
+    if not progress or 'version' not in progress:
+        return None
+    return f'"v{progress["version"]["N"]}"'
+
+
+def request_header(event, name):
+    """Case-insensitive request header lookup (API Gateway keeps the client's casing)."""
+    for key, value in (event.get('headers') or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def etag_matches(if_none_match, etag):
+    """Whether an If-None-Match header value covers etag (weak comparison)."""
+    if not if_none_match or not etag:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in tags or etag in (tag[2:] if tag.startswith('W/') else tag for tag in tags)
+
+
+def cache_headers(etag, status):
+    """ETag and Cache-Control for a single resume's status response."""
+    cache = {'Cache-Control': IMMUTABLE_CACHE_CONTROL if status == 'completed' else REVALIDATE_CACHE_CONTROL}
+    if etag:
+        cache['ETag'] = etag
+    return cache
+
+
+def not_modified(headers, etag, status):
+    """304 answer to an If-None-Match that still matches."""
+    return {
+        'statusCode': 304,
+        'headers': {**headers, **cache_headers(etag, status)},
+        'body': ''
+    }
+
+
+def wait_for_change(resume_id, since, wait_seconds, context):
+    """
+    Re-reads the resume's progress with backoff until its state differs from since or
+    the wait runs out (bounded by MAX_WAIT_SECONDS and the time left in this
+    invocation). Returns the last item read, or None if the resume doesn't exist.
+    """
+    deadline = time.monotonic() + min(wait_seconds, MAX_WAIT_SECONDS)
+    if context is not None:
+        deadline = min(deadline, time.monotonic() + (context.get_remaining_time_in_millis() - WAIT_RESERVE_MS) / 1000)
+    delay, max_delay = WAIT_BACKOFF_SECONDS
+    checks = 0
+    while True:
+        item = read_progress(resume_id)
+        checks += 1
+        state = state_of(item) if item else None
+        remaining = deadline - time.monotonic()
+        if state != since or remaining <= 0:
+            log.info("Long poll finished", resume_id=resume_id, since=since, state=state, checks=checks, changed=state != since)
+            return item
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, max_delay)
+
+
+def batch_status(batch_id):
+    """
+    Status of every resume in a bulk upload plus counts per status, from one GetItem on
+    the batch and one BatchGetItem per 100 resumes. Returns None for an unknown batch.
+    """
+    batch = dynamodb_client.get_item(
+        TableName=BATCH_TABLE_NAME,
+        Key={'batch_id': {'S': batch_id}}
+    ).get('Item')
+    if not batch:
+        return None
+    files = [entry['M'] for entry in batch['files']['L']]
+    records = batch_get_items(
+        dynamodb_client,
+        DYNAMODB_TABLE_NAME,
+        [{'resume_id': entry['resume_id']} for entry in files],
+        projection=BATCH_STATUS_PROJECTION,
+        expression_attribute_names={'#st': 'status'}
+    )
+    by_id = {record['resume_id']: record for record in map(parse_item, records)}
+
+    counts = {}
+    resumes = []
+    for entry in files:
+        resume_id = entry['resume_id']['S']
+        # Records are only written when the batch is completed
+        record = by_id.get(resume_id, {'status': 'awaiting_upload'})
+        counts[record['status']] = counts.get(record['status'], 0) + 1
+        resumes.append({'file_name': entry['file_name']['S'], **record, 'resume_id': resume_id})
+    return {
+        "batch_id": batch_id,
+        "batch_status": batch['status']['S'],
+        "file_count": len(files),
+        "counts": counts,
+        "resumes": resumes
+    }
+
+
+def projection_expression(fields):
+    """ProjectionExpression and names for resume_id plus fields (some are reserved words)."""
+    names = {f"#f{index}": field for index, field in enumerate(fields)}
+    return ", ".join(['resume_id', *names]), names
+
+
+def resume_statuses(resume_ids, fields):
+    """
+    The requested fields of up to MAX_STATUS_IDS resumes, as {resume_id: {field: value}}
+    (analysis_results parsed), from one BatchGetItem of just those attributes of the
+    records. Unknown ids are left out.
+    """
+    projection, names = projection_expression(fields)
+    items = batch_get_items(
+        dynamodb_client, DYNAMODB_TABLE_NAME, [{'resume_id': {'S': resume_id}} for resume_id in resume_ids],
+        projection, names
+    )
+
+    statuses = {}
+    for item in items:
+        parsed = parse_item(item)
+        resume_id = parsed.pop('resume_id')
+        if isinstance(parsed.get('analysis_results'), str):
+            try:
+                parsed['analysis_results'] = json.loads(parsed['analysis_results'])
+            except json.JSONDecodeError:
+                log.warning("analysis_results is not valid JSON", resume_id=resume_id)
+        statuses[resume_id] = parsed
+    log.info("Resume statuses read", requested=len(resume_ids), found=len(statuses))
+    return statuses
+
+
+def parse_status_request(body):
+    """Returns (resume_ids, fields) from a batch status request body, or raises ValueError."""
+    resume_ids = body.get('resume_ids')
+    if not isinstance(resume_ids, list) or not resume_ids or not all(isinstance(i, str) and i for i in resume_ids):
+        raise ValueError("resume_ids must be a non-empty list of resume IDs.")
+    resume_ids = list(dict.fromkeys(resume_ids))
+    if len(resume_ids) > MAX_STATUS_IDS:
+        raise ValueError(f"At most {MAX_STATUS_IDS} resume IDs per request.")
+    fields = body.get('fields') or list(DEFAULT_STATUS_FIELDS)
+    if not isinstance(fields, list) or not all(field in STATUS_FIELDS for field in fields):
+        raise ValueError(f"fields must be a list of: {', '.join(sorted(STATUS_FIELDS))}.")
+    return resume_ids, list(dict.fromkeys(fields))
+
 
 def lambda_handler(event, context):
     """
     Retrieves resume analysis status and results from DynamoDB.
+    /batch-status/{batch_id} returns the aggregated status of a bulk upload.
+    POST /resume-status/batch with {"resume_ids": [...], "fields": [...]} returns the
+    chosen fields (default: status and score) of up to 100 resumes at once.
+
+    A poller can pass ?wait=<seconds>&since=<state> with the 'state' of its last
+    response: the request then only answers once the state has changed, or the wait
+    is over, instead of the poller asking again and again.
+
+    Single-resume responses carry an ETag (the record's version) and a Cache-Control
+    that lets completed results be cached for good; If-None-Match is answered with a
+    304, for a long poll from the state it re-reads. Finished resumes are also kept in a
+    warm-container cache and served from it.
     """
-    print(f"Received event for status: {json.dumps(event)}")
+    start_invocation()
+    log.info("Received event for status", **event_summary(event))
 
     headers = {
         'Access-Control-Allow-Origin': '*', # For hackathon, allows any origin. Harden in production.
         'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-        'Access-Control-Allow-Methods': 'OPTIONS,GET',
+        'Access-Control-Allow-Methods': 'OPTIONS,GET,POST',
+        'Access-Control-Expose-Headers': 'ETag',
         'Content-Type': 'application/json'
     }
 
@@ -28,6 +279,56 @@ def lambda_handler(event, context):
             'body': ''
         }
 
+    if event['httpMethod'] == 'POST' and event.get('resource', '').endswith('/batch'):
+        try:
+            resume_ids, fields = parse_status_request(json.loads(event.get('body') or '{}'))
+        except (ValueError, AttributeError) as e:
+            return {
+                'statusCode': 400,
+                'headers': headers,
+                'body': json.dumps({"message": str(e) if isinstance(e, ValueError) else "Invalid request body."})
+            }
+        try:
+            statuses = resume_statuses(resume_ids, fields)
+        except (ClientError, RuntimeError) as e:
+            log.error("Could not read resume statuses", count=len(resume_ids), error=str(e))
+            return {
+                'statusCode': 500,
+                'headers': headers,
+                'body': json.dumps({"message": f"AWS Service Error: {str(e)}"})
+            }
+        return {
+            'statusCode': 200,
+            'headers': headers,
+            'body': json.dumps({
+                "resumes": statuses,
+                "not_found": [resume_id for resume_id in resume_ids if resume_id not in statuses]
+            })
+        }
+
+    batch_id = (event.get('pathParameters') or {}).get('batch_id')
+    if batch_id:
+        try:
+            result = batch_status(batch_id)
+        except (ClientError, RuntimeError) as e:
+            log.error("Could not read batch status", batch_id=batch_id, error=str(e))
+            return {
+                'statusCode': 500,
+                'headers': headers,
+                'body': json.dumps({"message": f"AWS Service Error: {str(e)}"})
+            }
+        if result is None:
+            return {
+                'statusCode': 404,
+                'headers': headers,
+                'body': json.dumps({"message": "Batch ID not found."})
+            }
+        return {
+            'statusCode': 200,
+            'headers': headers,
+            'body': json.dumps(result)
+        }
+
     # Extract resume_id from path parameters
     # Assumes API Gateway path /{resume_id}
     resume_id = None
@@ -41,7 +342,46 @@ def lambda_handler(event, context):
             'body': json.dumps({"message": "Missing resume_id in path."})
         }
 
+    query = event.get('queryStringParameters') or {}
+    since = query.get('since')
     try:
+        wait_seconds = max(0.0, float(query.get('wait') or 0))
+    except ValueError:
+        return {
+            'statusCode': 400,
+            'headers': headers,
+            'body': json.dumps({"message": "wait must be a number of seconds."})
+        }
+
+    # A finished resume read before by this container is answered without DynamoDB,
+    # unless the poller has already seen it and is waiting for something newer.
+    cached = status_cache.get(resume_id)
+    log.info("Status cache", resume_id=resume_id, hit=cached is not None, **status_cache.stats)
+    if cached and since != cached['state']:
+        if etag_matches(request_header(event, 'if-none-match'), cached['etag']):
+            return not_modified(headers, cached['etag'], cached['status'])
+        return {
+            'statusCode': 200,
+            'headers': {**headers, **cache_headers(cached['etag'], cached['status'])},
+            'body': cached['body']
+        }
+
+    try:
+        if since:
+            # A poller: without a wait this is a single read
+            progress = wait_for_change(resume_id, since, wait_seconds, context)
+            if progress is None:
+                return {
+                    'statusCode': 404,
+                    'headers': headers,
+                    'body': json.dumps({"message": "Resume ID not found."})
+                }
+            # The re-read state carries the version, so an unchanged resume needs no second read
+            etag = etag_for(progress)
+            if etag_matches(request_header(event, 'if-none-match'), etag):
+                log.info("Status not modified", resume_id=resume_id, etag=etag)
+                return not_modified(headers, etag, progress.get('status', {}).get('S'))
+
         response = dynamodb_client.get_item(
             TableName=DYNAMODB_TABLE_NAME,
             Key={'resume_id': {'S': resume_id}}
@@ -55,46 +395,42 @@ def lambda_handler(event, context):
                 'body': json.dumps({"message": "Resume ID not found."})
             }
 
-        # Convert DynamoDB JSON format to a more readable Python dict
-        # This is a common pattern for DynamoDB item deserialization
-        parsed_item = {}
-        for k, v in item.items():
-            for key_type, value in v.items():
-                if key_type == 'S':
-                    parsed_item[k] = value
-                elif key_type == 'N':
-                    parsed_item[k] = int(value) if value.isdigit() else float(value)
-                elif key_type == 'BOOL':
-                    parsed_item[k] = bool(value)
-                elif key_type == 'L':
-                    # Assuming list of strings for simplicity
-                    parsed_item[k] = [x['S'] for x in value if 'S' in x]
-                # Add other types (M for Map, SS for String Set, etc.) if your data schema uses them
+        etag = etag_for(item)
+        if etag_matches(request_header(event, 'if-none-match'), etag):
+            log.info("Status not modified", resume_id=resume_id, etag=etag)
+            return not_modified(headers, etag, item.get('status', {}).get('S'))
+
+        parsed_item = parse_item(item)
+        for name in INTERNAL_ATTRIBUTES:
+            parsed_item.pop(name, None)
+        parsed_item['state'] = state_of(item) # Pass back as ?since= to wait for the next change
 
         # Parse analysis_results JSON string if it exists
         if 'analysis_results' in parsed_item and isinstance(parsed_item['analysis_results'], str):
             try:
                 parsed_item['analysis_results'] = json.loads(parsed_item['analysis_results'])
             except json.JSONDecodeError:
-                print(f"Warning: analysis_results for {resume_id} is not valid JSON.")
+                log.warning("analysis_results is not valid JSON", resume_id=resume_id)
                 # Keep as string or set to None/error representation
                 pass
 
+        body = json.dumps(parsed_item)
+        status_cache.put(resume_id, parsed_item.get('status'), parsed_item['state'], body, etag)
         return {
             'statusCode': 200,
-            'headers': headers,
-            'body': json.dumps(parsed_item)
+            'headers': {**headers, **cache_headers(etag, parsed_item.get('status'))},
+            'body': body
         }
 
     except ClientError as e:
-        print(f"AWS Client Error: {e}")
+        log.error("AWS Client Error", resume_id=resume_id, error=str(e))
         return {
             'statusCode': 500,
             'headers': headers,
             'body': json.dumps({"message": f"AWS Service Error: {str(e)}"})
         }
     except Exception as e:
-        print(f"Unexpected error: {e}")
+        log.exception("Unexpected error", resume_id=resume_id, error=str(e))
         return {
             'statusCode': 500,
             'headers': headers,
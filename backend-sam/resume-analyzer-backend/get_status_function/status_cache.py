@@ -0,0 +1,77 @@
+import time
+from collections import OrderedDict
+
+
+class StatusCache:
+    """
+    In-container read-through cache of finished resumes' status responses, kept across
+    warm invocations so repeat reads of a result skip DynamoDB altogether.
+
+    Only completed and failed resumes are stored, each for its own TTL: a completed
+    analysis never changes, while a failure can still be superseded by a late
+    completion. Bounded both by entry count and by the bytes of the cached bodies, and
+    evicted least recently used first, to stay well inside a 128 MB function.
+
+    Counters accumulate for the container's lifetime (see stats), so each invocation
+    can log the running hit rate.
+    """
+
+    def __init__(self, max_entries, max_bytes, ttl_seconds):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds # {status: seconds}; statuses not listed aren't cached
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.counters = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0, 'stored': 0}
+
+    @staticmethod
+    def _size(entry):
+        return len(entry['body']) + len(entry.get('etag') or '') + 100 # rough per-entry overhead
+
+    def _drop(self, resume_id):
+        entry = self._entries.pop(resume_id)
+        self._bytes -= self._size(entry)
+
+    def get(self, resume_id):
+        """The cached entry ({'body', 'etag', 'status', 'state'}) for resume_id, or None."""
+        entry = self._entries.get(resume_id)
+        if entry is None:
+            self.counters['misses'] += 1
+            return None
+        if entry['expires_at'] <= time.monotonic():
+            self._drop(resume_id)
+            self.counters['expired'] += 1
+            self.counters['misses'] += 1
+            return None
+        self._entries.move_to_end(resume_id)
+        self.counters['hits'] += 1
+        return entry
+
+    def put(self, resume_id, status, state, body, etag=None):
+        """Stores a response body if the status is cacheable and it fits; returns whether it was stored."""
+        ttl = self.ttl_seconds.get(status)
+        if not ttl:
+            return False
+        entry = {'body': body, 'etag': etag, 'status': status, 'state': state, 'expires_at': time.monotonic() + ttl}
+        size = self._size(entry)
+        if size > self.max_bytes // 10:
+            return False # One oversized result shouldn't flush everything else
+        if resume_id in self._entries:
+            self._drop(resume_id)
+        self._entries[resume_id] = entry
+        self._bytes += size
+        self.counters['stored'] += 1
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+            self.counters['evictions'] += 1
+        return True
+
+    @property
+    def stats(self):
+        lookups = self.counters['hits'] + self.counters['misses']
+        return {
+            **self.counters,
+            'hit_rate': round(self.counters['hits'] / lookups, 3) if lookups else None,
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+        }
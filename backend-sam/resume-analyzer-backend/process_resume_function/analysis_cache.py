@@ -0,0 +1,111 @@
+import json
+import time
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from botocore.exceptions import ClientError, BotoCoreError
+
+from structured_logger import get_logger
+
+log = get_logger(__name__)
+
+
+def canonicalize_text(text):
+    """Normalizes Unicode forms and whitespace so cosmetic differences share a cache entry."""
+    text = unicodedata.normalize('NFKC', text)
+    return "\n".join(" ".join(line.split()) for line in text.splitlines() if line.strip())
+
+
+class AnalysisCache:
+    """
+    Cache of Bedrock analysis results keyed by hash(canonical prompt text, model ID, prompt version).
+
+    Two tiers:
+      * an in-container LRU of up to `max_entries` results;
+      * a DynamoDB table with TTL on `expires_at`, shared by every container.
+
+    Changing the model or bumping the prompt version changes every key, so stale entries
+    are simply never read again and expire through TTL.
+    """
+
+    def __init__(self, dynamodb_client, table_name, ttl_seconds, max_entries):
+        self.dynamodb_client = dynamodb_client
+        self.table_name = table_name
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = {'memory_hits': 0, 'dynamodb_hits': 0, 'misses': 0}
+
+    def _count(self, stat):
+        with self._lock:
+            self.stats[stat] += 1
+
+    @staticmethod
+    def key_for(text, model_id, prompt_version):
+        digest = hashlib.sha256()
+        for part in (prompt_version, model_id, canonicalize_text(text)):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\x00')
+        return digest.hexdigest()
+
+    def _remember(self, key, analysis_results):
+        with self._lock:
+            self._memory[key] = analysis_results
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, key):
+        """Returns the cached analysis dict for `key`, or None. Updates hit/miss stats."""
+        with self._lock:
+            analysis_results = self._memory.get(key)
+            if analysis_results is not None:
+                self._memory.move_to_end(key)
+        if analysis_results is not None:
+            self._count('memory_hits')
+            return analysis_results
+
+        if self.table_name:
+            try:
+                response = self.dynamodb_client.get_item(
+                    TableName=self.table_name,
+                    Key={'cache_key': {'S': key}}
+                )
+                item = response.get('Item')
+                # TTL deletion is lazy, so expired items can still be returned for a while.
+                if item and int(item['expires_at']['N']) > time.time():
+                    analysis_results = json.loads(item['analysis_results']['S'])
+                    self._count('dynamodb_hits')
+                    self._remember(key, analysis_results)
+                    return analysis_results
+            except (ClientError, BotoCoreError, KeyError, ValueError) as e:
+                log.warning("Analysis cache read failed", cache_key=key, error=str(e))
+
+        self._count('misses')
+        return None
+
+    def put(self, key, analysis_results, model_id=None, prompt_version=None):
+        """Stores a successful analysis in both tiers. Failures are logged, never raised."""
+        self._remember(key, analysis_results)
+        if not self.table_name:
+            return
+        now = int(time.time())
+        item = {
+            'cache_key': {'S': key},
+            'analysis_results': {'S': json.dumps(analysis_results)},
+            'created_at': {'N': str(now)},
+            'expires_at': {'N': str(now + self.ttl_seconds)}
+        }
+        if model_id:
+            item['model_id'] = {'S': model_id}
+        if prompt_version:
+            item['prompt_version'] = {'S': prompt_version}
+        try:
+            self.dynamodb_client.put_item(TableName=self.table_name, Item=item)
+        except (ClientError, BotoCoreError) as e:
+            log.warning("Analysis cache write failed", cache_key=key, error=str(e))
@@ -1,55 +1,23 @@
 import json
 import os
 import time
+import zlib
+import hashlib
+import threading
 import boto3
-from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import ClientError, BotoCoreError, EndpointConnectionError, ConnectTimeoutError, ReadTimeoutError
 from botocore.config import Config
 
-# IMPORTANT: These imports rely on your Lambda Layer
-# Make sure your layer includes PyMuPDF (fitz) and python-docx
-import fitz # PyMuPDF
-from docx import Document # python-docx
-from io import BytesIO
-
-# --- Helper functions for text extraction (from text_extractor.py) ---
-def extract_text_from_pdf(pdf_bytes: bytes) -> str:
-    """Extracts text from PDF bytes using PyMuPDF."""
-    text = ""
-    try:
-        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-        for page in doc:
-            text += page.get_text()
-        doc.close()
-    except Exception as e:
-        print(f"Error extracting text from PDF: {e}")
-        raise ValueError(f"Could not extract text from PDF: {e}")
-    return text
-
-def extract_text_from_docx(docx_bytes: bytes) -> str:
-    """Extracts text from DOCX bytes using python-docx."""
-    text = ""
-    try:
-        doc = Document(BytesIO(docx_bytes))
-        for para in doc.paragraphs:
-            text += para.text + "\n"
-    except Exception as e:
-        print(f"Error extracting text from DOCX: {e}")
-        raise ValueError(f"Could not extract text from DOCX: {e}")
-    return text
-
-def extract_text_from_file_bytes(file_bytes: bytes, file_extension: str) -> str:
-    """
-    Extracts text based on file extension.
-    Raises ValueError for unsupported types or extraction errors.
-    """
-    file_extension = file_extension.lower().strip('.')
-    if file_extension == 'pdf':
-        return extract_text_from_pdf(file_bytes)
-    elif file_extension == 'docx':
-        return extract_text_from_docx(file_bytes)
-    else:
-        raise ValueError(f"Unsupported file type for extraction: {file_extension}")
-# --- End of helper functions ---
+from text_extractor import extract_lines_from_file_bytes, EXTRACTOR_VERSION
+from extraction_cache import ExtractionCache
+from section_segmenter import segment_sections
+from prompt_builder import build_prompt, SYSTEM_PROMPT, MAX_OUTPUT_TOKENS, PROMPT_VERSION
+from analysis_cache import AnalysisCache
+from incremental_json import IncrementalObjectParser
+from structured_logger import get_logger, start_invocation, event_summary
+from content_index import ContentIndex
+from message_payload import decode_file
 
 
 # Initialize AWS clients
@@ -67,197 +35,589 @@ s3_client = boto3.client('s3', config=boto3_config)
 dynamodb_client = boto3.client('dynamodb', config=boto3_config)
 bedrock_runtime_client = boto3.client('bedrock-runtime', config=boto3_config)
 
+log = get_logger(__name__)
+
 
 # Environment variables (set in Lambda Console)
 DYNAMODB_TABLE_NAME = os.environ.get('DYNAMODB_TABLE_NAME')
 BEDROCK_MODEL_ID = os.environ.get('BEDROCK_MODEL_ID', 'anthropic.claude-3-haiku-20240307-v1:0')
+EXTRACTION_CACHE_BUCKET = os.environ.get('EXTRACTION_CACHE_BUCKET') # Durable tier is skipped when unset
+EXTRACTION_CACHE_PREFIX = os.environ.get('EXTRACTION_CACHE_PREFIX', 'extraction-cache/')
+EXTRACTION_CACHE_TMP_MAX_BYTES = int(os.environ.get('EXTRACTION_CACHE_TMP_MAX_BYTES', str(64 * 1024 * 1024)))
+ANALYSIS_CACHE_TABLE_NAME = os.environ.get('ANALYSIS_CACHE_TABLE_NAME') # Only the in-memory tier is used when unset
+ANALYSIS_CACHE_TTL_SECONDS = int(os.environ.get('ANALYSIS_CACHE_TTL_SECONDS', str(30 * 24 * 3600)))
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.environ.get('ANALYSIS_CACHE_MAX_ENTRIES', '500'))
+# Content hash -> job index written by the upload function; results are fanned out to
+# uploads of the same file that attached while the job ran.
+CONTENT_INDEX_TABLE_NAME = os.environ.get('CONTENT_INDEX_TABLE_NAME')
+CONTENT_INDEX_TTL_SECONDS = int(os.environ.get('CONTENT_INDEX_TTL_SECONDS', str(7 * 24 * 3600)))
+# Marks the static system block as a Bedrock prompt-cache checkpoint. Needs a model that
+# supports prompt caching, and only takes effect once the block reaches the model's minimum
+# cacheable length; below that Bedrock ignores the checkpoint and reports zero cache tokens.
+BEDROCK_PROMPT_CACHING = os.environ.get('BEDROCK_PROMPT_CACHING', 'false').lower() == 'true'
+# Stream the completion and publish the score and top skills as soon as they are parsed.
+BEDROCK_STREAMING = os.environ.get('BEDROCK_STREAMING', 'false').lower() == 'true'
+EARLY_RESULT_FIELDS = ('compatibility_score', 'top_technical_skills_found')
+# Records from one SQS batch processed at the same time; keep <= max_pool_connections.
+MAX_CONCURRENT_RECORDS = int(os.environ.get('MAX_CONCURRENT_RECORDS', '10'))
+# Transient failures are retried through SQS until this many deliveries, then marked failed.
+MAX_RECEIVE_COUNT = int(os.environ.get('MAX_RECEIVE_COUNT', '3'))
+# How long a claim keeps other deliveries of the same resume away. Longer than the function
+# timeout, so a lease only lapses once the invocation holding it is gone.
+CLAIM_LEASE_SECONDS = int(os.environ.get('CLAIM_LEASE_SECONDS', '60'))
+RETRYABLE_ERROR_CODES = {
+    'ThrottlingException', 'TooManyRequestsException', 'ServiceUnavailableException',
+    'InternalServerException', 'ModelTimeoutException', 'ModelNotReadyException',
+    'ProvisionedThroughputExceededException', 'RequestLimitExceeded', 'SlowDown', 'InternalError',
+}
 
-def lambda_handler(event, context):
+# Lives for the lifetime of the container, so the /tmp tier is reused by warm invocations.
+extraction_cache = ExtractionCache(
+    s3_client,
+    bucket=EXTRACTION_CACHE_BUCKET,
+    prefix=EXTRACTION_CACHE_PREFIX,
+    version=EXTRACTOR_VERSION,
+    tmp_dir='/tmp/extraction-cache',
+    tmp_max_bytes=EXTRACTION_CACHE_TMP_MAX_BYTES
+)
+analysis_cache = AnalysisCache(
+    dynamodb_client,
+    table_name=ANALYSIS_CACHE_TABLE_NAME,
+    ttl_seconds=ANALYSIS_CACHE_TTL_SECONDS,
+    max_entries=ANALYSIS_CACHE_MAX_ENTRIES
+)
+content_index = (
+    ContentIndex(dynamodb_client, CONTENT_INDEX_TABLE_NAME, CONTENT_INDEX_TTL_SECONDS)
+    if CONTENT_INDEX_TABLE_NAME else None
+)
+
+# Token usage reported by Bedrock, summed per invocation (see reset in lambda_handler).
+USAGE_FIELDS = ('input_tokens', 'output_tokens', 'cache_read_input_tokens', 'cache_creation_input_tokens')
+bedrock_usage_lock = threading.Lock()
+bedrock_usage = dict.fromkeys(USAGE_FIELDS, 0)
+
+
+# Per-invocation counts of claims taken and duplicate deliveries skipped.
+CLAIM_STATS_FIELDS = ('claimed', 'duplicates_completed', 'duplicates_in_flight', 'missing_records')
+claim_stats_lock = threading.Lock()
+claim_stats = dict.fromkeys(CLAIM_STATS_FIELDS, 0)
+
+
+def record_bedrock_usage(usage):
+    """Adds one response's `usage` block to the per-invocation totals."""
+    with bedrock_usage_lock:
+        for field in USAGE_FIELDS:
+            bedrock_usage[field] += usage.get(field) or 0
+
+
+def _invoke_bedrock(body):
+    """Blocking invoke_model call. Returns (completion text, usage)."""
+    response = bedrock_runtime_client.invoke_model(
+        modelId=BEDROCK_MODEL_ID,
+        contentType="application/json",
+        accept="application/json",
+        body=body
+    )
+
+    response_body = json.loads(response.get("body").read())
+
+    # Claude's response for Messages API is structured.
+    # Look for the 'content' key, which is a list of dicts.
+    # The first item's 'text' should be the completion.
+    claude_completion = ""
+    if response_body and 'content' in response_body and isinstance(response_body['content'], list):
+        for item in response_body['content']:
+            if item.get('type') == 'text':
+                claude_completion += item.get('text', '')
+    return claude_completion, response_body.get('usage') or {}
+
+
+def _invoke_bedrock_streaming(body, on_early_fields=None):
     """
-    Handles SQS messages to process resume analysis.
+    invoke_model_with_response_stream call. Text deltas are fed to an incremental JSON
+    parser, and on_early_fields(fields) is called once, as soon as every field in
+    EARLY_RESULT_FIELDS is complete, while the rest of the completion is still streaming.
+    Returns (completion text, usage).
     """
-    print(f"Received SQS event: {json.dumps(event)}")
+    response = bedrock_runtime_client.invoke_model_with_response_stream(
+        modelId=BEDROCK_MODEL_ID,
+        contentType="application/json",
+        accept="application/json",
+        body=body
+    )
+
+    parser = IncrementalObjectParser()
+    usage = {}
+    early_fields_sent = on_early_fields is None
+    for stream_event in response.get("body"):
+        chunk = stream_event.get("chunk")
+        if not chunk:
+            continue
+        message = json.loads(chunk["bytes"])
+        message_type = message.get("type")
+        if message_type == "message_start":
+            usage.update(message.get("message", {}).get("usage") or {})
+        elif message_type == "message_delta":
+            usage.update(message.get("usage") or {})
+        elif message_type == "content_block_delta" and message.get("delta", {}).get("type") == "text_delta":
+            parser.feed(message["delta"].get("text", ""))
+            if not early_fields_sent and all(field in parser.members for field in EARLY_RESULT_FIELDS):
+                early_fields_sent = True
+                on_early_fields({field: parser.members[field] for field in EARLY_RESULT_FIELDS})
+    return parser.text, usage
+
+
+def analyze_with_bedrock(resume_prompt, on_early_fields=None):
+    """
+    Sends the prompt to Bedrock and returns the parsed analysis dict.
+    Unparseable or incomplete completions come back as {"error": ..., "raw_output": ...}.
+    In streaming mode on_early_fields receives the score and top skills before the
+    explanation has finished generating.
+    """
+    # Invoke Bedrock with Claude Sonnet 4 using the Messages API format
+    # Claude 3/4 models use the Messages API.
+    # The 'anthropic_version' field is important.
+    # Static instructions go in the system block (the cacheable prefix), the resume in the user turn.
+    system_block = {"type": "text", "text": SYSTEM_PROMPT}
+    if BEDROCK_PROMPT_CACHING:
+        system_block["cache_control"] = {"type": "ephemeral"}
+    body = json.dumps({
+        "anthropic_version": "bedrock-2023-05-31", # This is the API version, not model version
+        "system": [system_block],
+        "messages": [
+            {
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": resume_prompt}
+                ]
+            }
+        ],
+        "max_tokens": MAX_OUTPUT_TOKENS, # Sized from the output schema
+        "temperature": 0.7, # Higher for faster generation
+        "top_p": 0.9,
+    })
+
+    if BEDROCK_STREAMING:
+        claude_completion, usage = _invoke_bedrock_streaming(body, on_early_fields)
+    else:
+        claude_completion, usage = _invoke_bedrock(body)
+    record_bedrock_usage(usage)
+    log.info("Bedrock usage", **{field: usage.get(field, 0) for field in USAGE_FIELDS})
+    # Model output can quote the resume, so it is only logged at DEBUG and truncated.
+    log.debug("Claude raw response", completion=lambda: claude_completion)
+
+    # Parse Claude's JSON response
+    analysis_results = {}
+    try:
+        # Attempt to parse as JSON. Claude should output pure JSON.
+        analysis_results = json.loads(claude_completion)
+        # Validate expected keys are present
+        required_keys = ["compatibility_score", "top_technical_skills_found", "compatibility_explanation", "suggested_keywords"]
+        if not all(key in analysis_results for key in required_keys):
+            raise ValueError("Claude response missing one or more required keys.")
+    except json.JSONDecodeError as e:
+        log.warning("Could not parse Claude's JSON response", error=str(e), completion_chars=len(claude_completion))
+        analysis_results = {"error": "Failed to parse Claude's JSON output", "raw_output": claude_completion}
+    except ValueError as e:
+        log.warning("Validation error in Claude's response", error=str(e), completion_chars=len(claude_completion))
+        analysis_results = {"error": f"Validation failed: {e}", "raw_output": claude_completion}
+    return analysis_results
+
+
+def count_claim(stat):
+    with claim_stats_lock:
+        claim_stats[stat] += 1
+
+
+def claim_resume(resume_id, message_id):
+    """
+    Takes the processing lease on a resume with a single conditional write.
+    The claim succeeds when the resume's record exists, isn't finished and no other
+    message holds a live lease; a redelivery of the same message can always reclaim its
+    own lease. Returns None when claimed, otherwise the status that made this delivery
+    a duplicate, or 'missing' for a record that was rolled back or deleted.
+    """
+    now = int(time.time())
+    try:
+        dynamodb_client.update_item(
+            TableName=DYNAMODB_TABLE_NAME,
+            Key={'resume_id': {'S': resume_id}},
+            UpdateExpression="SET #owner = :mid, #lease = :lease",
+            ConditionExpression=(
+                "attribute_exists(resume_id) AND "
+                "(attribute_not_exists(#st) OR (#st <> :completed AND #st <> :failed)) AND "
+                "(attribute_not_exists(#lease) OR #lease < :now OR #owner = :mid)"
+            ),
+            ExpressionAttributeNames={'#st': 'status', '#owner': 'processing_owner', '#lease': 'lease_expires_at'},
+            ExpressionAttributeValues={
+                ':mid': {'S': message_id},
+                ':lease': {'N': str(now + CLAIM_LEASE_SECONDS)},
+                ':now': {'N': str(now)},
+                ':completed': {'S': 'completed'},
+                ':failed': {'S': 'failed'}
+            },
+            ReturnValuesOnConditionCheckFailure='ALL_OLD'
+        )
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+            raise
+        item = e.response.get('Item')
+        if not item:
+            # A stale message for an upload that was rolled back; processing it would
+            # only create a skeleton record.
+            count_claim('missing_records')
+            return 'missing'
+        status = item.get('status', {}).get('S', 'processing')
+        count_claim('duplicates_in_flight' if status == 'processing' else 'duplicates_completed')
+        return status
+    count_claim('claimed')
+    return None
+
+
+def release_claim(resume_id, message_id):
+    """
+    Gives up this message's lease after a transient error, so whichever delivery comes
+    next (a redelivery, or the queued fallback of an inline run) can claim at once.
+    """
+    try:
+        dynamodb_client.update_item(
+            TableName=DYNAMODB_TABLE_NAME,
+            Key={'resume_id': {'S': resume_id}},
+            UpdateExpression="REMOVE #owner, #lease",
+            ConditionExpression="#owner = :mid",
+            ExpressionAttributeNames={'#owner': 'processing_owner', '#lease': 'lease_expires_at'},
+            ExpressionAttributeValues={':mid': {'S': message_id}}
+        )
+    except (ClientError, BotoCoreError) as e:
+        # Not ours any more, or DynamoDB is failing too; the lease then simply expires.
+        log.info("Lease not released", resume_id=resume_id, error=str(e))
+
+
+def write_early_results(resume_id, fields):
+    """
+    Publishes the score and top skills on a record that is still processing, so the
+    frontend's poll can show them before the full analysis is stored. Never touches a
+    record that has already completed or failed.
+    """
+    update_expression_parts = []
+    expression_attribute_names = {'#st': 'status', '#v': 'version'}
+    expression_attribute_values = {':processing': {'S': 'processing'}, ':one': {'N': '1'}}
+    if isinstance(fields.get('compatibility_score'), (int, float)):
+        update_expression_parts.append("#cs = :cs")
+        expression_attribute_names['#cs'] = 'compatibility_score'
+        expression_attribute_values[':cs'] = {'N': str(fields['compatibility_score'])}
+    if isinstance(fields.get('top_technical_skills_found'), list):
+        update_expression_parts.append("#tts = :tts")
+        expression_attribute_names['#tts'] = 'top_technical_skills_found'
+        expression_attribute_values[':tts'] = {'L': [{'S': skill} for skill in fields['top_technical_skills_found'] if isinstance(skill, str)]}
+    if not update_expression_parts:
+        return
+    try:
+        dynamodb_client.update_item(
+            TableName=DYNAMODB_TABLE_NAME,
+            Key={'resume_id': {'S': resume_id}},
+            # Every visible change bumps the version the status endpoint's ETag is made of
+            UpdateExpression="SET " + ", ".join(update_expression_parts) + " ADD #v :one",
+            ConditionExpression="#st = :processing",
+            ExpressionAttributeNames=expression_attribute_names,
+            ExpressionAttributeValues=expression_attribute_values
+        )
+        log.info("Early results written", resume_id=resume_id, fields=list(fields))
+    except (ClientError, BotoCoreError) as e:
+        # Losing the early write only delays the score until the final update.
+        log.warning("Could not write early results", resume_id=resume_id, error=str(e))
 
-    for record in event['Records']:
+
+def store_analysis_results(resume_id, analysis_results):
+    """Writes the completed analysis, plus individual fields for easier querying/display."""
+    # Use separate variables for updates to make it cleaner
+    update_expression_parts = [
+        "SET #st = :s",
+        "#ana = :a",
+        "#ts = :ts"
+    ]
+    expression_attribute_names = {
+        '#st': 'status',
+        '#ana': 'analysis_results',
+        '#ts': 'analysis_timestamp',
+        '#v': 'version'
+    }
+    expression_attribute_values = {
+        ':s': {'S': 'completed'},
+        ':a': {'S': json.dumps(analysis_results)}, # Store analysis results as JSON string
+        ':ts': {'N': str(int(time.time() * 1000))},
+        ':one': {'N': '1'}
+    }
+
+    # Add individual fields for easier querying/display if they exist and are valid
+    if isinstance(analysis_results.get("compatibility_score"), (int, float)):
+        update_expression_parts.append("#cs = :cs")
+        expression_attribute_names['#cs'] = 'compatibility_score'
+        expression_attribute_values[':cs'] = {'N': str(analysis_results['compatibility_score'])}
+    if isinstance(analysis_results.get("top_technical_skills_found"), list):
+        update_expression_parts.append("#tts = :tts")
+        expression_attribute_names['#tts'] = 'top_technical_skills_found'
+        expression_attribute_values[':tts'] = {'L': [{'S': skill} for skill in analysis_results['top_technical_skills_found'] if isinstance(skill, str)]}
+    if isinstance(analysis_results.get("compatibility_explanation"), str):
+        update_expression_parts.append("#ce = :ce")
+        expression_attribute_names['#ce'] = 'compatibility_explanation'
+        expression_attribute_values[':ce'] = {'S': analysis_results['compatibility_explanation']}
+    if isinstance(analysis_results.get("suggested_keywords"), list):
+        update_expression_parts.append("#sk = :sk")
+        expression_attribute_names['#sk'] = 'suggested_keywords'
+        expression_attribute_values[':sk'] = {'L': [{'S': kw} for kw in analysis_results['suggested_keywords'] if isinstance(kw, str)]}
+
+    dynamodb_client.update_item(
+        TableName=DYNAMODB_TABLE_NAME,
+        Key={'resume_id': {'S': resume_id}},
+        # Completing also releases the processing lease
+        UpdateExpression=",".join(update_expression_parts) + " REMOVE processing_owner, lease_expires_at ADD #v :one",
+        ExpressionAttributeNames=expression_attribute_names,
+        ExpressionAttributeValues=expression_attribute_values
+    )
+    log.info("DynamoDB record updated", resume_id=resume_id, status='completed')
+
+
+def mark_failed(resume_id, error_message):
+    """
+    Update status to 'failed' in DynamoDB, unless another delivery has already
+    completed the resume - a late failure never overwrites a finished analysis.
+    """
+    try:
+        dynamodb_client.update_item(
+            TableName=DYNAMODB_TABLE_NAME,
+            Key={'resume_id': {'S': resume_id}},
+            UpdateExpression="SET #st = :s, #err = :e, #ts = :ts REMOVE processing_owner, lease_expires_at ADD #v :one",
+            ConditionExpression="attribute_not_exists(#st) OR #st <> :completed",
+            ExpressionAttributeNames={
+                '#st': 'status', '#err': 'error_message', '#ts': 'analysis_timestamp', '#v': 'version'
+            },
+            ExpressionAttributeValues={
+                ':s': {'S': 'failed'},
+                ':e': {'S': error_message},
+                ':ts': {'N': str(int(time.time() * 1000))},
+                ':completed': {'S': 'completed'},
+                ':one': {'N': '1'}
+            }
+        )
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+            raise
+        log.info("Not marking resume failed: it has already completed", resume_id=resume_id)
+
+
+def content_waiters(content_sha256, resume_id):
+    """The resume_ids of identical uploads attached to this job so far."""
+    if content_index is None or not content_sha256:
+        return []
+    return content_index.waiters(content_sha256, resume_id)
+
+
+def resolve_content_waiters(content_sha256, resume_id, status):
+    """
+    Records this job's outcome against its file hash and returns the resume_ids of
+    identical uploads that attached to it while it ran.
+    """
+    if content_index is None or not content_sha256:
+        return []
+    waiters = content_index.resolve(content_sha256, resume_id, status)
+    if waiters:
+        log.info("Fanning out result to attached uploads", resume_id=resume_id, status=status, waiters=waiters)
+    return waiters
+
+
+def file_from_message(resume_id, message_body):
+    """The file carried in the message, or None to read it from S3 (also if it won't decode)."""
+    try:
+        return decode_file(message_body)
+    except (ValueError, zlib.error) as e:
+        log.warning("Unreadable file in message, reading from S3", resume_id=resume_id, error=str(e))
+        return None
+
+
+def is_retryable(error):
+    """True for throttling, timeouts and service-side errors that a later attempt can get past."""
+    if isinstance(error, ClientError):
+        return error.response.get('Error', {}).get('Code') in RETRYABLE_ERROR_CODES
+    return isinstance(error, (EndpointConnectionError, ConnectTimeoutError, ReadTimeoutError))
+
+
+def process_record(record):
+    """
+    Processes one SQS record end to end.
+    Returns False when the message should be redelivered (a transient error with attempts
+    left), True when it is done - analysed, or marked failed for good.
+    """
+    try:
         message_body = json.loads(record['body'])
         resume_id = message_body['resume_id']
         s3_bucket = message_body['s3_bucket']
         s3_key = message_body['s3_key']
-        file_extension = s3_key.split('.')[-1]
+    except (ValueError, KeyError, TypeError) as e:
+        # Redelivering a malformed message can't help, and there is no record to mark.
+        log.error("Dropping malformed message", message_id=record.get('messageId'), error=str(e))
+        return True
+    file_extension = s3_key.split('.')[-1]
 
-        try:
-            # 1. Retrieve file from S3
-            print(f"Downloading {s3_key} from {s3_bucket}")
-            s3_object = s3_client.get_object(Bucket=s3_bucket, Key=s3_key)
-            file_bytes = s3_object['Body'].read()
-            print(f"Downloaded {len(file_bytes)} bytes.")
-
-            # 2. Extract and optimize text from resume
-            extracted_text = extract_text_from_file_bytes(file_bytes, file_extension)
-            print(f"Extracted {len(extracted_text)} characters from {s3_key}.")
-            
-            # Smart truncation - prioritize key sections
-            key_sections = []
-            lines = extracted_text.split('\n')
-            
-            # Look for key sections first
-            for i, line in enumerate(lines):
-                line_lower = line.lower()
-                if any(keyword in line_lower for keyword in ['skill', 'experience', 'work', 'project', 'education', 'technical']):
-                    # Include this line and next 3 lines
-                    key_sections.extend(lines[i:i+4])
-            
-            # Use key sections if found, otherwise use beginning
-            if key_sections:
-                extracted_text = '\n'.join(key_sections[:50])  # Further reduced
+    # SQS delivers at least once: skip resumes that are finished or held by another message,
+    # and drop messages whose record is gone.
+    try:
+        duplicate_status = claim_resume(resume_id, record['messageId'])
+    except (ClientError, BotoCoreError) as e:
+        # Only this message is redelivered; the rest of the batch carries on
+        log.warning("Could not claim resume, will retry", resume_id=resume_id, error=str(e))
+        return False
+    if duplicate_status == 'missing':
+        log.warning("Dropping message for a resume without a record", resume_id=resume_id, message_id=record['messageId'])
+        return True
+    if duplicate_status:
+        log.info("Skipping duplicate delivery", resume_id=resume_id, message_id=record['messageId'], status=duplicate_status)
+        return True
+
+    # Set by the upload function; lets a cache hit skip the S3 download as well.
+    content_sha256 = message_body.get('content_sha256')
+    # Compacted copy of a PDF (see upload_resume_function/pdf_compaction); same text, fewer bytes.
+    analysis_s3_key = message_body.get('analysis_s3_key')
+
+    try:
+        # 1. Look up extracted sections by content hash, otherwise take the file from the message or S3
+        sections = extraction_cache.get(content_sha256) if content_sha256 else None
+        if sections is None:
+            # Small files come inside the message; the rest is downloaded
+            file_bytes = file_from_message(resume_id, message_body)
+            if file_bytes is not None:
+                log.info("Read resume from message", s3_key=s3_key, size_bytes=len(file_bytes))
             else:
-                extracted_text = extracted_text[:1500]  # Minimal text for speed
-
-            # 3. Construct simplified prompt for faster processing
-            prompt_template = """
-            Analyze this resume for tech career compatibility. Return JSON only:
-            {{
-              "compatibility_score": number (0-100),
-              "top_technical_skills_found": ["skill1", "skill2", "skill3"],
-              "compatibility_explanation": "brief explanation",
-              "suggested_keywords": ["keyword1", "keyword2"]
-            }}
-
-            Resume: {resume_text}
-            """
-            prompt_text = prompt_template.format(resume_text=extracted_text)
-            print(f"Prompt length: {len(prompt_text)} characters.")
-
-            # 4. Invoke Bedrock with Claude Sonnet 4 using the Messages API format
-            # Claude 3/4 models use the Messages API.
-            # The 'anthropic_version' field is important.
-            body = json.dumps({
-                "anthropic_version": "bedrock-2023-05-31", # This is the API version, not model version
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": prompt_text}
-                        ]
-                    }
-                ],
-                "max_tokens": 300, # Minimal for fastest processing
-                "temperature": 0.7, # Higher for faster generation
-                "top_p": 0.9,
-            })
-
-            response = bedrock_runtime_client.invoke_model(
-                modelId=BEDROCK_MODEL_ID,
-                contentType="application/json",
-                accept="application/json",
-                body=body
-            )
+                download_key = analysis_s3_key or s3_key
+                log.debug("Downloading resume", s3_bucket=s3_bucket, s3_key=download_key)
+                s3_object = s3_client.get_object(Bucket=s3_bucket, Key=download_key)
+                file_bytes = s3_object['Body'].read()
+                log.info("Downloaded resume", s3_key=download_key, size_bytes=len(file_bytes))
 
-            response_body = json.loads(response.get("body").read())
-            
-            # Claude's response for Messages API is structured.
-            # Look for the 'content' key, which is a list of dicts.
-            # The first item's 'text' should be the completion.
-            claude_completion = ""
-            if response_body and 'content' in response_body and isinstance(response_body['content'], list):
-                for item in response_body['content']:
-                    if item.get('type') == 'text':
-                        claude_completion += item.get('text', '')
-            
-            print(f"Claude raw response: {claude_completion}")
-
-            # 5. Parse Claude's JSON response
-            analysis_results = {}
-            try:
-                # Attempt to parse as JSON. Claude should output pure JSON.
-                analysis_results = json.loads(claude_completion)
-                # Validate expected keys are present
-                required_keys = ["compatibility_score", "top_technical_skills_found", "compatibility_explanation", "suggested_keywords"]
-                if not all(key in analysis_results for key in required_keys):
-                    raise ValueError("Claude response missing one or more required keys.")
-            except json.JSONDecodeError as e:
-                print(f"Error parsing Claude's JSON response: {e}. Raw: {claude_completion}")
-                analysis_results = {"error": "Failed to parse Claude's JSON output", "raw_output": claude_completion}
-            except ValueError as e:
-                print(f"Validation error in Claude's response: {e}. Raw: {claude_completion}")
-                analysis_results = {"error": f"Validation failed: {e}", "raw_output": claude_completion}
-
-
-            # 6. Update DynamoDB record
-            # Use separate variables for updates to make it cleaner
-            update_expression_parts = [
-                "SET #st = :s",
-                "#ana = :a",
-                "#ts = :ts"
-            ]
-            expression_attribute_names = {
-                '#st': 'status',
-                '#ana': 'analysis_results',
-                '#ts': 'analysis_timestamp'
-            }
-            expression_attribute_values = {
-                ':s': {'S': 'completed'},
-                ':a': {'S': json.dumps(analysis_results)}, # Store analysis results as JSON string
-                ':ts': {'N': str(int(time.time() * 1000))}
-            }
+            # The analysis copy extracts to exactly the original's text, so it caches under the original's hash
+            if analysis_s3_key and content_sha256:
+                file_hash = content_sha256
+            else:
+                file_hash = hashlib.sha256(file_bytes).hexdigest()
+            if file_hash != content_sha256:
+                sections = extraction_cache.get(file_hash)
 
-            # Add individual fields for easier querying/display if they exist and are valid
-            if isinstance(analysis_results.get("compatibility_score"), (int, float)):
-                update_expression_parts.append("#cs = :cs")
-                expression_attribute_names['#cs'] = 'compatibility_score'
-                expression_attribute_values[':cs'] = {'N': str(analysis_results['compatibility_score'])}
-            if isinstance(analysis_results.get("top_technical_skills_found"), list):
-                update_expression_parts.append("#tts = :tts")
-                expression_attribute_names['#tts'] = 'top_technical_skills_found'
-                expression_attribute_values[':tts'] = {'L': [{'S': skill} for skill in analysis_results['top_technical_skills_found'] if isinstance(skill, str)]}
-            if isinstance(analysis_results.get("compatibility_explanation"), str):
-                update_expression_parts.append("#ce = :ce")
-                expression_attribute_names['#ce'] = 'compatibility_explanation'
-                expression_attribute_values[':ce'] = {'S': analysis_results['compatibility_explanation']}
-            if isinstance(analysis_results.get("suggested_keywords"), list):
-                update_expression_parts.append("#sk = :sk")
-                expression_attribute_names['#sk'] = 'suggested_keywords'
-                expression_attribute_values[':sk'] = {'L': [{'S': kw} for kw in analysis_results['suggested_keywords'] if isinstance(kw, str)]}
-
-
-            dynamodb_client.update_item(
-                TableName=DYNAMODB_TABLE_NAME,
-                Key={'resume_id': {'S': resume_id}},
-                UpdateExpression=",".join(update_expression_parts), # Join the parts
-                ExpressionAttributeNames=expression_attribute_names,
-                ExpressionAttributeValues=expression_attribute_values
-            )
-            print(f"DynamoDB record updated for resume_id: {resume_id} with status 'completed'")
-
-        except ClientError as e:
-            print(f"AWS Client Error for {resume_id}: {e}")
-            # Update status to 'failed' in DynamoDB
-            dynamodb_client.update_item(
-                TableName=DYNAMODB_TABLE_NAME,
-                Key={'resume_id': {'S': resume_id}},
-                UpdateExpression="SET #st = :s, #err = :e, #ts = :ts",
-                ExpressionAttributeNames={'#st': 'status', '#err': 'error_message', '#ts': 'analysis_timestamp'},
-                ExpressionAttributeValues={
-                    ':s': {'S': 'failed'},
-                    ':e': {'S': str(e)},
-                    ':ts': {'N': str(int(time.time() * 1000))}
-                }
+            # 2. Extract text from resume and split it into sections by layout
+            if sections is None:
+                lines = extract_lines_from_file_bytes(file_bytes, file_extension)
+                sections = segment_sections(lines)
+                extraction_cache.put(file_hash, sections)
+                log.info("Extracted resume text", s3_key=s3_key, line_count=len(lines), sections=list(sections))
+        else:
+            log.info("Extraction cache hit", s3_key=s3_key, content_sha256=content_sha256)
+
+        # 3. Build the prompt from whole sections by priority, under the input token budget
+        resume_prompt, estimated_input_tokens, prompt_notes = build_prompt(sections)
+        log.info(
+            "Prompt built", resume_id=resume_id, prompt_chars=len(resume_prompt),
+            estimated_input_tokens=estimated_input_tokens, budget_adjustments=prompt_notes
+        )
+
+        # 4. Reuse a cached analysis of the same text, model and prompt version
+        analysis_cache_key = analysis_cache.key_for(resume_prompt, BEDROCK_MODEL_ID, PROMPT_VERSION)
+        analysis_results = analysis_cache.get(analysis_cache_key)
+        if analysis_results is not None:
+            log.info("Analysis cache hit", resume_id=resume_id, cache_key=analysis_cache_key)
+        else:
+            # 5. Invoke Bedrock and parse Claude's JSON response
+            analysis_results = analyze_with_bedrock(
+                resume_prompt,
+                on_early_fields=lambda fields: write_early_results(resume_id, fields)
             )
-        except Exception as e:
-            print(f"Unexpected error for {resume_id}: {e}")
-            # Update status to 'failed' in DynamoDB
-            dynamodb_client.update_item(
-                TableName=DYNAMODB_TABLE_NAME,
-                Key={'resume_id': {'S': resume_id}},
-                UpdateExpression="SET #st = :s, #err = :e, #ts = :ts",
-                ExpressionAttributeNames={'#st': 'status', '#err': 'error_message', '#ts': 'analysis_timestamp'},
-                ExpressionAttributeValues={
-                    ':s': {'S': 'failed'},
-                    ':e': {'S': str(e)},
-                    ':ts': {'N': str(int(time.time() * 1000))}
-                }
+            if 'error' not in analysis_results:
+                analysis_cache.put(analysis_cache_key, analysis_results, BEDROCK_MODEL_ID, PROMPT_VERSION)
+
+        # 6. Update DynamoDB records: identical uploads waiting on this job first, this
+        # resume next, so that a retry after a partial failure still reaches the waiters.
+        # Only then is the hash resolved: until this record shows the analysis, dedupe
+        # must not treat the job as completed. Uploads that attached in between come
+        # back from resolving. An unusable completion is kept on this record only: the
+        # hash is resolved as failed, so the next identical upload is analysed afresh,
+        # and the waiters are failed rather than handed the error.
+        usable = 'error' not in analysis_results
+
+        def settle_waiter(waiter_id):
+            if usable:
+                store_analysis_results(waiter_id, analysis_results)
+            else:
+                mark_failed(waiter_id, analysis_results['error'])
+
+        settled = set(content_waiters(content_sha256, resume_id))
+        for waiter_id in settled:
+            settle_waiter(waiter_id)
+        store_analysis_results(resume_id, analysis_results)
+        for waiter_id in resolve_content_waiters(content_sha256, resume_id, 'completed' if usable else 'failed'):
+            if waiter_id not in settled:
+                settle_waiter(waiter_id)
+        return True
+
+    except Exception as e:
+        receive_count = int(record.get('attributes', {}).get('ApproximateReceiveCount', '1'))
+        if is_retryable(e) and receive_count < MAX_RECEIVE_COUNT:
+            log.warning(
+                "Transient error, will retry", resume_id=resume_id, attempt=receive_count,
+                max_attempts=MAX_RECEIVE_COUNT, error=str(e)
             )
-    return {
-        'statusCode': 200,
-        'body': json.dumps({"message": "Processing complete for batch."})
-    }
\ No newline at end of file
+            release_claim(resume_id, record['messageId'])
+            return False
+        if isinstance(e, ClientError):
+            log.error("AWS Client Error", resume_id=resume_id, error=str(e))
+        elif isinstance(e, ValueError):
+            # Unsupported or unreadable file; expected, so no stack trace
+            log.error("Could not process resume", resume_id=resume_id, error=str(e))
+        else:
+            log.exception("Unexpected error", resume_id=resume_id, error=str(e))
+        try:
+            for waiter_id in resolve_content_waiters(content_sha256, resume_id, 'failed'):
+                mark_failed(waiter_id, str(e))
+            mark_failed(resume_id, str(e))
+        except (ClientError, BotoCoreError) as update_error:
+            log.warning("Could not mark resume failed, will retry", resume_id=resume_id, error=str(update_error))
+            return False
+        return True
+
+
+def lambda_handler(event, context):
+    """
+    Handles a batch of SQS messages to process resume analysis.
+    Records are processed concurrently in a bounded thread pool (the work is mostly
+    S3/Bedrock/DynamoDB I/O), and only the messages that hit a transient error are
+    reported back in batchItemFailures so SQS redelivers just those.
+    The upload function's inline fast path invokes it synchronously with the same event
+    shape and one record.
+    """
+    start_invocation()
+    log.info("Received SQS event", **event_summary(event))
+    extraction_cache.reset_stats()
+    analysis_cache.reset_stats()
+    with bedrock_usage_lock:
+        bedrock_usage.update(dict.fromkeys(USAGE_FIELDS, 0))
+    with claim_stats_lock:
+        claim_stats.update(dict.fromkeys(CLAIM_STATS_FIELDS, 0))
+
+    records = event['Records']
+    if len(records) == 1:
+        outcomes = [process_record(records[0])]
+    else:
+        with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_RECORDS, len(records))) as executor:
+            outcomes = list(executor.map(process_record, records))
+
+    batch_item_failures = [
+        {'itemIdentifier': record['messageId']}
+        for record, done in zip(records, outcomes) if not done
+    ]
+    log.info(
+        "Batch processed",
+        record_count=len(records),
+        retry_count=len(batch_item_failures),
+        extraction_cache=extraction_cache.stats,
+        analysis_cache=analysis_cache.stats,
+        bedrock_usage=bedrock_usage,
+        claims=claim_stats
+    )
+    return {'batchItemFailures': batch_item_failures}
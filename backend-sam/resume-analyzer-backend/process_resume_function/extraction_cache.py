@@ -0,0 +1,161 @@
+import os
+import json
+import threading
+from collections import OrderedDict
+from botocore.exceptions import ClientError, BotoCoreError
+
+from structured_logger import get_logger
+
+log = get_logger(__name__)
+
+
+class ExtractionCache:
+    """
+    Content-addressed cache of extraction results, keyed by the SHA-256 of the file bytes.
+    Values are anything JSON-serialisable (the process function stores the section map).
+
+    Two tiers:
+      * an LRU directory in /tmp that survives across invocations of a warm container,
+        evicted by total size;
+      * a durable S3 sidecar object shared by every container.
+
+    Keys are namespaced by `version` so a change to the extractor invalidates old entries.
+    """
+
+    def __init__(self, s3_client, bucket, prefix, version, tmp_dir, tmp_max_bytes):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.prefix = prefix.rstrip('/') + '/' + version + '/'
+        self.tmp_dir = os.path.join(tmp_dir, version)
+        self.tmp_max_bytes = tmp_max_bytes
+        self._lock = threading.Lock()
+        self._index = None # OrderedDict of cache file name -> size, least recently used first
+        self._tmp_bytes = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = {'tmp_hits': 0, 's3_hits': 0, 'misses': 0}
+
+    def _count(self, stat):
+        with self._lock:
+            self.stats[stat] += 1
+
+    # --- /tmp LRU tier ---
+
+    def _load_index(self):
+        """Rebuilds the LRU index from whatever a previous invocation left in /tmp."""
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        entries = []
+        for entry in os.scandir(self.tmp_dir):
+            if entry.is_file() and entry.name.endswith('.json'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name, stat.st_size))
+        entries.sort()
+        self._index = OrderedDict((name, size) for _, name, size in entries)
+        self._tmp_bytes = sum(self._index.values())
+
+    def _tmp_get(self, content_hash):
+        name = f"{content_hash}.json"
+        with self._lock:
+            if self._index is None:
+                self._load_index()
+            if name not in self._index:
+                return None
+            self._index.move_to_end(name)
+        path = os.path.join(self.tmp_dir, name)
+        try:
+            with open(path, 'rb') as f:
+                value = json.loads(f.read())
+            os.utime(path) # keep mtime-based ordering right for the next cold index rebuild
+            return value
+        except (OSError, ValueError):
+            with self._lock:
+                self._tmp_bytes -= self._index.pop(name, 0)
+            return None
+
+    def _tmp_put(self, content_hash, data):
+        if len(data) > self.tmp_max_bytes:
+            return
+        name = f"{content_hash}.json"
+        path = os.path.join(self.tmp_dir, name)
+        with self._lock:
+            if self._index is None:
+                self._load_index()
+            try:
+                partial_path = f"{path}.{threading.get_ident()}.partial"
+                with open(partial_path, 'wb') as f:
+                    f.write(data)
+                os.replace(partial_path, path)
+            except OSError as e:
+                log.warning("Could not write extraction cache entry to /tmp", error=str(e))
+                return
+            self._tmp_bytes += len(data) - self._index.pop(name, 0)
+            self._index[name] = len(data)
+            while self._tmp_bytes > self.tmp_max_bytes and self._index:
+                evicted_name, evicted_size = self._index.popitem(last=False)
+                self._tmp_bytes -= evicted_size
+                try:
+                    os.remove(os.path.join(self.tmp_dir, evicted_name))
+                except OSError:
+                    pass
+
+    # --- S3 sidecar tier ---
+
+    def _s3_key(self, content_hash):
+        return f"{self.prefix}{content_hash}.json"
+
+    def _s3_get(self, content_hash):
+        if not self.bucket:
+            return None
+        try:
+            s3_object = self.s3_client.get_object(Bucket=self.bucket, Key=self._s3_key(content_hash))
+            return s3_object['Body'].read()
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') not in ('NoSuchKey', '404', 'AccessDenied', '403'):
+                log.warning("Extraction cache S3 read failed", content_hash=content_hash, error=str(e))
+            return None
+        except BotoCoreError as e:
+            # Timeouts and connection errors: treat as a miss and extract again
+            log.warning("Extraction cache S3 read failed", content_hash=content_hash, error=str(e))
+            return None
+
+    def _s3_put(self, content_hash, data):
+        if not self.bucket:
+            return
+        try:
+            self.s3_client.put_object(
+                Bucket=self.bucket,
+                Key=self._s3_key(content_hash),
+                Body=data,
+                ContentType='application/json'
+            )
+        except (ClientError, BotoCoreError) as e:
+            # A cache write failure must never fail the analysis.
+            log.warning("Extraction cache S3 write failed", content_hash=content_hash, error=str(e))
+
+    # --- public API ---
+
+    def get(self, content_hash):
+        """Returns the cached value for `content_hash`, or None. Updates hit/miss stats."""
+        value = self._tmp_get(content_hash)
+        if value is not None:
+            self._count('tmp_hits')
+            return value
+        data = self._s3_get(content_hash)
+        if data is not None:
+            try:
+                value = json.loads(data)
+            except ValueError as e:
+                log.warning("Ignoring malformed extraction cache object", content_hash=content_hash, error=str(e))
+            else:
+                self._count('s3_hits')
+                self._tmp_put(content_hash, data)
+                return value
+        self._count('misses')
+        return None
+
+    def put(self, content_hash, value):
+        """Stores a freshly extracted value in both tiers."""
+        data = json.dumps(value).encode('utf-8')
+        self._tmp_put(content_hash, data)
+        self._s3_put(content_hash, data)
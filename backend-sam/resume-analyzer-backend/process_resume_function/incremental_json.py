@@ -0,0 +1,70 @@
+import json
+
+
+class IncrementalObjectParser:
+    """
+    Parses a JSON object that arrives in pieces and reports each top-level member as
+    soon as it is complete, i.e. when the ',' or '}' that ends it has been seen.
+
+    Text before the opening '{' (a stray preamble or a ``` fence) is skipped. Members
+    whose text isn't valid JSON are ignored here; the caller still parses the full
+    completion at the end and handles errors there.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.members = {}
+        self._pos = 0
+        self._depth = 0
+        self._started = False
+        self._finished = False
+        self._in_string = False
+        self._escape = False
+        self._member_start = None
+
+    def _complete_member(self, end):
+        member_text = self.text[self._member_start:end].strip()
+        self._member_start = end + 1
+        if not member_text:
+            return {}
+        try:
+            return json.loads("{" + member_text + "}")
+        except ValueError:
+            return {}
+
+    def feed(self, chunk):
+        """Consumes the next piece of text and returns {key: value} for members completed by it."""
+        self.text += chunk
+        completed = {}
+        text = self.text
+        for i in range(self._pos, len(text)):
+            if self._finished:
+                break
+            c = text[i]
+            if not self._started:
+                if c == '{':
+                    self._started = True
+                    self._depth = 1
+                    self._member_start = i + 1
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == '\\':
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+            elif c == '"':
+                self._in_string = True
+            elif c in '{[':
+                self._depth += 1
+            elif c in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    completed.update(self._complete_member(i))
+                    self._finished = True
+            elif c == ',' and self._depth == 1:
+                completed.update(self._complete_member(i))
+        self._pos = len(text)
+        self.members.update(completed)
+        return completed
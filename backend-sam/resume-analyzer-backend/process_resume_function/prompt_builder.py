@@ -0,0 +1,155 @@
+import os
+import re
+import json
+import math
+
+from section_segmenter import HEADER_SECTION, UNSEGMENTED_SECTION
+
+# Upper bound on input tokens per request (instructions + resume), estimated offline.
+PROMPT_TOKEN_BUDGET = int(os.environ.get('PROMPT_TOKEN_BUDGET', '1500'))
+# Floor kept for each required section so a long higher-priority section can't crowd it out.
+MIN_REQUIRED_SECTION_TOKENS = int(os.environ.get('MIN_REQUIRED_SECTION_TOKENS', '200'))
+
+# Sections are picked in this order until the budget is spent; anything unlisted comes
+# after these, and the header (name/contact details) is never needed for scoring.
+SECTION_PRIORITY = [
+    'skills', 'experience', 'projects', 'certifications', 'summary', 'education', UNSEGMENTED_SECTION,
+]
+# Truncated to fit rather than dropped when the budget runs short.
+REQUIRED_SECTIONS = {'skills', 'experience', UNSEGMENTED_SECTION}
+EXCLUDED_SECTIONS = {HEADER_SECTION, 'references'}
+
+# Limits the model is asked to respect; they also size max_tokens.
+MAX_SKILLS = 5
+MAX_KEYWORDS = 5
+MAX_EXPLANATION_WORDS = 60
+
+# Part of the analysis cache key: bump whenever the template, the limits above or section
+# selection change, so analyses produced by an older prompt stop being reused.
+PROMPT_VERSION = 'v2'
+
+# Identical on every call, so it is sent as the system block and can be served from
+# Bedrock's prompt cache; only the resume text changes per request.
+SYSTEM_PROMPT = """Analyze the resume in the user message for tech career compatibility. Return JSON only:
+{{
+  "compatibility_score": number (0-100),
+  "top_technical_skills_found": ["skill1", "skill2", "skill3"] (at most {max_skills}),
+  "compatibility_explanation": "brief explanation" (at most {max_explanation_words} words),
+  "suggested_keywords": ["keyword1", "keyword2"] (at most {max_keywords})
+}}""".format(
+    max_skills=MAX_SKILLS,
+    max_keywords=MAX_KEYWORDS,
+    max_explanation_words=MAX_EXPLANATION_WORDS
+)
+
+RESUME_PROMPT_TEMPLATE = """Resume:
+{resume_text}"""
+
+# Rough BPE-style pieces: runs of letters, runs of digits, single other symbols.
+_TOKEN_PIECE = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+# Average characters per token for long alphabetic runs (Claude's tokenizer averages ~4 for English).
+_CHARS_PER_WORD_TOKEN = 4
+_TOKENS_PER_WORD = 1.35 # free-text explanation words, including punctuation
+
+
+def estimate_tokens(text):
+    """
+    Approximates the Claude token count of `text` without calling any service.
+    Deliberately errs slightly high: each symbol and digit run counts as a token,
+    and words cost one token per ~4 characters.
+    """
+    tokens = 0
+    for piece in _TOKEN_PIECE.findall(text):
+        if piece[0].isalpha():
+            tokens += max(1, math.ceil(len(piece) / _CHARS_PER_WORD_TOKEN))
+        else:
+            tokens += math.ceil(len(piece) / 3) if piece[0].isdigit() else 1
+    # Line breaks are tokens of their own.
+    return tokens + text.count("\n")
+
+
+def _output_token_estimate():
+    """Sizes max_tokens from the output schema: a filled example plus the free-text explanation."""
+    example = {
+        "compatibility_score": 100,
+        "top_technical_skills_found": ["Customer Relationship Management"] * MAX_SKILLS,
+        "compatibility_explanation": "",
+        "suggested_keywords": ["Technical Support Engineering"] * MAX_KEYWORDS,
+    }
+    structure = estimate_tokens(json.dumps(example, indent=2))
+    explanation = math.ceil(MAX_EXPLANATION_WORDS * _TOKENS_PER_WORD)
+    # 25% headroom so a slightly verbose answer isn't cut off mid-JSON.
+    return math.ceil((structure + explanation) * 1.25)
+
+
+MAX_OUTPUT_TOKENS = _output_token_estimate()
+
+
+def _truncate_to_tokens(text, max_tokens):
+    """Keeps whole lines from the start of `text` while they fit in max_tokens."""
+    kept = []
+    used = 0
+    for line in text.split("\n"):
+        cost = estimate_tokens(line) + 1
+        if used + cost > max_tokens:
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(kept)
+
+
+def select_sections(sections, token_budget):
+    """
+    Picks sections by priority until token_budget is spent and returns
+    ({name: text}, notes). Whole sections are preferred; a required section that
+    doesn't fit whole is truncated on a line boundary, using the floor reserved for
+    it up front, instead of being dropped. Every truncation or omission is reported
+    in `notes` so the caller can log it.
+    """
+    ranked = sorted(
+        (name for name in sections if name not in EXCLUDED_SECTIONS),
+        key=lambda name: SECTION_PRIORITY.index(name) if name in SECTION_PRIORITY else len(SECTION_PRIORITY)
+    )
+    if not ranked:
+        ranked = list(sections)
+
+    blocks = {name: f"## {name.title()}\n{sections[name]}" for name in ranked}
+    costs = {name: estimate_tokens(block) + 2 for name, block in blocks.items()}
+    reserved = {
+        name: min(costs[name], MIN_REQUIRED_SECTION_TOKENS)
+        for name in ranked if name in REQUIRED_SECTIONS
+    }
+
+    chosen = {}
+    notes = []
+    remaining = token_budget
+    for name in ranked:
+        own_reservation = reserved.pop(name, 0)
+        available = remaining - sum(reserved.values())
+        if costs[name] <= available:
+            chosen[name] = blocks[name]
+            remaining -= costs[name]
+        elif own_reservation or not chosen:
+            truncated = _truncate_to_tokens(blocks[name], max(available, own_reservation))
+            if truncated.count("\n") >= 1: # more than just the heading survived
+                chosen[name] = truncated
+                remaining -= estimate_tokens(truncated) + 2
+                notes.append(f"truncated {name} from {costs[name]} tokens")
+            else:
+                notes.append(f"dropped {name} ({costs[name]} tokens)")
+        else:
+            notes.append(f"dropped {name} ({costs[name]} tokens)")
+    return {name: chosen[name] for name in sections if name in chosen}, notes
+
+
+def build_prompt(sections, token_budget=PROMPT_TOKEN_BUDGET):
+    """
+    Builds the per-resume part of the prompt so that, together with SYSTEM_PROMPT,
+    it stays under token_budget input tokens.
+    Returns (resume_prompt, estimated_input_tokens, notes).
+    """
+    system_tokens = estimate_tokens(SYSTEM_PROMPT)
+    resume_budget = token_budget - system_tokens - estimate_tokens(RESUME_PROMPT_TEMPLATE.format(resume_text=""))
+    chosen, notes = select_sections(sections, resume_budget)
+    resume_prompt = RESUME_PROMPT_TEMPLATE.format(resume_text="\n\n".join(chosen.values()))
+    return resume_prompt, system_tokens + estimate_tokens(resume_prompt), notes
@@ -0,0 +1,135 @@
+import re
+import bisect
+from collections import Counter
+
+# Canonical section names and the headings resumes commonly use for them.
+SECTION_HEADINGS = {
+    'summary': ['summary', 'professional summary', 'profile', 'professional profile', 'objective',
+                'career objective', 'about me', 'career summary'],
+    'skills': ['skills', 'technical skills', 'key skills', 'core skills', 'core competencies',
+               'competencies', 'skills and abilities', 'skills & abilities', 'tools', 'technologies',
+               'tools and technologies', 'technical proficiencies', 'areas of expertise', 'expertise'],
+    'experience': ['experience', 'work experience', 'professional experience', 'employment',
+                   'employment history', 'work history', 'career history', 'relevant experience'],
+    'projects': ['projects', 'personal projects', 'key projects', 'academic projects', 'portfolio'],
+    'education': ['education', 'educational background', 'academic background', 'education and training'],
+    'certifications': ['certifications', 'certificates', 'licenses', 'licenses and certifications',
+                       'certifications and trainings', 'trainings', 'training', 'courses'],
+    'awards': ['awards', 'achievements', 'honors', 'honors and awards', 'accomplishments'],
+    'languages': ['languages'],
+    'references': ['references', 'character references'],
+}
+_HEADING_LOOKUP = {alias: name for name, aliases in SECTION_HEADINGS.items() for alias in aliases}
+
+# Text that appears before the first heading (name, contact details).
+HEADER_SECTION = 'header'
+# Used when no headings are found at all.
+UNSEGMENTED_SECTION = 'resume'
+
+MAX_HEADING_CHARS = 50
+MAX_HEADING_WORDS = 6
+LARGER_FONT_RATIO = 1.15
+WIDER_GAP_RATIO = 1.5
+
+
+def canonical_section_name(text):
+    """Maps a heading like 'WORK EXPERIENCE:' to 'experience'; None if it isn't a known heading."""
+    normalized = re.sub(r'[^a-z& ]+', ' ', text.lower())
+    normalized = re.sub(r'\s+', ' ', normalized).strip()
+    return _HEADING_LOOKUP.get(normalized)
+
+
+class _BodyStyle:
+    """
+    Running estimate of the body text's layout over the non-heading lines seen so far:
+    the dominant font size, whether body text is bold, and the median line gap.
+    """
+
+    def __init__(self):
+        self._sizes = Counter()
+        self._chars = 0
+        self._bold_chars = 0
+        self._gaps = [] # kept sorted
+
+    def add(self, line):
+        if line.size:
+            self._sizes[line.size] += len(line.text)
+        self._chars += len(line.text)
+        if line.bold:
+            self._bold_chars += len(line.text)
+        if line.gap is not None and line.gap > 0:
+            bisect.insort(self._gaps, line.gap)
+
+    @property
+    def size(self):
+        return self._sizes.most_common(1)[0][0] if self._sizes else None
+
+    @property
+    def bold(self):
+        return self._chars > 0 and self._bold_chars / self._chars > 0.5
+
+    @property
+    def median_gap(self):
+        return self._gaps[len(self._gaps) // 2] if self._gaps else None
+
+
+def _looks_like_heading(line, body):
+    text = line.text
+    if len(text) > MAX_HEADING_CHARS or len(text.split()) > MAX_HEADING_WORDS:
+        return False
+    if text.endswith(('.', ',', ';')) or not any(c.isalpha() for c in text):
+        return False
+    body_size, median_gap = body.size, body.median_gap
+    style = (line.style or '').lower()
+    styled = style.startswith(('heading', 'title'))
+    letters = [c for c in text if c.isalpha()]
+    larger = bool(line.size and body_size and line.size >= body_size * LARGER_FONT_RATIO)
+    emphasised = line.bold and not body.bold
+    all_caps = len(letters) >= 3 and all(c.isupper() for c in letters)
+    # DOCX paragraphs carry no spacing information, so a missing gap doesn't count against them.
+    spaced = line.gap is None or bool(median_gap and line.gap >= median_gap * WIDER_GAP_RATIO)
+    if canonical_section_name(text):
+        # A known heading still needs some heading-like layout, so a standalone "Tools"
+        # or "Training" line in body text stays body text.
+        widely_spaced = line.gap is not None and spaced
+        return styled or larger or emphasised or all_caps or text.endswith(':') or widely_spaced
+    return styled or (larger and (emphasised or all_caps or line.bold)) or (emphasised and all_caps and spaced)
+
+
+def segment_sections(lines):
+    """
+    Splits TextLines into an ordered {section_name: text} map in a single pass.
+
+    Headings are found from layout (font size and weight relative to the body text,
+    spacing, paragraph styles) plus a vocabulary of common resume headings. The body
+    text's layout is estimated as the lines go by, from the non-heading lines before
+    each one. Known headings map to canonical names (see SECTION_HEADINGS) once any
+    heading-like layout backs them; other headings need stronger layout evidence and
+    keep their lower-cased text, but only once a known heading has been seen, so the
+    candidate's name in a large font stays in the header. Every line lands in exactly
+    one section.
+    """
+    body = _BodyStyle()
+    sections = {}
+    all_lines = []
+    current = HEADER_SECTION
+    seen_known_heading = False
+    for line in lines:
+        if not line.text:
+            continue
+        all_lines.append(line.text)
+        if _looks_like_heading(line, body):
+            name = canonical_section_name(line.text)
+            if name:
+                seen_known_heading = True
+                current = name
+                continue
+            if seen_known_heading:
+                current = line.text.rstrip(':').strip().lower()
+                continue
+        body.add(line)
+        sections.setdefault(current, []).append(line.text)
+
+    if not seen_known_heading:
+        return {UNSEGMENTED_SECTION: "\n".join(all_lines)} if all_lines else {}
+    return {name: "\n".join(section_lines) for name, section_lines in sections.items()}
@@ -0,0 +1,301 @@
+import re
+import zipfile
+import threading
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+
+# IMPORTANT: These imports rely on your Lambda Layer
+# Make sure your layer includes PyMuPDF (fitz). python-docx is only used as a fallback.
+import fitz # PyMuPDF
+from io import BytesIO
+
+try:
+    from docx import Document # python-docx
+except ImportError:
+    Document = None
+
+from structured_logger import get_logger
+
+log = get_logger(__name__)
+
+# Bump whenever extraction output changes, so cached text from older extractors is ignored.
+EXTRACTOR_VERSION = 'v6'
+
+# PyMuPDF is not thread-safe. The process function handles SQS records on several threads,
+# so PDF work is serialised. Pages are extracted serially in this process: at the
+# function's 1024 MB Lambda grants well under one full vCPU (os.cpu_count() still
+# reports 2), so worker processes only add start-up cost, and forking a process that
+# runs other threads is unsafe.
+_PDF_LOCK = threading.Lock()
+
+PDF_BOLD_FLAG = 16 # bit 4 of a span's flags in page.get_text("dict")
+
+# One visual line of the document plus the layout hints the section segmenter uses.
+# size: font size in points (None when unknown), bold: every character is bold,
+# gap: vertical space above the line in points (None at the top of a page),
+# style: DOCX paragraph style name, normalized by docx_style_key (e.g. 'heading1'; None for PDF).
+TextLine = namedtuple('TextLine', ['text', 'size', 'bold', 'gap', 'style'])
+
+
+def _pdf_page_lines(page) -> list:
+    """Converts one page's get_text("dict") output into TextLines."""
+    lines = []
+    previous_bottom = None
+    for block in page.get_text("dict")["blocks"]:
+        for line in block.get("lines", ()):
+            spans = [span for span in line["spans"] if span["text"].strip()]
+            if not spans:
+                continue
+            text = "".join(span["text"] for span in line["spans"]).strip()
+            top, bottom = line["bbox"][1], line["bbox"][3]
+            lines.append(TextLine(
+                text=text,
+                size=round(max(span["size"] for span in spans), 1),
+                bold=all(span["flags"] & PDF_BOLD_FLAG or "bold" in span["font"].lower() for span in spans),
+                gap=round(top - previous_bottom, 1) if previous_bottom is not None else None,
+                style=None
+            ))
+            previous_bottom = bottom
+    return lines
+
+
+def extract_lines_from_pdf(pdf_bytes: bytes) -> list:
+    """Extracts TextLines from PDF bytes using PyMuPDF, page by page."""
+    try:
+        with _PDF_LOCK:
+            doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+            try:
+                lines = []
+                for page in doc:
+                    lines.extend(_pdf_page_lines(page))
+                return lines
+            finally:
+                doc.close()
+    except Exception as e:
+        log.error("Error extracting text from PDF", error=str(e))
+        raise ValueError(f"Could not extract text from PDF: {e}")
+
+
+def _part_sort_key(name: str) -> tuple:
+    """Sorts header2.xml before header10.xml."""
+    number = re.search(r'(\d+)\.xml$', name)
+    return (int(number.group(1)) if number else 0, name)
+
+
+def _is_on(elem) -> bool:
+    """True for toggle properties like <w:b/> unless explicitly switched off."""
+    value = next((v for k, v in elem.attrib.items() if k.endswith('}val')), None)
+    return value not in ('0', 'false', 'off')
+
+
+def docx_style_key(name):
+    """
+    One form for a paragraph style however it was read: the style ID from the XML
+    ('Heading1') or the display name from python-docx ('Heading 1') both become
+    'heading1'.
+    """
+    return re.sub(r'\s+', '', name).lower() if name else None
+
+
+def _read_docx_style_names(stream) -> dict:
+    """
+    Maps style IDs to style names from word/styles.xml (IDs are localized, built-in
+    names aren't). The default paragraph style, which paragraphs without a w:pStyle
+    have, is stored under None.
+    """
+    names = {}
+    for _, elem in ET.iterparse(stream):
+        if elem.tag.endswith('}style'):
+            attrib = {k.rpartition('}')[2]: v for k, v in elem.attrib.items()}
+            name = next((child for child in elem if child.tag.endswith('}name')), None)
+            if attrib.get('styleId') and name is not None:
+                names[attrib['styleId']] = next((v for k, v in name.attrib.items() if k.endswith('}val')), attrib['styleId'])
+                if attrib.get('type') == 'paragraph' and attrib.get('default') in ('1', 'true', 'on'):
+                    names[None] = names[attrib['styleId']]
+            elem.clear()
+    return names
+
+
+def _iter_docx_part_lines(stream, style_names=None):
+    """
+    Streams one WordprocessingML part and yields its TextLines in document order.
+    Paragraphs become one line each; a table row becomes one line with its cells
+    joined by " | ". Text boxes are read from their mc:Choice branch only, so the
+    VML fallback copy isn't emitted twice. Paragraphs, table rows and fallback
+    branches are cleared and detached from their parent once consumed, so the tree
+    iterparse builds holds about one paragraph or row at a time, not the whole part.
+    Paragraph style IDs are reported by name when style_names maps them.
+    """
+    style_names = style_names or {}
+    paragraphs = [] # stack of paragraph frames; text boxes nest paragraphs inside paragraphs
+    cells = []      # stack of per-cell line lists; non-empty while inside a table cell
+    rows = []       # stack of per-row cell lists, for nested tables
+    open_tags = []  # local names of the elements enclosing the current one
+    ancestors = []  # the enclosing elements themselves, including fallback content
+    fallback_depth = 0
+    pending = []
+
+    def discard(elem):
+        # Clearing alone leaves an empty element behind in its parent, one per paragraph
+        elem.clear()
+        if ancestors:
+            ancestors[-1].remove(elem)
+
+    def emit(line):
+        if cells:
+            cells[-1].append(line.text)
+        elif line.text:
+            pending.append(line)
+
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            ancestors.append(elem)
+        else:
+            ancestors.pop()
+        tag = elem.tag.rpartition('}')[2]
+        if tag == 'Fallback':
+            fallback_depth += 1 if event == "start" else -1
+            if event == "end":
+                discard(elem)
+            continue
+        if fallback_depth:
+            continue
+
+        if event == "start":
+            open_tags.append(tag)
+            if tag == 'p':
+                paragraphs.append({'parts': [], 'style': None, 'chars': 0, 'bold_chars': 0, 'size': None})
+            elif tag == 'tr':
+                rows.append([])
+            elif tag == 'tc':
+                cells.append([])
+            continue
+
+        open_tags.pop()
+        parent = open_tags[-1] if open_tags else None
+        frame = paragraphs[-1] if paragraphs else None
+        if tag == 't' and frame is not None:
+            frame['parts'].append(elem.text or "")
+        elif tag == 'tab' and parent == 'r' and frame is not None:
+            # Only a run's tab character; w:pPr/w:tabs/w:tab are tab stop definitions
+            frame['parts'].append("\t")
+        elif tag in ('br', 'cr') and frame is not None:
+            frame['parts'].append("\n")
+        elif tag == 'pStyle' and frame is not None:
+            style_id = next((v for k, v in elem.attrib.items() if k.endswith('}val')), None)
+            frame['style'] = docx_style_key(style_names.get(style_id, style_id))
+        elif tag == 'r' and frame is not None:
+            # Run properties are still attached here; paragraphs are only cleared at their end.
+            run_chars = sum(len(child.text or "") for child in elem if child.tag.endswith('}t'))
+            rpr = next((child for child in elem if child.tag.endswith('}rPr')), None)
+            bold = False
+            if rpr is not None:
+                for prop in rpr:
+                    prop_tag = prop.tag.rpartition('}')[2]
+                    if prop_tag == 'b':
+                        bold = _is_on(prop)
+                    elif prop_tag == 'sz':
+                        half_points = next((v for k, v in prop.attrib.items() if k.endswith('}val')), None)
+                        if half_points and half_points.isdigit():
+                            frame['size'] = max(frame['size'] or 0, int(half_points) / 2)
+            frame['chars'] += run_chars
+            if bold:
+                frame['bold_chars'] += run_chars
+        elif tag == 'p':
+            if frame is not None:
+                paragraphs.pop()
+                emit(TextLine(
+                    text="".join(frame['parts']).strip(),
+                    size=frame['size'],
+                    bold=frame['chars'] > 0 and frame['bold_chars'] == frame['chars'],
+                    gap=None,
+                    style=frame['style'] or docx_style_key(style_names.get(None))
+                ))
+            discard(elem)
+        elif tag == 'tc':
+            cell_text = " ".join(line for line in cells.pop() if line)
+            if rows:
+                rows[-1].append(cell_text)
+        elif tag == 'tr':
+            row_text = " | ".join(cell for cell in rows.pop() if cell) if rows else ""
+            emit(TextLine(text=row_text, size=None, bold=False, gap=None, style=None))
+            discard(elem)
+        elif tag == 'tbl':
+            discard(elem)
+
+        while pending:
+            yield pending.pop(0)
+
+
+def _extract_lines_from_docx_stream(docx_bytes: bytes) -> list:
+    """Reads headers, the main document and footers straight out of the DOCX zip."""
+    with zipfile.ZipFile(BytesIO(docx_bytes)) as archive:
+        names = set(archive.namelist())
+        if 'word/document.xml' not in names:
+            raise ValueError("word/document.xml not found in DOCX archive")
+        headers = sorted((n for n in names if re.match(r'word/header\d*\.xml$', n)), key=_part_sort_key)
+        footers = sorted((n for n in names if re.match(r'word/footer\d*\.xml$', n)), key=_part_sort_key)
+
+        style_names = {}
+        if 'word/styles.xml' in names:
+            with archive.open('word/styles.xml') as stream:
+                style_names = _read_docx_style_names(stream)
+
+        lines = []
+        seen_header_footer_lines = set()
+        for part in headers + ['word/document.xml'] + footers:
+            is_body = part == 'word/document.xml'
+            with archive.open(part) as stream:
+                for line in _iter_docx_part_lines(stream, style_names):
+                    # Headers/footers are often repeated per section; keep their first occurrence.
+                    if not is_body:
+                        if line.text in seen_header_footer_lines:
+                            continue
+                        seen_header_footer_lines.add(line.text)
+                    lines.append(line)
+    return lines
+
+
+def _extract_lines_from_docx_python_docx(docx_bytes: bytes) -> list:
+    """Fallback extraction through the python-docx object model (paragraphs only)."""
+    doc = Document(BytesIO(docx_bytes))
+    return [
+        TextLine(
+            text=para.text.strip(), size=None, bold=False, gap=None,
+            style=docx_style_key(para.style.name) if para.style else None
+        )
+        for para in doc.paragraphs if para.text.strip()
+    ]
+
+
+def extract_lines_from_docx(docx_bytes: bytes) -> list:
+    """
+    Extracts TextLines from DOCX bytes by streaming the WordprocessingML parts.
+    Falls back to python-docx, when installed, if the archive can't be streamed.
+    """
+    try:
+        return _extract_lines_from_docx_stream(docx_bytes)
+    except (zipfile.BadZipFile, ET.ParseError, ValueError, KeyError) as e:
+        if Document is None:
+            log.error("Error extracting text from DOCX", error=str(e))
+            raise ValueError(f"Could not extract text from DOCX: {e}")
+        log.warning("Streaming DOCX extraction failed, falling back to python-docx", error=str(e))
+    try:
+        return _extract_lines_from_docx_python_docx(docx_bytes)
+    except Exception as e:
+        log.error("Error extracting text from DOCX", error=str(e))
+        raise ValueError(f"Could not extract text from DOCX: {e}")
+
+
+def extract_lines_from_file_bytes(file_bytes: bytes, file_extension: str) -> list:
+    """
+    Extracts TextLines based on file extension.
+    Raises ValueError for unsupported types or extraction errors.
+    """
+    file_extension = file_extension.lower().strip('.')
+    if file_extension == 'pdf':
+        return extract_lines_from_pdf(file_bytes)
+    elif file_extension == 'docx':
+        return extract_lines_from_docx(file_bytes)
+    else:
+        raise ValueError(f"Unsupported file type for extraction: {file_extension}")
@@ -0,0 +1,79 @@
+import os
+import sys
+import importlib.util
+
+import pytest
+from botocore.stub import Stubber
+
+# Lambda puts each function's code directory and the common layer on the path, so the
+# modules import one another by bare name; mirror that for the unit tests.
+ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
+for directory in ('common_layer', 'upload_resume_function', 'process_resume_function', 'get_status_function'):
+    sys.path.insert(0, os.path.abspath(os.path.join(ROOT, directory)))
+
+# The handlers create their clients and read their configuration at import time. The
+# clients are real boto3 clients; tests answer their calls with botocore's Stubber.
+for name, value in {
+    'AWS_DEFAULT_REGION': 'us-east-1',
+    'AWS_ACCESS_KEY_ID': 'test',
+    'AWS_SECRET_ACCESS_KEY': 'test',
+    'S3_BUCKET_NAME': 'resumes-bucket',
+    'DYNAMODB_TABLE_NAME': 'resumes',
+    'SQS_QUEUE_URL': 'https://sqs.us-east-1.amazonaws.com/123456789012/resumes',
+    'CONTENT_INDEX_TABLE_NAME': 'content-index',
+    'BATCH_TABLE_NAME': 'batches',
+    'PROCESS_FUNCTION_NAME': 'process-resume',
+}.items():
+    os.environ.setdefault(name, value)
+
+
+def load_handler(directory, module_name):
+    """Imports a function's app.py under its own name (every function's module is `app`)."""
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(ROOT, directory, 'app.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope='session')
+def upload_app():
+    return load_handler('upload_resume_function', 'upload_app')
+
+
+@pytest.fixture(scope='session')
+def process_app():
+    return load_handler('process_resume_function', 'process_app')
+
+
+@pytest.fixture(scope='session')
+def status_app():
+    return load_handler('get_status_function', 'status_app')
+
+
+@pytest.fixture
+def stub():
+    """
+    Puts a Stubber on a module's client for the test. Returns (stubber, calls): queue
+    responses on the stubber; calls collects (operation, params) as they are made.
+    Every queued response must have been used by the end of the test.
+    """
+    active = []
+
+    def stub_client(client):
+        stubber = Stubber(client)
+        calls = []
+
+        def record(params, model, **kwargs):
+            calls.append((model.name, params))
+
+        client.meta.events.register('provide-client-params.*.*', record)
+        stubber.activate()
+        active.append((client, stubber, record))
+        return stubber, calls
+
+    yield stub_client
+    for client, stubber, record in active:
+        stubber.deactivate()
+        client.meta.events.unregister('provide-client-params.*.*', record)
+    for client, stubber, record in active:
+        stubber.assert_no_pending_responses()
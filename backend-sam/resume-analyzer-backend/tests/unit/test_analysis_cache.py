@@ -0,0 +1,80 @@
+import json
+import time
+
+import boto3
+from botocore.exceptions import ReadTimeoutError
+from botocore.stub import Stubber
+
+from analysis_cache import AnalysisCache, canonicalize_text
+
+
+def make_cache(table_name=None, max_entries=2):
+    client = boto3.client('dynamodb', region_name='us-east-1', aws_access_key_id='test', aws_secret_access_key='test')
+    return AnalysisCache(client, table_name, ttl_seconds=3600, max_entries=max_entries), client
+
+
+def test_key_ignores_cosmetic_differences_only():
+    key = AnalysisCache.key_for("Python  developer\n\n  AWS ", 'model-a', 'v2')
+    assert key == AnalysisCache.key_for("Python developer\nAWS", 'model-a', 'v2')
+    assert key == AnalysisCache.key_for("Ｐｙｔｈｏｎ developer\nAWS", 'model-a', 'v2')
+    assert key != AnalysisCache.key_for("Python developer\nAWS", 'model-b', 'v2')
+    assert key != AnalysisCache.key_for("Python developer\nAWS", 'model-a', 'v3')
+    assert canonicalize_text(" a  b \n\n c ") == "a b\nc"
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache, _ = make_cache(max_entries=2)
+    cache.put('a', {'score': 1})
+    cache.put('b', {'score': 2})
+    assert cache.get('a') == {'score': 1} # a is now the most recently used
+    cache.put('c', {'score': 3})
+
+    assert cache.get('b') is None
+    assert cache.get('a') == {'score': 1}
+    assert cache.get('c') == {'score': 3}
+    assert cache.stats == {'memory_hits': 3, 'dynamodb_hits': 0, 'misses': 1}
+
+
+def test_dynamodb_tier_fills_memory_and_skips_expired_items():
+    cache, client = make_cache(table_name='cache')
+    now = int(time.time())
+    with Stubber(client) as stubber:
+        stubber.add_response('get_item', {'Item': {
+            'cache_key': {'S': 'fresh'},
+            'analysis_results': {'S': json.dumps({'score': 9})},
+            'expires_at': {'N': str(now + 60)},
+        }}, {'TableName': 'cache', 'Key': {'cache_key': {'S': 'fresh'}}})
+        stubber.add_response('get_item', {'Item': {
+            'cache_key': {'S': 'stale'},
+            'analysis_results': {'S': json.dumps({'score': 1})},
+            'expires_at': {'N': str(now - 60)},
+        }})
+        stubber.add_client_error('get_item', 'ProvisionedThroughputExceededException')
+
+        assert cache.get('fresh') == {'score': 9}
+        assert cache.get('fresh') == {'score': 9} # from memory, no second read
+        assert cache.get('stale') is None
+        assert cache.get('throttled') is None
+        stubber.assert_no_pending_responses()
+    assert cache.stats == {'memory_hits': 1, 'dynamodb_hits': 1, 'misses': 2}
+
+
+def test_put_failure_is_not_raised():
+    cache, client = make_cache(table_name='cache')
+    with Stubber(client) as stubber:
+        stubber.add_client_error('put_item', 'ValidationException')
+        cache.put('key', {'score': 5}, model_id='model-a', prompt_version='v2')
+    assert cache.get('key') == {'score': 5}
+
+
+def test_timeouts_are_misses_and_not_raised(monkeypatch):
+    cache, client = make_cache(table_name='cache', max_entries=0)
+
+    def timed_out(**kwargs):
+        raise ReadTimeoutError(endpoint_url='https://dynamodb.us-east-1.amazonaws.com')
+
+    monkeypatch.setattr(client, 'get_item', timed_out)
+    monkeypatch.setattr(client, 'put_item', timed_out)
+    cache.put('key', {'score': 5})
+    assert cache.get('key') is None
+    assert cache.stats['misses'] == 1
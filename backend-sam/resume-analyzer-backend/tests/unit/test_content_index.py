@@ -0,0 +1,80 @@
+import boto3
+import pytest
+
+from content_index import ContentIndex
+
+
+@pytest.fixture
+def dynamodb_client():
+    return boto3.client('dynamodb', region_name='us-east-1')
+
+
+@pytest.fixture
+def index(dynamodb_client):
+    return ContentIndex(dynamodb_client, 'content-index', ttl_seconds=3600, lease_seconds=600)
+
+
+def conditional_check_failed(stubber, item=None):
+    stubber.add_client_error(
+        'update_item', service_error_code='ConditionalCheckFailedException', http_status_code=400,
+        modeled_fields={'Item': item} if item else None
+    )
+
+
+def owned_by(resume_id, status, waiters=None):
+    item = {
+        'content_sha256': {'S': 'abc123'},
+        'resume_id': {'S': resume_id},
+        's3_key': {'S': f'{resume_id}.pdf'},
+        'status': {'S': status},
+    }
+    if waiters:
+        item['waiters'] = {'SS': waiters}
+    return item
+
+
+def test_second_of_two_racing_claims_gets_the_winner(index, dynamodb_client, stub):
+    stubber, calls = stub(dynamodb_client)
+    stubber.add_response('update_item', {})
+    conditional_check_failed(stubber, owned_by('r-1', 'processing'))
+
+    assert index.claim('abc123', 'r-1', 'r-1.pdf') is None
+    assert index.claim('abc123', 'r-2', 'r-2.pdf') == {'resume_id': 'r-1', 's3_key': 'r-1.pdf', 'status': 'processing'}
+    # both claims are the same conditional write; only the item's state decides
+    assert calls[0][1]['ConditionExpression'] == calls[1][1]['ConditionExpression']
+    assert calls[1][1]['ReturnValuesOnConditionCheckFailure'] == 'ALL_OLD'
+
+
+def test_waiter_attaching_after_resolve_is_turned_away(index, dynamodb_client, stub):
+    stubber, calls = stub(dynamodb_client)
+    stubber.add_response('update_item', {'Attributes': {'waiters': {'SS': ['r-2']}}})
+    conditional_check_failed(stubber)
+
+    assert index.resolve('abc123', 'r-1', 'completed') == ['r-2']
+    assert index.attach_waiter('abc123', 'r-3') is False
+    # only a live, processing job takes waiters
+    assert calls[1][1]['ConditionExpression'] == "#st = :processing AND #exp >= :now"
+
+
+def test_failed_resolution_hands_back_waiters_and_frees_the_hash(index, dynamodb_client, stub):
+    stubber, calls = stub(dynamodb_client)
+    stubber.add_response('update_item', {'Attributes': owned_by('r-1', 'failed', ['r-2', 'r-3'])})
+    stubber.add_response('update_item', {})
+
+    assert sorted(index.resolve('abc123', 'r-1', 'failed')) == ['r-2', 'r-3']
+    assert calls[0][1]['ExpressionAttributeValues'][':status'] == {'S': 'failed'}
+    # the next identical upload may claim a failed hash
+    assert index.claim('abc123', 'r-4', 'r-4.pdf') is None
+    assert "#st = :failed" in calls[1][1]['ConditionExpression']
+
+
+def test_resolve_by_a_job_that_lost_the_hash_returns_no_waiters(index, dynamodb_client, stub):
+    stubber, _ = stub(dynamodb_client)
+    conditional_check_failed(stubber)
+    assert index.resolve('abc123', 'r-1', 'completed') == []
+
+
+def test_waiters_of_another_job_are_not_returned(index, dynamodb_client, stub):
+    stubber, _ = stub(dynamodb_client)
+    stubber.add_response('get_item', {'Item': {'resume_id': {'S': 'r-9'}, 'waiters': {'SS': ['r-2']}}})
+    assert index.waiters('abc123', 'r-1') == []
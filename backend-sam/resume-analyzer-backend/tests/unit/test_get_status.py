@@ -0,0 +1,173 @@
+import json
+
+import pytest
+
+from status_cache import StatusCache
+
+ANALYSIS = {"compatibility_score": 80, "top_technical_skills_found": ["Python"]}
+
+
+@pytest.fixture(autouse=True)
+def empty_status_cache(status_app, monkeypatch):
+    monkeypatch.setattr(status_app, 'status_cache', StatusCache(100, 100000, status_app.STATUS_CACHE_TTL_SECONDS))
+
+
+def record(status, version, **attributes):
+    item = {
+        'resume_id': {'S': 'r-1'},
+        'status': {'S': status},
+        'version': {'N': str(version)},
+        'processing_owner': {'S': 'm-1'},
+        'lease_expires_at': {'N': '1700000000'},
+    }
+    item.update(attributes)
+    return item
+
+
+def status_event(query=None, if_none_match=None):
+    headers = {'If-None-Match': if_none_match} if if_none_match else {}
+    return {
+        'httpMethod': 'GET',
+        'resource': '/resume-status/{resume_id}',
+        'pathParameters': {'resume_id': 'r-1'},
+        'queryStringParameters': query,
+        'headers': headers,
+    }
+
+
+def test_processing_status_is_revalidated(status_app, stub):
+    stubber, _ = stub(status_app.dynamodb_client)
+    stubber.add_response('get_item', {'Item': record('processing', 2, compatibility_score={'N': '80'})})
+
+    response = status_app.lambda_handler(status_event(), None)
+
+    assert response['statusCode'] == 200
+    assert response['headers']['ETag'] == '"v2"'
+    assert response['headers']['Cache-Control'] == 'no-cache'
+    body = json.loads(response['body'])
+    assert body['state'] == 'processing:scored'
+    assert 'processing_owner' not in body and 'lease_expires_at' not in body
+
+
+def test_matching_if_none_match_gets_304(status_app, stub):
+    stubber, _ = stub(status_app.dynamodb_client)
+    stubber.add_response('get_item', {'Item': record('processing', 2)})
+
+    response = status_app.lambda_handler(status_event(if_none_match='W/"v1", "v2"'), None)
+
+    assert (response['statusCode'], response['body']) == (304, '')
+    assert response['headers']['ETag'] == '"v2"'
+
+
+def test_completed_status_is_cached_for_good(status_app, stub):
+    stubber, _ = stub(status_app.dynamodb_client)
+    stubber.add_response('get_item', {'Item': record('completed', 3, analysis_results={'S': json.dumps(ANALYSIS)})})
+
+    first = status_app.lambda_handler(status_event(), None)
+    # served from the container cache: no second read is stubbed
+    second = status_app.lambda_handler(status_event(), None)
+    revalidated = status_app.lambda_handler(status_event(if_none_match='"v3"'), None)
+
+    assert first['headers']['Cache-Control'] == status_app.IMMUTABLE_CACHE_CONTROL
+    assert json.loads(first['body'])['analysis_results'] == ANALYSIS
+    assert (second['statusCode'], second['body']) == (200, first['body'])
+    assert revalidated['statusCode'] == 304
+
+
+def test_long_poll_answers_once_the_state_changes(status_app, stub, monkeypatch):
+    monkeypatch.setattr(status_app.time, 'sleep', lambda seconds: None)
+    stubber, calls = stub(status_app.dynamodb_client)
+    stubber.add_response('get_item', {'Item': {'status': {'S': 'processing'}, 'version': {'N': '1'}}})
+    stubber.add_response('get_item', {'Item': {'status': {'S': 'processing'}, 'version': {'N': '1'}}})
+    stubber.add_response('get_item', {'Item': {
+        'status': {'S': 'processing'}, 'version': {'N': '2'}, 'compatibility_score': {'N': '80'}
+    }})
+    stubber.add_response('get_item', {'Item': record('processing', 2, compatibility_score={'N': '80'})})
+
+    response = status_app.lambda_handler(status_event({'since': 'processing', 'wait': '10'}), None)
+
+    assert response['statusCode'] == 200
+    assert json.loads(response['body'])['state'] == 'processing:scored'
+    # the waiting reads only fetch the state; the answer is one full read
+    assert [params.get('ProjectionExpression') for operation, params in calls] == [
+        status_app.STATE_PROJECTION, status_app.STATE_PROJECTION, status_app.STATE_PROJECTION, None
+    ]
+
+
+def test_long_poll_with_a_matching_etag_needs_no_full_read(status_app, stub):
+    stubber, calls = stub(status_app.dynamodb_client)
+    stubber.add_response('get_item', {'Item': {'status': {'S': 'processing'}, 'version': {'N': '1'}}})
+
+    response = status_app.lambda_handler(
+        status_event({'since': 'processing', 'wait': '0'}, if_none_match='"v1"'), None
+    )
+
+    assert response['statusCode'] == 304
+    assert response['headers']['Cache-Control'] == 'no-cache'
+    assert len(calls) == 1
+
+
+def test_invalid_wait_is_rejected(status_app):
+    response = status_app.lambda_handler(status_event({'since': 'processing', 'wait': 'soon'}), None)
+    assert response['statusCode'] == 400
+
+
+def statuses_event(body):
+    return {'httpMethod': 'POST', 'resource': '/resume-status/batch', 'body': json.dumps(body)}
+
+
+def test_statuses_read_only_the_requested_fields(status_app, stub):
+    stubber, calls = stub(status_app.dynamodb_client)
+    stubber.add_response('batch_get_item', {'Responses': {'resumes': [{
+        'resume_id': {'S': 'r-1'},
+        'status': {'S': 'completed'},
+        'analysis_results': {'S': json.dumps(ANALYSIS)},
+        'file_name': {'S': 'cv.pdf'},
+    }]}})
+
+    response = status_app.lambda_handler(statuses_event({
+        'resume_ids': ['r-1', 'r-2', 'r-1'], 'fields': ['status', 'analysis_results', 'file_name'],
+    }), None)
+
+    assert response['statusCode'] == 200
+    assert json.loads(response['body']) == {
+        'resumes': {'r-1': {'status': 'completed', 'analysis_results': ANALYSIS, 'file_name': 'cv.pdf'}},
+        'not_found': ['r-2'],
+    }
+    request = calls[0][1]['RequestItems']['resumes']
+    assert request['Keys'] == [{'resume_id': {'S': 'r-1'}}, {'resume_id': {'S': 'r-2'}}]
+    assert request['ProjectionExpression'] == "resume_id, #f0, #f1, #f2"
+    assert request['ExpressionAttributeNames'] == {'#f0': 'status', '#f1': 'analysis_results', '#f2': 'file_name'}
+
+
+def test_statuses_default_to_status_and_score(status_app, stub):
+    stubber, calls = stub(status_app.dynamodb_client)
+    stubber.add_response('batch_get_item', {'Responses': {'resumes': []}})
+
+    status_app.lambda_handler(statuses_event({'resume_ids': ['r-1']}), None)
+
+    names = calls[0][1]['RequestItems']['resumes']['ExpressionAttributeNames']
+    assert list(names.values()) == list(status_app.DEFAULT_STATUS_FIELDS)
+
+
+@pytest.mark.parametrize("body", [
+    {'resume_ids': [f'r-{number}' for number in range(101)]},
+    {'resume_ids': []},
+    {'resume_ids': ['r-1', 7]},
+    {'resume_ids': ['r-1'], 'fields': ['status', 'processing_owner']},
+    {'resume_ids': ['r-1'], 'fields': 'status'},
+])
+def test_invalid_statuses_request_is_rejected_before_reading(status_app, stub, body):
+    stub(status_app.dynamodb_client) # any read would fail the test
+    assert status_app.lambda_handler(statuses_event(body), None)['statusCode'] == 400
+
+
+def test_repeated_ids_count_once_towards_the_limit(status_app, stub):
+    stubber, calls = stub(status_app.dynamodb_client)
+    stubber.add_response('batch_get_item', {'Responses': {'resumes': []}})
+    resume_ids = [f'r-{number}' for number in range(100)] + ['r-0']
+
+    response = status_app.lambda_handler(statuses_event({'resume_ids': resume_ids}), None)
+
+    assert response['statusCode'] == 200
+    assert len(calls[0][1]['RequestItems']['resumes']['Keys']) == 100
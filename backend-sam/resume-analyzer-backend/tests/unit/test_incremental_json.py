@@ -0,0 +1,54 @@
+import json
+
+from incremental_json import IncrementalObjectParser
+
+COMPLETION = json.dumps({
+    "compatibility_score": 82,
+    "top_technical_skills_found": ["C#", "Node.js", "SQL"],
+    "compatibility_explanation": "Uses \"Kafka\", {braces}, [brackets], commas, and a \\ backslash.",
+    "suggested_keywords": ["AWS", "Go"],
+}, indent=2)
+
+
+def feed_in_chunks(parser, text, size):
+    completed = []
+    for i in range(0, len(text), size):
+        completed.append(parser.feed(text[i:i + size]))
+    return completed
+
+
+def test_members_are_reported_as_soon_as_they_are_complete():
+    parser = IncrementalObjectParser()
+    assert parser.feed('{"compatibility_score": 8') == {}
+    assert parser.feed('2,') == {"compatibility_score": 82}
+    assert parser.feed(' "suggested_keywords": ["AWS"') == {}
+    assert parser.feed(']}') == {"suggested_keywords": ["AWS"]}
+
+
+def test_any_chunking_gives_the_full_object():
+    for size in (1, 2, 3, 7, 64, len(COMPLETION)):
+        parser = IncrementalObjectParser()
+        completed = feed_in_chunks(parser, COMPLETION, size)
+        assert parser.members == json.loads(COMPLETION)
+        # each member is reported exactly once
+        assert sum(len(members) for members in completed) == 4
+
+
+def test_escaped_quotes_and_brackets_inside_strings():
+    parser = IncrementalObjectParser()
+    parser.feed('{"compatibility_explanation": "a \\"quoted\\" word, a } brace and a ] bracket\\\\", "x": 1}')
+    assert parser.members == {
+        "compatibility_explanation": 'a "quoted" word, a } brace and a ] bracket\\',
+        "x": 1,
+    }
+
+
+def test_fenced_preamble_and_trailing_text_are_skipped():
+    parser = IncrementalObjectParser()
+    feed_in_chunks(parser, "Here is the analysis:\n```json\n" + COMPLETION + "\n```\nThat's all.", 5)
+    assert parser.members == json.loads(COMPLETION)
+
+
+def test_invalid_member_is_ignored():
+    parser = IncrementalObjectParser()
+    assert parser.feed('{"compatibility_score": 8x, "suggested_keywords": []}') == {"suggested_keywords": []}
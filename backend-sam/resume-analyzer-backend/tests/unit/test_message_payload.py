@@ -0,0 +1,43 @@
+import os
+import json
+
+import pytest
+
+from message_payload import INLINE_PAYLOAD_MAX_BYTES, decode_file, encode_file
+
+SQS_MAX_MESSAGE_BYTES = 256 * 1024
+
+
+@pytest.mark.parametrize("file_bytes, encoding", [
+    (b"%PDF-1.7\n" + b"BT /F1 11 Tf (Python) Tj ET\n" * 2000, 'zlib+base64'),
+    (os.urandom(50 * 1024), 'base64'),
+])
+def test_file_round_trips_through_the_message(file_bytes, encoding):
+    fields = encode_file(file_bytes)
+    assert fields['file_encoding'] == encoding
+    assert decode_file(json.loads(json.dumps(fields))) == file_bytes
+
+
+def test_file_over_the_limit_is_left_in_s3():
+    # base64 grows incompressible bytes by a third, so this no longer fits
+    assert encode_file(os.urandom(INLINE_PAYLOAD_MAX_BYTES * 3 // 4 + 3)) is None
+    assert encode_file(os.urandom(INLINE_PAYLOAD_MAX_BYTES * 3 // 4)) is not None
+    assert encode_file(b"") is None
+    assert decode_file({'resume_id': 'r-1', 's3_key': 'r-1.pdf'}) is None
+
+
+def test_largest_inline_message_fits_in_sqs(upload_app):
+    file_bytes = os.urandom(INLINE_PAYLOAD_MAX_BYTES * 3 // 4)
+    body = upload_app.message_body_for('r-1', 'resumes/r-1.pdf', 'a' * 64, file_bytes, 'resumes/r-1.analysis.pdf')
+    assert 'file_content' in json.loads(body)
+    assert len(body.encode()) < SQS_MAX_MESSAGE_BYTES
+
+
+def test_process_function_reads_s3_when_the_message_has_no_usable_file(upload_app, process_app):
+    large = json.loads(upload_app.message_body_for('r-1', 'resumes/r-1.pdf', file_bytes=os.urandom(300 * 1024)))
+    assert 'file_content' not in large
+    assert process_app.file_from_message('r-1', large) is None
+    unknown = {'file_content': 'AAAA', 'file_encoding': 'brotli'}
+    assert process_app.file_from_message('r-1', unknown) is None
+    corrupt = {'file_content': 'AAAA', 'file_encoding': 'zlib+base64'}
+    assert process_app.file_from_message('r-1', corrupt) is None
@@ -0,0 +1,67 @@
+import io
+import zipfile
+
+import fitz
+import pytest
+
+from preflight import REJECTION_STATUS, SNIFF_BYTES, check, sniff
+
+
+def make_docx(names=('word/document.xml',), padding=0):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as archive:
+        if padding:
+            archive.writestr('[Content_Types].xml', b"x" * padding)
+        for name in names:
+            archive.writestr(name, "<w:document/>")
+    return buffer.getvalue()
+
+
+def make_pdf(text):
+    doc = fitz.open()
+    page = doc.new_page()
+    if text:
+        page.insert_text((72, 72), text)
+    try:
+        return doc.tobytes()
+    finally:
+        doc.close()
+
+
+@pytest.mark.parametrize("head, file_type", [
+    (b"%PDF-1.7\n", 'pdf'),
+    (b"\xef\xbb\xbf junk before the header %PDF-1.4", 'pdf'),
+    (make_docx(), 'docx'),
+])
+def test_sniff_accepts(head, file_type):
+    result = sniff(head)
+    assert (result.file_type, result.reason) == (file_type, None)
+
+
+@pytest.mark.parametrize("head, reason", [
+    (b" " * 1024 + b"%PDF-1.7", 'unsupported_type'),
+    (make_docx(names=('xl/workbook.xml',)), 'docx_without_document'),
+    (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1" + b"\0" * 100, 'legacy_or_protected_office'),
+    (b"\x89PNG\r\n\x1a\n", 'unsupported_type'),
+    (b"", 'unsupported_type'),
+])
+def test_sniff_rejects(head, reason):
+    result = sniff(head)
+    assert (result.file_type, result.reason) == (None, reason)
+    assert result.message
+    assert reason in REJECTION_STATUS
+
+
+def test_sniff_gives_a_truncated_zip_head_the_benefit_of_the_doubt():
+    docx_bytes = make_docx(padding=SNIFF_BYTES)
+    assert sniff(docx_bytes[:SNIFF_BYTES]).file_type == 'docx'
+    # the full check reads the central directory instead
+    assert check(docx_bytes).file_type == 'docx'
+    assert check(make_docx(names=('xl/workbook.xml',), padding=SNIFF_BYTES)).reason == 'docx_without_document'
+
+
+def test_check_pdf():
+    result = check(make_pdf("Jane Doe, backend engineer with ten years of Python and AWS experience."))
+    assert (result.file_type, result.page_count) == ('pdf', 1)
+    assert check(make_pdf("")).reason == 'no_text_layer'
+    assert check(b"%PDF-1.7 truncated").reason == 'corrupt'
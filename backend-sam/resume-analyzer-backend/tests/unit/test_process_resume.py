@@ -0,0 +1,147 @@
+import json
+import time
+
+import pytest
+from botocore.exceptions import ClientError
+
+SECTIONS = {'skills': "Python, AWS", 'experience': "Engineer at Acme"}
+ANALYSIS = {
+    "compatibility_score": 80,
+    "top_technical_skills_found": ["Python"],
+    "compatibility_explanation": "Good fit.",
+    "suggested_keywords": ["Go"],
+}
+
+
+def sqs_record(resume_id, message_id='m-1', content_sha256='abc123', receive_count=1):
+    body = {'resume_id': resume_id, 's3_bucket': 'resumes-bucket', 's3_key': f'resumes/{resume_id}.pdf'}
+    if content_sha256:
+        body['content_sha256'] = content_sha256
+    return {
+        'messageId': message_id,
+        'body': json.dumps(body),
+        'attributes': {'ApproximateReceiveCount': str(receive_count)},
+    }
+
+
+@pytest.fixture
+def analysed(process_app, monkeypatch):
+    """Skips extraction and caches: every record is analysed with the returned dict's 'result'."""
+    outcome = {'result': ANALYSIS}
+    monkeypatch.setattr(process_app.extraction_cache, 'get', lambda content_sha256: SECTIONS)
+    monkeypatch.setattr(process_app.analysis_cache, 'get', lambda key: None)
+    monkeypatch.setattr(process_app.analysis_cache, 'put', lambda *args: None)
+    monkeypatch.setattr(process_app, 'analyze_with_bedrock', lambda prompt, on_early_fields=None: outcome['result'])
+    return outcome
+
+
+def test_error_analysis_resolves_the_hash_as_failed(process_app, analysed, stub):
+    analysed['result'] = {'error': "Model returned invalid JSON", 'raw_output': "not json"}
+    stubber, calls = stub(process_app.dynamodb_client)
+    stubber.add_response('update_item', {})                                  # claim
+    stubber.add_response('get_item', {'Item': {'resume_id': {'S': 'r-1'}, 'waiters': {'SS': ['r-2']}}})
+    stubber.add_response('update_item', {})                                  # waiter r-2 failed
+    stubber.add_response('update_item', {})                                  # r-1 stored
+    stubber.add_response('update_item', {'Attributes': {'waiters': {'SS': ['r-2', 'r-3']}}})  # resolve
+    stubber.add_response('update_item', {})                                  # late waiter r-3 failed
+
+    assert process_app.process_record(sqs_record('r-1'))
+
+    updates = [params for operation, params in calls if operation == 'UpdateItem']
+    waiter_updates = [updates[1], updates[4]]
+    assert [params['Key']['resume_id']['S'] for params in waiter_updates] == ['r-2', 'r-3']
+    for params in waiter_updates:
+        assert params['ExpressionAttributeValues'][':s'] == {'S': 'failed'}
+        assert params['ExpressionAttributeValues'][':e'] == {'S': "Model returned invalid JSON"}
+    resolve = updates[3]
+    assert resolve['TableName'] == 'content-index'
+    assert resolve['ExpressionAttributeValues'][':status'] == {'S': 'failed'}
+
+
+def test_usable_analysis_resolves_the_hash_as_completed(process_app, analysed, stub):
+    stubber, calls = stub(process_app.dynamodb_client)
+    stubber.add_response('update_item', {})                                  # claim
+    stubber.add_response('get_item', {'Item': {'resume_id': {'S': 'r-1'}}})  # no waiters yet
+    stubber.add_response('update_item', {})                                  # r-1 stored
+    stubber.add_response('update_item', {'Attributes': {'waiters': {'SS': ['r-2']}}})  # resolve
+    stubber.add_response('update_item', {})                                  # r-2 stored
+
+    assert process_app.process_record(sqs_record('r-1'))
+
+    updates = [params for operation, params in calls if operation == 'UpdateItem']
+    assert updates[2]['ExpressionAttributeValues'][':status'] == {'S': 'completed'}
+    stored = updates[3]
+    assert stored['Key']['resume_id'] == {'S': 'r-2'}
+    assert json.loads(stored['ExpressionAttributeValues'][':a']['S']) == ANALYSIS
+
+
+def conditional_check_failed(stubber, item=None):
+    stubber.add_client_error(
+        'update_item', service_error_code='ConditionalCheckFailedException', http_status_code=400,
+        modeled_fields={'Item': item} if item else None
+    )
+
+
+def test_claim_is_rejected_while_another_message_holds_the_lease(process_app, stub):
+    stubber, calls = stub(process_app.dynamodb_client)
+    conditional_check_failed(stubber, {
+        'resume_id': {'S': 'r-1'},
+        'status': {'S': 'processing'},
+        'processing_owner': {'S': 'm-other'},
+        'lease_expires_at': {'N': str(int(time.time()) + 30)},
+    })
+
+    # a duplicate delivery is done with: nothing else is read or written
+    assert process_app.process_record(sqs_record('r-1', message_id='m-1'))
+    assert [operation for operation, params in calls] == ['UpdateItem']
+    assert calls[0][1]['ReturnValuesOnConditionCheckFailure'] == 'ALL_OLD'
+
+
+def test_claim_takes_over_an_expired_lease(process_app, stub):
+    expired = int(time.time()) - 5
+    stubber, calls = stub(process_app.dynamodb_client)
+    stubber.add_response('update_item', {})
+
+    assert process_app.claim_resume('r-1', 'm-2') is None
+
+    params = calls[0][1]
+    values = params['ExpressionAttributeValues']
+    # the held-lease clause lets a lapsed lease through, and the new lease is this message's
+    assert "#lease < :now" in params['ConditionExpression']
+    assert int(values[':now']['N']) > expired
+    assert values[':mid'] == {'S': 'm-2'}
+    assert int(values[':lease']['N']) == int(values[':now']['N']) + process_app.CLAIM_LEASE_SECONDS
+
+
+def test_only_records_left_to_retry_are_reported(process_app, analysed, stub, monkeypatch):
+    monkeypatch.setattr(process_app, 'MAX_CONCURRENT_RECORDS', 1) # keeps the stubbed calls in record order
+    results = iter([
+        ClientError({'Error': {'Code': 'ThrottlingException'}}, 'InvokeModel'),
+        ANALYSIS,
+    ])
+
+    def analyse(prompt, on_early_fields=None):
+        result = next(results)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    monkeypatch.setattr(process_app, 'analyze_with_bedrock', analyse)
+    stubber, calls = stub(process_app.dynamodb_client)
+    stubber.add_client_error('update_item', service_error_code='ProvisionedThroughputExceededException')  # m-1 claim
+    conditional_check_failed(stubber, {'resume_id': {'S': 'r-2'}, 'status': {'S': 'completed'}})  # m-2 duplicate
+    stubber.add_response('update_item', {})                                  # m-3 claim
+    stubber.add_response('update_item', {})                                  # m-3 lease released
+    stubber.add_response('update_item', {})                                  # m-4 claim
+    stubber.add_response('get_item', {'Item': {'resume_id': {'S': 'r-4'}}})
+    stubber.add_response('update_item', {})                                  # r-4 stored
+    stubber.add_response('update_item', {'Attributes': {}})                  # hash resolved
+
+    response = process_app.lambda_handler({'Records': [
+        sqs_record(f'r-{number}', message_id=f'm-{number}') for number in range(1, 5)
+    ]}, None)
+
+    assert response == {'batchItemFailures': [{'itemIdentifier': 'm-1'}, {'itemIdentifier': 'm-3'}]}
+    release = calls[3][1]
+    assert release['UpdateExpression'] == "REMOVE #owner, #lease"
+    assert release['ExpressionAttributeValues'] == {':mid': {'S': 'm-3'}}
@@ -0,0 +1,64 @@
+import json
+
+from prompt_builder import (
+    MAX_OUTPUT_TOKENS, SYSTEM_PROMPT, build_prompt, estimate_tokens, select_sections
+)
+from section_segmenter import HEADER_SECTION
+
+
+def lines(word, count):
+    return "\n".join(f"{word} line {i} with several words of detail" for i in range(count))
+
+
+def test_estimate_tokens_counts_symbols_digits_and_newlines():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("Python") == 2
+    assert estimate_tokens("C++ 2024") == 1 + 2 + 2
+    assert estimate_tokens("a\nb") == 3
+
+
+def test_max_output_tokens_fits_a_full_answer():
+    answer = {
+        "compatibility_score": 87,
+        "top_technical_skills_found": ["Python", "AWS Lambda", "DynamoDB", "Terraform", "Kubernetes"],
+        "compatibility_explanation": " ".join(["word"] * 60),
+        "suggested_keywords": ["CI/CD", "Observability", "Go", "gRPC", "Kafka"],
+    }
+    assert estimate_tokens(json.dumps(answer, indent=2)) < MAX_OUTPUT_TOKENS
+
+
+def test_everything_fits_in_section_order():
+    sections = {HEADER_SECTION: "Jane Doe", 'education': "BSc", 'skills': "Python"}
+    prompt, tokens, notes = build_prompt(sections)
+    assert notes == []
+    assert "Jane Doe" not in prompt
+    assert prompt.index("## Education") < prompt.index("## Skills")
+    assert tokens == estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(prompt)
+
+
+def test_low_priority_sections_are_dropped_first():
+    sections = {'education': lines("edu", 40), 'skills': "Python, AWS", 'experience': lines("job", 10)}
+    chosen, notes = select_sections(sections, 300)
+    assert list(chosen) == ['skills', 'experience']
+    assert len(notes) == 1 and notes[0].startswith("dropped education")
+
+
+def test_required_section_is_truncated_on_a_line_boundary():
+    sections = {'skills': "Python", 'projects': lines("project", 20), 'experience': lines("job", 200)}
+    chosen, notes = select_sections(sections, 400)
+
+    # experience keeps its reserved floor even though projects ranks ahead of it
+    assert list(chosen) == ['skills', 'experience']
+    assert chosen['experience'].startswith("## Experience\njob line 0 ")
+    assert sections['experience'].startswith(chosen['experience'].split("\n", 1)[1])
+    assert any(note.startswith("truncated experience") for note in notes)
+    assert any(note.startswith("dropped projects") for note in notes)
+    assert sum(estimate_tokens(block) + 2 for block in chosen.values()) <= 400
+
+
+def test_prompt_stays_within_the_budget():
+    sections = {'skills': lines("skill", 100), 'experience': lines("job", 300), 'summary': lines("about", 50)}
+    prompt, tokens, notes = build_prompt(sections, token_budget=1000)
+    assert tokens <= 1000
+    assert "## Skills" in prompt and "## Experience" in prompt
+    assert notes
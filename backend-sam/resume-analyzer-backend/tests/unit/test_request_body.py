@@ -0,0 +1,149 @@
+import io
+import base64
+import os
+
+import boto3
+import pytest
+from boto3.s3.transfer import TransferConfig
+from botocore.stub import Stubber
+
+import request_body
+from request_body import (
+    Base64Reader, BodyTooLarge, HashingReader, MalformedBody, PrefixedReader, open_multipart_file, read_head
+)
+
+MB = 1024 * 1024
+# The upload handler's STREAM_TRANSFER_CONFIG
+STREAM_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=5 * MB,
+    multipart_chunksize=5 * MB,
+    max_concurrency=1,
+    use_threads=False
+)
+
+
+@pytest.fixture()
+def s3_client():
+    """A real S3 client whose calls are answered by a Stubber; records each body's size."""
+    client = boto3.client('s3', region_name='us-east-1', aws_access_key_id='test', aws_secret_access_key='test')
+    client.body_sizes = []
+
+    def record_body(params, **kwargs):
+        client.body_sizes.append(len(params['Body'].read()))
+
+    client.meta.events.register('provide-client-params.s3.UploadPart', record_body)
+    client.meta.events.register('provide-client-params.s3.PutObject', record_body)
+    return client
+
+
+@pytest.mark.parametrize("size_mb", [6, 12])
+def test_sniffed_stream_is_uploaded_in_multipart_chunks(s3_client, size_mb):
+    data = os.urandom(size_mb * MB)
+    reader = HashingReader(Base64Reader(base64.b64encode(data).decode('ascii')), 20 * MB)
+    head = read_head(reader, 64 * 1024)
+
+    parts = -(-len(data) // (5 * MB))
+    with Stubber(s3_client) as stubber:
+        stubber.add_response('create_multipart_upload', {'UploadId': 'upload-1'})
+        for number in range(parts):
+            stubber.add_response('upload_part', {'ETag': f'"{number}"'})
+        stubber.add_response('complete_multipart_upload', {})
+        s3_client.upload_fileobj(PrefixedReader(head, reader), 'bucket', 'key', Config=STREAM_TRANSFER_CONFIG)
+        stubber.assert_no_pending_responses()
+
+    assert sum(s3_client.body_sizes) == len(data)
+    assert all(size >= 5 * MB for size in s3_client.body_sizes[:-1])
+    assert reader.size == len(data)
+
+
+def test_prefixed_reader_tops_up_short_prefix():
+    reader = PrefixedReader(b"abc", io.BytesIO(b"defghij"))
+    assert reader.read(5) == b"abcde"
+    assert reader.read(-1) == b"fghij"
+    assert reader.read(5) == b""
+
+
+@pytest.mark.parametrize("length", [0, 1, 2, 3, 4, 5, 100])
+@pytest.mark.parametrize("size", [1, 2, 3, 4, 5, 7])
+def test_base64_reader_returns_exact_sizes_across_quanta(length, size):
+    data = bytes(range(length))
+    reader = Base64Reader(base64.b64encode(data).decode('ascii'))
+    chunks = []
+    chunk = reader.read(size)
+    while chunk:
+        chunks.append(chunk)
+        chunk = reader.read(size)
+    assert all(len(chunk) == size for chunk in chunks[:-1])
+    assert b"".join(chunks) == data
+
+
+def test_base64_reader_read_all_after_partial_read():
+    reader = Base64Reader(base64.b64encode(b"abcdefgh").decode('ascii'))
+    assert reader.read(1) == b"a"
+    assert reader.read() == b"bcdefgh"
+    assert reader.read(4) == b""
+
+
+def test_base64_reader_rejects_invalid_input():
+    with pytest.raises(MalformedBody):
+        Base64Reader("abc").read()
+
+
+def test_hashing_reader_enforces_the_limit():
+    reader = HashingReader(io.BytesIO(b"x" * 10), 8)
+    assert reader.read(8) == b"x" * 8
+    with pytest.raises(BodyTooLarge):
+        reader.read(8)
+
+
+def multipart_body(boundary, file_bytes, fields=None, filename="resume.pdf"):
+    parts = [
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        for name, value in (fields or {}).items()
+    ]
+    parts.append(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f'Content-Type: application/pdf\r\n\r\n'.encode() + file_bytes + b"\r\n"
+    )
+    return b"".join(parts) + f"--{boundary}--\r\n".encode()
+
+
+@pytest.mark.parametrize("read_size", [1, 5, 4096, 64 * 1024, 70 * 1024])
+def test_multipart_file_reader_stops_at_the_boundary(monkeypatch, read_size):
+    monkeypatch.setattr(request_body, 'READ_CHUNK_BYTES', 7) # boundaries land across buffer refills
+    boundary = "----form42"
+    # content that contains most of the delimiter, but not all of it
+    file_bytes = os.urandom(5000) + b"\r\n------form4x" + os.urandom(3000) + b"\r\n--"
+    body = multipart_body(boundary, file_bytes, fields={'user': 'jane', 'note': 'x'})
+
+    fields, file_name, content_type, reader = open_multipart_file(
+        io.BytesIO(body), f'multipart/form-data; boundary="{boundary}"'
+    )
+    assert (fields, file_name, content_type) == ({'user': 'jane', 'note': 'x'}, "resume.pdf", "application/pdf")
+    chunks = []
+    chunk = reader.read(read_size)
+    while chunk:
+        assert len(chunk) <= read_size
+        chunks.append(chunk)
+        chunk = reader.read(read_size)
+    assert b"".join(chunks) == file_bytes
+
+
+def test_multipart_rfc5987_filename():
+    body = (
+        b"--b\r\nContent-Disposition: form-data; name=\"file\"; filename*=utf-8''r%C3%A9sum%C3%A9.pdf\r\n\r\n"
+        b"%PDF-1.7\r\n--b--\r\n"
+    )
+    _, file_name, content_type, reader = open_multipart_file(io.BytesIO(body), "multipart/form-data; boundary=b")
+    assert (file_name, content_type, reader.read()) == ("r\u00e9sum\u00e9.pdf", "application/octet-stream", b"%PDF-1.7")
+
+
+@pytest.mark.parametrize("body, content_type", [
+    (b"--b\r\nContent-Disposition: form-data; name=\"a\"\r\n\r\n1\r\n--b--\r\n", "multipart/form-data; boundary=b"),
+    (b"--b\r\nContent-Disposition: form-data; name=\"file\"; filename=\"a\"\r\n\r\n", "multipart/form-data; boundary=b"),
+    (b"", "multipart/form-data"),
+])
+def test_malformed_multipart_bodies(body, content_type):
+    with pytest.raises(MalformedBody):
+        _, _, _, reader = open_multipart_file(io.BytesIO(body), content_type)
+        reader.read()
@@ -0,0 +1,81 @@
+from section_segmenter import HEADER_SECTION, UNSEGMENTED_SECTION, canonical_section_name, segment_sections
+from text_extractor import TextLine
+
+
+def pdf_line(text, size=11, bold=False, gap=4):
+    return TextLine(text=text, size=size, bold=bold, gap=gap, style=None)
+
+
+def docx_line(text, style=None, bold=False):
+    return TextLine(text=text, size=None, bold=bold, gap=None, style=style)
+
+
+def test_canonical_section_name():
+    assert canonical_section_name("WORK EXPERIENCE:") == 'experience'
+    assert canonical_section_name("Skills & Abilities") == 'skills'
+    assert canonical_section_name("Hobbies") is None
+
+
+def test_pdf_headings_found_from_layout():
+    lines = [
+        pdf_line("Jane Doe", size=20, bold=True, gap=None),
+        pdf_line("jane@example.com"),
+        pdf_line("Experience", size=14, bold=True, gap=12),
+        pdf_line("Engineer at Acme, 2020-2024"),
+        pdf_line("Built data pipelines"),
+        pdf_line("Volunteering", size=14, bold=True, gap=12),
+        pdf_line("Food bank driver"),
+        pdf_line("SKILLS", gap=12),
+        pdf_line("Python, AWS"),
+    ]
+    assert segment_sections(lines) == {
+        HEADER_SECTION: "Jane Doe\njane@example.com",
+        'experience': "Engineer at Acme, 2020-2024\nBuilt data pipelines",
+        'volunteering': "Food bank driver",
+        'skills': "Python, AWS",
+    }
+
+
+def test_known_heading_without_heading_layout_stays_body_text():
+    lines = [
+        pdf_line("Experience", bold=True, gap=12),
+        pdf_line("Engineer at Acme"),
+        pdf_line("Tools"),
+        pdf_line("Jira and Confluence"),
+    ]
+    assert segment_sections(lines) == {'experience': "Engineer at Acme\nTools\nJira and Confluence"}
+
+
+def test_docx_headings_found_from_paragraph_styles():
+    lines = [
+        docx_line("Jane Doe", style="title"),
+        docx_line("Summary", style="heading1"),
+        docx_line("Backend engineer.", style="normal"),
+        docx_line("Open Source", style="heading1"),
+        docx_line("Maintainer of a parser.", style="normal"),
+    ]
+    assert segment_sections(lines) == {
+        HEADER_SECTION: "Jane Doe",
+        'summary': "Backend engineer.",
+        'open source': "Maintainer of a parser.",
+    }
+
+
+def test_unknown_headings_before_a_known_one_stay_in_the_header():
+    lines = [
+        pdf_line("Jane Doe", size=20, bold=True, gap=None),
+        pdf_line("Senior Backend Engineer", size=14, bold=True, gap=4),
+        pdf_line("jane@example.com | +1 555 0100"),
+        pdf_line("Education", size=14, bold=True, gap=12),
+        pdf_line("BSc Computer Science"),
+    ]
+    assert segment_sections(lines) == {
+        HEADER_SECTION: "Jane Doe\nSenior Backend Engineer\njane@example.com | +1 555 0100",
+        'education': "BSc Computer Science",
+    }
+
+
+def test_text_without_headings_is_one_section():
+    lines = [pdf_line("Jane Doe"), pdf_line(""), pdf_line("Worked on things.")]
+    assert segment_sections(lines) == {UNSEGMENTED_SECTION: "Jane Doe\nWorked on things."}
+    assert segment_sections([]) == {}
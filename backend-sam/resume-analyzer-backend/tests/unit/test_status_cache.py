@@ -0,0 +1,67 @@
+import time
+
+from status_cache import StatusCache
+
+TTL = {'completed': 300, 'failed': 10}
+
+
+def test_only_finished_statuses_are_cached():
+    cache = StatusCache(max_entries=10, max_bytes=100000, ttl_seconds=TTL)
+    assert not cache.put('r1', 'processing', None, '{}')
+    assert cache.put('r2', 'completed', 'completed', '{"score": 80}', etag='"v3"')
+    assert cache.get('r1') is None
+    assert cache.get('r2')['etag'] == '"v3"'
+
+
+def test_least_recently_used_entry_is_evicted_by_count():
+    cache = StatusCache(max_entries=2, max_bytes=100000, ttl_seconds=TTL)
+    cache.put('a', 'completed', None, 'a')
+    cache.put('b', 'completed', None, 'b')
+    assert cache.get('a') is not None
+    cache.put('c', 'completed', None, 'c')
+
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
+    assert cache.stats['evictions'] == 1
+    assert cache.stats['entries'] == 2
+
+
+def test_entries_are_evicted_by_bytes():
+    cache = StatusCache(max_entries=100, max_bytes=3000, ttl_seconds=TTL)
+    for resume_id in 'abcdef':
+        assert cache.put(resume_id, 'completed', None, 'x' * 200)
+    # each entry costs 300 bytes with its overhead, so all six fit
+    assert cache.stats['bytes'] == 1800
+    for resume_id in 'ghijk':
+        cache.put(resume_id, 'completed', None, 'x' * 200)
+    assert cache.stats['bytes'] <= 3000
+    assert cache.get('a') is None and cache.get('k') is not None
+
+
+def test_oversized_entry_is_not_cached():
+    cache = StatusCache(max_entries=100, max_bytes=3000, ttl_seconds=TTL)
+    cache.put('small', 'completed', None, 'x')
+    assert not cache.put('big', 'completed', None, 'x' * 300)
+    assert cache.get('small') is not None
+
+
+def test_replacing_an_entry_keeps_the_byte_count():
+    cache = StatusCache(max_entries=10, max_bytes=100000, ttl_seconds=TTL)
+    cache.put('r', 'failed', 'failed', 'x' * 50)
+    cache.put('r', 'completed', 'completed', 'x' * 10)
+    assert cache.stats['bytes'] == 110
+    assert cache.get('r')['status'] == 'completed'
+
+
+def test_entries_expire_per_status(monkeypatch):
+    now = time.monotonic()
+    monkeypatch.setattr(time, 'monotonic', lambda: now)
+    cache = StatusCache(max_entries=10, max_bytes=100000, ttl_seconds=TTL)
+    cache.put('done', 'completed', None, '{}')
+    cache.put('broken', 'failed', None, '{}')
+
+    monkeypatch.setattr(time, 'monotonic', lambda: now + 60)
+    assert cache.get('broken') is None
+    assert cache.get('done') is not None
+    assert cache.stats['expired'] == 1
+    assert cache.stats['hit_rate'] == 0.5
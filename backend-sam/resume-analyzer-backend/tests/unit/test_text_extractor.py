@@ -0,0 +1,125 @@
+import io
+import zipfile
+import tracemalloc
+
+import fitz
+import pytest
+
+import text_extractor
+from text_extractor import TextLine, docx_style_key, extract_lines_from_docx, extract_lines_from_pdf
+
+W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+
+
+def make_pdf(pages):
+    doc = fitz.open()
+    for number in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Page {number + 1} heading", fontsize=16, fontname="helv")
+        page.insert_text((72, 100), f"Body text on page {number + 1}", fontsize=11, fontname="helv")
+    try:
+        return doc.tobytes()
+    finally:
+        doc.close()
+
+
+def make_docx(body, styles=None, headers=None, footers=None):
+    """A minimal DOCX: word/document.xml plus optional styles, headers and footers."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr('word/document.xml', f'<w:document {W}><w:body>{body}</w:body></w:document>')
+        if styles is not None:
+            archive.writestr('word/styles.xml', f'<w:styles {W}>{styles}</w:styles>')
+        for name, xml in (headers or {}).items():
+            archive.writestr(f'word/{name}', f'<w:hdr {W}>{xml}</w:hdr>')
+        for name, xml in (footers or {}).items():
+            archive.writestr(f'word/{name}', f'<w:ftr {W}>{xml}</w:ftr>')
+    return buffer.getvalue()
+
+
+def paragraph(text, style=None, bold=False):
+    ppr = f'<w:pPr><w:pStyle w:val="{style}"/></w:pPr>' if style else ''
+    rpr = '<w:rPr><w:b/></w:rPr>' if bold else ''
+    return f'<w:p>{ppr}<w:r>{rpr}<w:t>{text}</w:t></w:r></w:p>'
+
+
+def test_pdf_lines_come_in_page_order_with_layout():
+    lines = extract_lines_from_pdf(make_pdf(9))
+    assert [line.text for line in lines[:2]] == ["Page 1 heading", "Body text on page 1"]
+    assert lines[-1].text == "Body text on page 9"
+    assert lines[0].size == 16 and lines[1].size == 11
+    assert lines[0].gap is None and lines[1].gap > 0
+
+
+def test_unreadable_pdf_is_rejected():
+    with pytest.raises(ValueError):
+        extract_lines_from_pdf(b"%PDF-1.7 not really")
+
+
+def test_docx_table_rows_become_one_line():
+    row = '<w:tr><w:tc>{}</w:tc><w:tc>{}</w:tc><w:tc>{}</w:tc></w:tr>'.format(
+        paragraph("Python"), paragraph("AWS"), '<w:p/>'
+    )
+    docx_bytes = make_docx(paragraph("Skills") + f'<w:tbl>{row}</w:tbl>' + paragraph("After"))
+    assert [line.text for line in extract_lines_from_docx(docx_bytes)] == ["Skills", "Python | AWS", "After"]
+
+
+def test_docx_headers_and_footers_are_read_once_in_order():
+    docx_bytes = make_docx(
+        paragraph("Body"),
+        headers={'header10.xml': paragraph("Second header"), 'header2.xml': paragraph("Jane Doe")},
+        footers={'footer1.xml': paragraph("Jane Doe") + paragraph("Page footer")}
+    )
+    assert [line.text for line in extract_lines_from_docx(docx_bytes)] == [
+        "Jane Doe", "Second header", "Body", "Page footer"
+    ]
+
+
+def test_docx_tabs_styles_and_bold():
+    styles = (
+        '<w:style w:type="paragraph" w:default="1" w:styleId="Normal"><w:name w:val="Normal"/></w:style>'
+        '<w:style w:type="paragraph" w:styleId="berschrift1"><w:name w:val="heading 1"/></w:style>'
+    )
+    tab_stops = '<w:pPr><w:tabs><w:tab w:val="left" w:pos="720"/></w:tabs></w:pPr>'
+    body = (
+        paragraph("Experience", style="berschrift1", bold=True)
+        + f'<w:p>{tab_stops}<w:r><w:t>2020</w:t><w:tab/><w:t>Engineer</w:t></w:r></w:p>'
+    )
+    heading, job = extract_lines_from_docx(make_docx(body, styles=styles))
+    assert heading == TextLine("Experience", None, True, None, "heading1")
+    assert job == TextLine("2020\tEngineer", None, False, None, "normal")
+
+
+def test_docx_parsing_memory_does_not_grow_with_the_document():
+    def peak_bytes(paragraphs):
+        row = f'<w:tr><w:tc>{paragraph("a")}</w:tc><w:tc>{paragraph("b")}</w:tc></w:tr>'
+        xml = (
+            f'<w:document {W}><w:body>' + paragraph("Intro", bold=True) * paragraphs
+            + f'<w:tbl>{row * (paragraphs // 4)}</w:tbl></w:body></w:document>'
+        )
+        stream = io.BytesIO(xml.encode())
+        tracemalloc.start()
+        try:
+            for _ in text_extractor._iter_docx_part_lines(stream):
+                pass
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    peak_bytes(100) # warm up
+    # Without detaching, every consumed paragraph left an empty element of ~100 bytes behind
+    assert peak_bytes(12000) < peak_bytes(2000) + 400 * 1024
+
+
+def test_docx_style_key_matches_python_docx_names():
+    assert docx_style_key("Heading1") == docx_style_key("Heading 1") == "heading1"
+    assert docx_style_key(None) is None
+
+
+def test_docx_without_document_is_rejected(monkeypatch):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr('word/styles.xml', '<w:styles/>')
+    monkeypatch.setattr(text_extractor, 'Document', None)
+    with pytest.raises(ValueError):
+        extract_lines_from_docx(buffer.getvalue())
@@ -0,0 +1,191 @@
+import io
+import base64
+import json
+
+from botocore.response import StreamingBody
+
+CANONICAL_ANALYSIS = {"compatibility_score": 72, "top_technical_skills_found": ["Go"]}
+
+
+def conditional_check_failed(stubber, item=None):
+    stubber.add_client_error(
+        'update_item', service_error_code='ConditionalCheckFailedException', http_status_code=400,
+        modeled_fields={'Item': item} if item else None
+    )
+
+
+def claimed_by(resume_id, status):
+    """The content index item handed back when another job already owns the hash."""
+    return {
+        'content_sha256': {'S': 'abc123'},
+        'resume_id': {'S': resume_id},
+        's3_key': {'S': f'resumes/{resume_id}.pdf'},
+        'status': {'S': status},
+    }
+
+
+def test_reused_completed_analysis_carries_the_canonical_score(upload_app, stub):
+    stubber, calls = stub(upload_app.dynamodb_client)
+    conditional_check_failed(stubber, claimed_by('r-1', 'completed'))
+    stubber.add_response('get_item', {'Item': {
+        'resume_id': {'S': 'r-1'},
+        'status': {'S': 'completed'},
+        'analysis_results': {'S': json.dumps(CANONICAL_ANALYSIS)},
+        'compatibility_score': {'N': '72'},
+        'top_technical_skills_found': {'L': [{'S': 'Go'}]},
+    }})
+    stubber.add_response('put_item', {})
+
+    response = upload_app.reuse_existing_job('r-2', 'resumes/r-2.pdf', 'cv.pdf', 'abc123')
+
+    body = json.loads(response['body'])
+    assert (body['status'], body['deduplicated']) == ('completed', True)
+    item = calls[-1][1]['Item']
+    assert item['resume_id'] == {'S': 'r-2'} and item['duplicate_of'] == {'S': 'r-1'}
+    assert item['s3_key'] == {'S': 'resumes/r-1.pdf'}
+    assert item['compatibility_score'] == {'N': '72'}
+    assert item['version'] == {'N': '1'}
+    assert json.loads(item['analysis_results']['S']) == CANONICAL_ANALYSIS
+
+
+def test_completed_error_analysis_is_not_reused(upload_app, stub, monkeypatch):
+    queued = []
+    monkeypatch.setattr(upload_app, 'enqueue', lambda *args: queued.append(args))
+    stubber, calls = stub(upload_app.dynamodb_client)
+    conditional_check_failed(stubber, claimed_by('r-1', 'completed'))
+    stubber.add_response('get_item', {'Item': {
+        'resume_id': {'S': 'r-1'},
+        'status': {'S': 'completed'},
+        'analysis_results': {'S': json.dumps({"error": "Model returned invalid JSON"})},
+    }})
+    stubber.add_response('put_item', {})
+
+    response = upload_app.reuse_existing_job('r-2', 'resumes/r-2.pdf', 'cv.pdf', 'abc123')
+
+    assert json.loads(response['body'])['status'] == 'processing'
+    item = calls[-1][1]['Item']
+    assert item['status'] == {'S': 'processing'} and 'duplicate_of' not in item
+    assert queued == [('r-2', 'resumes/r-1.pdf', 'abc123')]
+
+
+BATCH_ID = '5d0b4e53-4c8a-4f6e-9a53-0c2f7a6f1f10'
+
+
+def batch_file(resume_id):
+    return {'M': {
+        'resume_id': {'S': resume_id},
+        's3_key': {'S': f'batches/{BATCH_ID}/{resume_id}.pdf'},
+        'file_name': {'S': f'{resume_id}.pdf'},
+    }}
+
+
+def test_batch_retry_leaves_records_already_written_alone(upload_app, stub):
+    dynamodb, dynamodb_calls = stub(upload_app.dynamodb_client)
+    s3, _ = stub(upload_app.s3_client)
+    sqs, sqs_calls = stub(upload_app.sqs_client)
+    dynamodb.add_response('get_item', {'Item': {
+        'batch_id': {'S': BATCH_ID},
+        'status': {'S': 'uploading'},
+        'files': {'L': [batch_file(resume_id) for resume_id in ('r-1', 'r-2', 'r-3', 'r-4')]},
+    }})
+    dynamodb.add_response('update_item', {})   # uploading -> queueing
+    s3.add_response('list_objects_v2', {'Contents': [
+        {'Key': f'batches/{BATCH_ID}/{resume_id}.pdf'} for resume_id in ('r-1', 'r-2', 'r-3')
+    ]})
+    # the first call wrote every record and analysis has since moved on
+    dynamodb.add_response('batch_get_item', {'Responses': {'resumes': [
+        {'resume_id': {'S': 'r-1'}, 'status': {'S': 'completed'}},
+        {'resume_id': {'S': 'r-2'}, 'status': {'S': 'processing'}},
+        {'resume_id': {'S': 'r-4'}, 'status': {'S': 'failed'}},
+    ]}})
+    dynamodb.add_response('batch_write_item', {})
+    sqs.add_response('send_message_batch', {'Successful': [
+        {'Id': str(index), 'MessageId': f'm-{index}', 'MD5OfMessageBody': 'x'} for index in range(2)
+    ], 'Failed': []})
+    dynamodb.add_response('update_item', {})   # queueing -> queued
+
+    response = upload_app.complete_batch({'batch_id': BATCH_ID})
+
+    body = json.loads(response['body'])
+    assert (body['queued'], body['missing'], body['already_finished']) == (2, [], ['r-1', 'r-4'])
+    written = dict(dynamodb_calls)['BatchWriteItem']['RequestItems']['resumes']
+    assert [request['PutRequest']['Item']['resume_id']['S'] for request in written] == ['r-3']
+    messages = [json.loads(entry['MessageBody'])['resume_id'] for entry in sqs_calls[0][1]['Entries']]
+    assert messages == ['r-2', 'r-3']
+
+
+def test_body_over_the_request_limit_points_to_the_presigned_flow(upload_app, monkeypatch):
+    monkeypatch.setattr(upload_app, 'MAX_REQUEST_FILE_BYTES', 1000)
+    pdf = b"%PDF-1.7\n" + b"x" * 2000
+    events = [
+        {'headers': {'Content-Type': 'application/pdf'}, 'isBase64Encoded': True,
+         'body': base64.b64encode(pdf).decode('ascii')},
+        {'headers': {'Content-Type': 'application/json'},
+         'body': json.dumps({'file_content_base64': base64.b64encode(pdf).decode('ascii')})},
+    ]
+    for event in events:
+        response = upload_app.lambda_handler({'httpMethod': 'POST', 'resource': '/upload-resume', **event}, None)
+        assert response['statusCode'] == 413
+        body = json.loads(response['body'])
+        assert (body['max_bytes'], body['upload_initiate_path']) == (1000, '/upload-resume/initiate')
+
+
+def invoke_response(payload, function_error=None):
+    data = json.dumps(payload).encode()
+    response = {'StatusCode': 200, 'Payload': StreamingBody(io.BytesIO(data), len(data))}
+    if function_error:
+        response['FunctionError'] = function_error
+    return response
+
+
+def test_inline_success_leaves_a_harmless_fallback_message(upload_app, process_app, stub):
+    lambda_stubber, _ = stub(upload_app.lambda_client)
+    dynamodb, _ = stub(upload_app.dynamodb_client)
+    lambda_stubber.add_response('invoke', invoke_response({'batchItemFailures': []}))
+    completed = {
+        'resume_id': {'S': 'r-1'},
+        'status': {'S': 'completed'},
+        'analysis_results': {'S': json.dumps(CANONICAL_ANALYSIS)},
+    }
+    dynamodb.add_response('get_item', {'Item': completed})
+
+    item = upload_app.analyse_inline('r-1', 'resumes/r-1.pdf', 'abc123')
+
+    assert item == completed
+    assert json.loads(upload_app.inline_response(item)['body'])['analysis_results'] == CANONICAL_ANALYSIS
+    # The delayed fallback message still arrives; its claim finds the resume completed.
+    process_dynamodb, process_calls = stub(process_app.dynamodb_client)
+    process_dynamodb.add_client_error(
+        'update_item', service_error_code='ConditionalCheckFailedException', http_status_code=400,
+        modeled_fields={'Item': completed}
+    )
+    fallback = {'messageId': 'm-fallback', 'body': upload_app.message_body_for('r-1', 'resumes/r-1.pdf', 'abc123')}
+    assert process_app.process_record(fallback)
+    assert [operation for operation, params in process_calls] == ['UpdateItem']
+
+
+def test_inline_invoke_error_requeues_and_keeps_the_fallback(upload_app, stub):
+    lambda_stubber, _ = stub(upload_app.lambda_client)
+    sqs, sqs_calls = stub(upload_app.sqs_client)
+    lambda_stubber.add_client_error('invoke', service_error_code='TooManyRequestsException', http_status_code=429)
+    lambda_stubber.add_response('invoke', invoke_response({'errorMessage': 'boom'}, function_error='Unhandled'))
+    for _ in range(2):
+        sqs.add_response('send_message', {'MessageId': 'm-now', 'MD5OfMessageBody': 'x'})
+
+    assert upload_app.analyse_inline('r-1', 'resumes/r-1.pdf', 'abc123') is None
+    assert upload_app.analyse_inline('r-2', 'resumes/r-2.pdf', 'abc123') is None
+
+    # each is queued again at once; the delayed fallback is left where it is
+    assert [operation for operation, params in sqs_calls] == ['SendMessage', 'SendMessage']
+    assert all('DelaySeconds' not in params for operation, params in sqs_calls)
+    assert [json.loads(params['MessageBody'])['resume_id'] for operation, params in sqs_calls] == ['r-1', 'r-2']
+
+
+def test_inline_hand_back_survives_a_failed_requeue(upload_app, stub):
+    lambda_stubber, _ = stub(upload_app.lambda_client)
+    sqs, _ = stub(upload_app.sqs_client)
+    lambda_stubber.add_response('invoke', invoke_response({'batchItemFailures': [{'itemIdentifier': 'inline-r-1'}]}))
+    sqs.add_client_error('send_message', service_error_code='ServiceUnavailable', http_status_code=503)
+
+    # the delayed fallback message still covers the resume, so the upload is answered
+    assert upload_app.analyse_inline('r-1', 'resumes/r-1.pdf', 'abc123') is None
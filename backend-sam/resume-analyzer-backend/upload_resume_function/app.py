@@ -1,35 +1,940 @@
+import io
 import json
 import base64
 import uuid
+import hashlib
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote, unquote
 import boto3
-from botocore.exceptions import ClientError
+from botocore.config import Config
+from botocore.exceptions import ClientError, BotoCoreError
+from boto3.s3.transfer import TransferConfig
+
+from request_body import (
+    Base64Reader, HashingReader, PrefixedReader, BodyTooLarge, MalformedBody, open_multipart_file, read_head
+)
+import preflight
+from pdf_compaction import compact_pdf
+from structured_logger import get_logger, start_invocation, event_summary
+from content_index import ContentIndex
+from batch_operations import batch_get_items, batch_write_items, send_message_batches
+from message_payload import encode_file
 
 # Initialize AWS clients
-s3_client = boto3.client('s3')
+# SigV4 is required for presigned POSTs signed with the Lambda role's session credentials.
+s3_client = boto3.client('s3', config=Config(signature_version='s3v4'))
 dynamodb_client = boto3.client('dynamodb')
 sqs_client = boto3.client('sqs')
 
+log = get_logger(__name__)
+
+# Runs the S3 writes and the DynamoDB record creation side by side. Kept across warm
+# invocations so no threads are started on the request path.
+side_effect_executor = ThreadPoolExecutor(max_workers=3)
+
 # Environment variables (set in Lambda Console)
 S3_BUCKET_NAME = os.environ.get('S3_BUCKET_NAME')
 DYNAMODB_TABLE_NAME = os.environ.get('DYNAMODB_TABLE_NAME')
 SQS_QUEUE_URL = os.environ.get('SQS_QUEUE_URL')
+# Presigned uploads: largest accepted file and how long the upload form stays valid.
+MAX_UPLOAD_BYTES = int(os.environ.get('MAX_UPLOAD_BYTES', str(10 * 1024 * 1024)))
+UPLOAD_URL_EXPIRES_SECONDS = int(os.environ.get('UPLOAD_URL_EXPIRES_SECONDS', '900'))
+# Files sent in the request body to /upload-resume. The Lambda invoke payload is capped
+# at 6 MB and the file arrives base64-encoded inside the event, so about 4.4 MB of file
+# is all that can ever reach the handler; larger files must use the presigned flow.
+MAX_REQUEST_FILE_BYTES = int(os.environ.get('MAX_REQUEST_FILE_BYTES', str((6 * 1024 * 1024 - 64 * 1024) * 3 // 4)))
+# Hash -> job index used to reuse analyses of identical files; unset disables it.
+CONTENT_INDEX_TABLE_NAME = os.environ.get('CONTENT_INDEX_TABLE_NAME')
+CONTENT_INDEX_TTL_SECONDS = int(os.environ.get('CONTENT_INDEX_TTL_SECONDS', str(7 * 24 * 3600)))
+# How long an unresolved claim holds the hash: enough for the queue delay and every
+# delivery of the message, after which an identical upload takes the claim over.
+CONTENT_INDEX_LEASE_SECONDS = int(os.environ.get('CONTENT_INDEX_LEASE_SECONDS', '600'))
+content_index = (
+    ContentIndex(dynamodb_client, CONTENT_INDEX_TABLE_NAME, CONTENT_INDEX_TTL_SECONDS, CONTENT_INDEX_LEASE_SECONDS)
+    if CONTENT_INDEX_TABLE_NAME else None
+)
+# Bulk uploads: one item per batch listing its files; expired by TTL.
+BATCH_TABLE_NAME = os.environ.get('BATCH_TABLE_NAME')
+BATCH_TTL_SECONDS = int(os.environ.get('BATCH_TTL_SECONDS', str(30 * 24 * 3600)))
+MAX_BATCH_FILES = int(os.environ.get('MAX_BATCH_FILES', '500'))
+# Inline fast path: small resumes are analysed by invoking the process function
+# synchronously and returned in the upload response. Off unless enabled.
+FAST_PATH_ENABLED = os.environ.get('FAST_PATH_ENABLED', 'false').lower() == 'true'
+PROCESS_FUNCTION_NAME = os.environ.get('PROCESS_FUNCTION_NAME')
+FAST_PATH_MAX_PAGES = int(os.environ.get('FAST_PATH_MAX_PAGES', '2'))
+FAST_PATH_MAX_BYTES = int(os.environ.get('FAST_PATH_MAX_BYTES', str(1024 * 1024)))
+# Longest wait for the inline run, and time kept back to answer after it.
+FAST_PATH_TIMEOUT_SECONDS = int(os.environ.get('FAST_PATH_TIMEOUT_SECONDS', '20'))
+FAST_PATH_RESERVE_MS = int(os.environ.get('FAST_PATH_RESERVE_MS', '2000'))
+# The SQS message is still sent, delayed past the process function's timeout and claim
+# lease: it only does any work if the inline run died without finishing.
+FAST_PATH_QUEUE_DELAY_SECONDS = int(os.environ.get('FAST_PATH_QUEUE_DELAY_SECONDS', '90'))
+# No retries: a retried inline run would only outlast the budget.
+lambda_client = boto3.client('lambda', config=Config(
+    read_timeout=FAST_PATH_TIMEOUT_SECONDS,
+    connect_timeout=2,
+    retries={'max_attempts': 0}
+))
+# Store an image-free, font-subset copy of large PDFs for analysis next to the original.
+PDF_COMPACTION_ENABLED = os.environ.get('PDF_COMPACTION_ENABLED', 'false').lower() == 'true'
 
-def lambda_handler(event, context):
+PDF_CONTENT_TYPE = 'application/pdf'
+DOCX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+# Extension -> content type a presigned upload must declare
+UPLOAD_CONTENT_TYPES = {'pdf': PDF_CONTENT_TYPE, 'docx': DOCX_CONTENT_TYPE}
+
+# Streamed bodies are sent in S3 multipart chunks of the minimum size, one at a time.
+# Request bodies are capped below the 5 MB threshold (MAX_REQUEST_FILE_BYTES), so in
+# practice they go up in a single PutObject.
+STREAM_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=5 * 1024 * 1024,
+    multipart_chunksize=5 * 1024 * 1024,
+    max_concurrency=1,
+    use_threads=False
+)
+
+# Copied from the original record when an identical file has already been analysed
+ANALYSIS_ATTRIBUTES = (
+    'analysis_results', 'analysis_timestamp', 'compatibility_score', 'top_technical_skills_found',
+    'compatibility_explanation', 'suggested_keywords',
+)
+
+# CORS Headers for API Gateway. Crucial for Next.js frontend.
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
+    'Access-Control-Allow-Methods': 'OPTIONS,POST',
+    'Content-Type': 'application/json'
+}
+
+
+def json_response(status_code, body):
+    return {
+        'statusCode': status_code,
+        'headers': CORS_HEADERS,
+        'body': json.dumps(body)
+    }
+
+
+def file_extension_for(file_name, content_type):
+    """Picks the stored file extension from the declared content type, falling back to the file name."""
+    file_extension = 'txt' # Default
+    if PDF_CONTENT_TYPE in content_type:
+        file_extension = 'pdf'
+    elif DOCX_CONTENT_TYPE in content_type or file_name.lower().endswith('.docx'):
+        file_extension = 'docx'
+    elif file_name.lower().endswith('.pdf'):
+         file_extension = 'pdf' # Fallback for names if content-type is generic
+    return file_extension
+
+
+def preflight_rejection(result, route, declared_type=None, size_bytes=None):
+    """Logs a file preflight turned away (count them by `reason`) and builds the error response."""
+    log.info(
+        "Preflight rejected", reason=result.reason, route=route,
+        declared_type=declared_type, size_bytes=size_bytes
+    )
+    return json_response(preflight.REJECTION_STATUS[result.reason], {"message": result.message, "reason": result.reason})
+
+
+def too_large_response(message):
+    """413 for a file too big for the request body, pointing at the presigned flow."""
+    log.warning("Upload rejected", error=message)
+    return json_response(413, {
+        "message": f"{message} Upload larger files with /upload-resume/initiate.",
+        "max_bytes": MAX_REQUEST_FILE_BYTES,
+        "upload_initiate_path": "/upload-resume/initiate"
+    })
+
+
+def upload_response(resume_id, status, deduplicated=False):
+    body = {
+        "message": "Resume uploaded and queued for processing.",
+        "resume_id": resume_id,
+        "status": status
+    }
+    if deduplicated:
+        body["message"] = "Identical resume already uploaded; reusing its analysis."
+        body["deduplicated"] = True
+    return json_response(200, body)
+
+
+def record_item(resume_id, s3_key, file_name, extra_attributes=None):
+    """The initial DynamoDB record of an uploaded resume."""
+    timestamp = str(int(time.time() * 1000)) # Store as string for DynamoDB 'N' type
+    item = {
+        'resume_id': {'S': resume_id},
+        's3_key': {'S': s3_key},
+        'status': {'S': 'processing'},
+        'upload_timestamp': {'N': timestamp},
+        'file_name': {'S': file_name}, # Store original filename
+        'version': {'N': '1'} # Bumped on every status change; the status endpoint's ETag
+    }
+    item.update(extra_attributes or {})
+    return item
+
+
+def mark_failed(resume_id, error_message):
+    """Fails a resume that will never be processed, bumping its version."""
+    dynamodb_client.update_item(
+        TableName=DYNAMODB_TABLE_NAME,
+        Key={'resume_id': {'S': resume_id}},
+        UpdateExpression="SET #st = :s, #err = :e ADD #v :one",
+        ExpressionAttributeNames={'#st': 'status', '#err': 'error_message', '#v': 'version'},
+        ExpressionAttributeValues={':s': {'S': 'failed'}, ':e': {'S': error_message}, ':one': {'N': '1'}}
+    )
+
+
+def create_record(resume_id, s3_key, file_name, extra_attributes=None):
     """
-    Handles resume upload via API Gateway.
-    Saves the file to S3, creates a DynamoDB record, and queues for processing.
+    Creates the initial DynamoDB record, once per resume_id.
+    Returns False if it already existed (e.g. a retried completion call).
+    """
+    item = record_item(resume_id, s3_key, file_name, extra_attributes)
+    try:
+        dynamodb_client.put_item(
+            TableName=DYNAMODB_TABLE_NAME,
+            Item=item,
+            ConditionExpression="attribute_not_exists(resume_id)"
+        )
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+            raise
+        log.info("DynamoDB record already exists", resume_id=resume_id)
+        return False
+    log.info("DynamoDB record created", resume_id=resume_id, status=item['status']['S'])
+    return True
+
+
+def message_body_for(resume_id, s3_key, content_sha256=None, file_bytes=None, analysis_s3_key=None):
+    """
+    The SQS message the process function consumes. When the file is at hand and small
+    enough, it travels in the message too (see message_payload) and S3 isn't read.
+    With an analysis copy, file_bytes are the copy's and the copy is what gets read.
     """
-    print(f"Received event: {json.dumps(event)}")
+    message_body = {
+        'resume_id': resume_id,
+        's3_bucket': S3_BUCKET_NAME,
+        's3_key': s3_key
+    }
+    if content_sha256:
+        message_body['content_sha256'] = content_sha256 # Key for the extraction cache
+    if analysis_s3_key:
+        message_body['analysis_s3_key'] = analysis_s3_key
+    if file_bytes is not None:
+        message_body.update(encode_file(file_bytes) or {})
+    return json.dumps(message_body)
 
-    # CORS Headers for API Gateway. Crucial for Next.js frontend.
-    headers = {
-        'Access-Control-Allow-Origin': '*',
-        'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-        'Access-Control-Allow-Methods': 'OPTIONS,POST',
-        'Content-Type': 'application/json'
+
+def enqueue(resume_id, s3_key, content_sha256=None, delay_seconds=0, file_bytes=None, analysis_s3_key=None):
+    """Queues the resume for processing."""
+    message = {
+        'QueueUrl': SQS_QUEUE_URL,
+        'MessageBody': message_body_for(resume_id, s3_key, content_sha256, file_bytes, analysis_s3_key)
     }
+    if delay_seconds:
+        message['DelaySeconds'] = delay_seconds
+    sqs_client.send_message(**message)
+    log.info(
+        "Message sent to SQS", resume_id=resume_id, delay_seconds=delay_seconds,
+        message_bytes=len(message['MessageBody'])
+    )
+
+
+def create_record_and_enqueue(resume_id, s3_key, file_name, content_sha256=None, delay_seconds=0, file_bytes=None):
+    """
+    Creates the initial DynamoDB record and queues the resume for processing.
+    Nothing is queued again if the record already existed; returns whether it was created.
+    If the message can't be sent the record is deleted again and the error re-raised,
+    so a retried call starts over instead of finding a record nothing will process.
+    """
+    created = False
+    try:
+        created = create_record(resume_id, s3_key, file_name)
+        if not created:
+            return False
+        enqueue(resume_id, s3_key, content_sha256, delay_seconds, file_bytes)
+    except (ClientError, BotoCoreError) as e:
+        # A timed-out put may still have written the record
+        roll_back_upload(resume_id, [], recorded=created or isinstance(e, BotoCoreError))
+        raise
+    return True
+
+
+def fast_path_allowed(context, file_type, size_bytes, page_count=None):
+    """
+    Whether to analyse this upload inline: the fast path is enabled, the document is
+    small (at most FAST_PATH_MAX_BYTES, and FAST_PATH_MAX_PAGES when the page count is
+    known), and enough of this invocation is left to wait out FAST_PATH_TIMEOUT_SECONDS
+    and still answer.
+    """
+    if not FAST_PATH_ENABLED or not PROCESS_FUNCTION_NAME or context is None:
+        return False
+    if size_bytes > FAST_PATH_MAX_BYTES:
+        return False
+    if file_type == 'pdf' and page_count is not None and page_count > FAST_PATH_MAX_PAGES:
+        return False
+    budget_ms = context.get_remaining_time_in_millis() - FAST_PATH_RESERVE_MS
+    return budget_ms >= FAST_PATH_TIMEOUT_SECONDS * 1000
+
+
+def analyse_inline(resume_id, s3_key, content_sha256=None, file_bytes=None, analysis_s3_key=None):
+    """
+    Runs the process function on one resume synchronously, with the same event an SQS
+    delivery would bring. Returns the record once it is completed or failed for good,
+    or None to answer 'processing' and leave the resume to the queue. A run that gave
+    the resume back is queued again right away rather than after the fallback delay.
+    """
+    event = {'Records': [{
+        'messageId': f"inline-{resume_id}",
+        'body': message_body_for(resume_id, s3_key, content_sha256, file_bytes, analysis_s3_key),
+        'attributes': {'ApproximateReceiveCount': '1'},
+        'eventSource': 'inline'
+    }]}
+    started = time.perf_counter()
+    try:
+        response = lambda_client.invoke(
+            FunctionName=PROCESS_FUNCTION_NAME,
+            InvocationType='RequestResponse',
+            Payload=json.dumps(event)
+        )
+        payload = json.loads(response['Payload'].read() or b'{}')
+        handed_back = 'FunctionError' in response or bool(payload.get('batchItemFailures'))
+    except BotoCoreError as e:
+        # Timed out waiting: the run may still finish; the delayed message covers it if not.
+        log.warning("Inline analysis timed out", resume_id=resume_id, error=str(e))
+        return None
+    except ClientError as e:
+        log.warning("Inline analysis could not start", resume_id=resume_id, error=str(e))
+        handed_back = True
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    if handed_back:
+        log.info("Inline analysis handed back to the queue", resume_id=resume_id, elapsed_ms=elapsed_ms)
+        try:
+            enqueue(resume_id, s3_key, content_sha256, file_bytes=file_bytes, analysis_s3_key=analysis_s3_key)
+        except (ClientError, BotoCoreError) as e:
+            # The delayed fallback message is already queued; the resume just starts later
+            log.warning("Could not queue resume again", resume_id=resume_id, error=str(e))
+        return None
+    item = dynamodb_client.get_item(
+        TableName=DYNAMODB_TABLE_NAME,
+        Key={'resume_id': {'S': resume_id}},
+        ConsistentRead=True
+    ).get('Item') or {}
+    status = item.get('status', {}).get('S')
+    log.info("Inline analysis finished", resume_id=resume_id, status=status, elapsed_ms=elapsed_ms)
+    return item if status in ('completed', 'failed') else None
+
+
+def inline_response(item):
+    """Upload response carrying the finished analysis, as the status endpoint would return it."""
+    resume_id = item['resume_id']['S']
+    if item['status']['S'] == 'failed':
+        return json_response(200, {
+            "message": "Resume could not be analysed.",
+            "resume_id": resume_id,
+            "status": "failed",
+            "error_message": item.get('error_message', {}).get('S')
+        })
+    analysis_results = item.get('analysis_results', {}).get('S')
+    return json_response(200, {
+        "message": "Resume analysed.",
+        "resume_id": resume_id,
+        "status": "completed",
+        "analysis_results": json.loads(analysis_results) if analysis_results else None
+    })
+
+
+def timed(timings, step, func, *args, **kwargs):
+    """Calls func, recording its duration in ms under timings[step] even if it raises."""
+    started = time.perf_counter()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        timings[step] = round((time.perf_counter() - started) * 1000, 1)
+
+
+def analysis_key_for(resume_id):
+    """S3 key of the compacted analysis copy of a PDF, next to the original."""
+    return f"{resume_id}.analysis.pdf"
+
+
+def timed_compaction(resume_id, pdf_bytes):
+    """compact_pdf, logging what it saved and what it cost."""
+    started = time.perf_counter()
+    compact = compact_pdf(pdf_bytes)
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+    if compact is None:
+        log.debug("PDF not compacted", resume_id=resume_id, size_bytes=len(pdf_bytes), elapsed_ms=elapsed_ms)
+        return None
+    log.info(
+        "PDF compacted", resume_id=resume_id, original_bytes=len(pdf_bytes), compact_bytes=len(compact),
+        saved_pct=round(100 * (1 - len(compact) / len(pdf_bytes)), 1), elapsed_ms=elapsed_ms
+    )
+    return compact
+
+
+def roll_back_upload(resume_id, stored_keys, recorded):
+    """
+    Undoes whichever side effects of a failed upload went through, so nothing is left
+    behind that no message will ever process. Best effort: errors are only logged.
+    """
+    for s3_key in stored_keys:
+        try:
+            s3_client.delete_object(Bucket=S3_BUCKET_NAME, Key=s3_key)
+        except (ClientError, BotoCoreError) as e:
+            log.error("Could not delete orphaned upload", s3_key=s3_key, error=str(e))
+    if recorded:
+        try:
+            dynamodb_client.delete_item(
+                TableName=DYNAMODB_TABLE_NAME,
+                Key={'resume_id': {'S': resume_id}},
+                ConditionExpression="#st = :processing",
+                ExpressionAttributeNames={'#st': 'status'},
+                ExpressionAttributeValues={':processing': {'S': 'processing'}}
+            )
+        except (ClientError, BotoCoreError) as e:
+            log.error("Could not delete orphaned record", resume_id=resume_id, error=str(e))
+    log.info("Rolled back upload", resume_id=resume_id, deleted_objects=list(stored_keys), deleted_record=recorded)
+
+
+def store_record_and_enqueue(resume_id, s3_key, file_name, file_bytes, content_type, content_sha256,
+                             delay_seconds=0, analysis_copy=None):
+    """
+    Saves the file to S3 and creates the DynamoDB record in parallel, then queues the
+    resume once both have succeeded; nothing reads the record before the message is
+    sent, so the order of the first two doesn't matter. A compacted analysis copy, if
+    given, is saved alongside and is what the message points the process function at.
+    If any step fails the others are rolled back and the error is re-raised. Logs each
+    step's duration.
+    """
+    timings = {}
+    started = time.perf_counter()
+    s3_futures = {s3_key: side_effect_executor.submit(
+        timed, timings, 's3_put_ms', s3_client.put_object,
+        Bucket=S3_BUCKET_NAME, Key=s3_key, Body=file_bytes, ContentType=content_type
+    )}
+    analysis_s3_key, extra_attributes = None, None
+    if analysis_copy is not None:
+        analysis_s3_key = analysis_key_for(resume_id)
+        extra_attributes = {'analysis_s3_key': {'S': analysis_s3_key}}
+        s3_futures[analysis_s3_key] = side_effect_executor.submit(
+            timed, timings, 's3_put_analysis_copy_ms', s3_client.put_object,
+            Bucket=S3_BUCKET_NAME, Key=analysis_s3_key, Body=analysis_copy, ContentType=PDF_CONTENT_TYPE
+        )
+    record_future = side_effect_executor.submit(
+        timed, timings, 'dynamodb_put_ms', create_record, resume_id, s3_key, file_name, extra_attributes
+    )
+    # Wait for all before deciding anything, so a rollback sees every completed write.
+    s3_errors = {key: future.exception() for key, future in s3_futures.items()}
+    record_error = record_future.exception()
+    stored_keys = [key for key, error in s3_errors.items() if error is None]
+    try:
+        first_error = next((error for error in s3_errors.values() if error), record_error)
+        if first_error:
+            raise first_error
+        timed(
+            timings, 'sqs_send_ms', enqueue, resume_id, s3_key, content_sha256, delay_seconds,
+            analysis_copy if analysis_copy is not None else file_bytes, analysis_s3_key
+        )
+    except Exception:
+        roll_back_upload(resume_id, stored_keys, recorded=record_error is None)
+        raise
+    finally:
+        timings['total_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        log.info("Upload side effects", resume_id=resume_id, size_bytes=len(file_bytes), **timings)
+
+
+def usable_analysis(item):
+    """True for a completed record whose analysis isn't an error from the model call."""
+    if not item or item.get('status', {}).get('S') != 'completed':
+        return False
+    try:
+        analysis = json.loads(item.get('analysis_results', {}).get('S', '{}'))
+    except ValueError:
+        return False
+    return isinstance(analysis, dict) and 'error' not in analysis
+
+
+def reuse_existing_job(resume_id, s3_key, file_name, content_sha256):
+    """
+    Single-flight by content. Looks the file's hash up in the content index:
+      * no live job for it - this upload claims the hash; returns None and the
+        caller stores and queues the file as usual;
+      * a job in flight    - creates this resume's record and attaches it as a
+        waiter, so the process function copies the result over when it finishes;
+      * a completed job    - creates this resume's record already holding the
+        analysis.
+    Either reuse skips the S3 write, SQS and Bedrock; the record points at the
+    original upload's S3 object. Returns the response to send in those cases.
+    """
+    if content_index is None:
+        return None
+    existing = content_index.claim(content_sha256, resume_id, s3_key)
+    if existing is None:
+        return None
+    canonical_id, canonical_s3_key = existing['resume_id'], existing['s3_key']
+    duplicate_of = {'duplicate_of': {'S': canonical_id}}
+
+    if existing['status'] == 'processing':
+        create_record(resume_id, canonical_s3_key, file_name, duplicate_of)
+        if content_index.attach_waiter(content_sha256, resume_id):
+            log.info("Attached upload to in-flight job", resume_id=resume_id, duplicate_of=canonical_id)
+            return upload_response(resume_id, 'processing', deduplicated=True)
+        # It finished between the claim and the attach; reuse the result below.
+
+    canonical = dynamodb_client.get_item(
+        TableName=DYNAMODB_TABLE_NAME,
+        Key={'resume_id': {'S': canonical_id}},
+        ConsistentRead=True
+    ).get('Item')
+    if usable_analysis(canonical):
+        item = {
+            'resume_id': {'S': resume_id},
+            's3_key': {'S': canonical_s3_key},
+            'status': {'S': 'completed'},
+            'upload_timestamp': {'N': str(int(time.time() * 1000))},
+            'file_name': {'S': file_name},
+            'version': {'N': '1'},
+            **duplicate_of,
+            **{name: canonical[name] for name in ANALYSIS_ATTRIBUTES if name in canonical}
+        }
+        dynamodb_client.put_item(TableName=DYNAMODB_TABLE_NAME, Item=item)
+        log.info("Reused completed analysis", resume_id=resume_id, duplicate_of=canonical_id)
+        return upload_response(resume_id, 'completed', deduplicated=True)
+
+    # The original job failed after all, completed with an error, or its record is
+    # gone: analyse this upload on its own, from the identical object already in S3.
+    log.info("Previous job for identical file unusable, processing again", resume_id=resume_id, duplicate_of=canonical_id)
+    create_record(resume_id, canonical_s3_key, file_name)
+    enqueue(resume_id, canonical_s3_key, content_sha256)
+    return upload_response(resume_id, 'processing')
+
+
+def abandon_claim(resume_id, content_sha256, error_message):
+    """
+    Called when an upload that claimed a hash fails before its job is queued: marks the
+    hash failed (so the next identical upload claims it) and fails anything attached.
+    """
+    if content_index is None:
+        return
+    try:
+        for waiter_id in content_index.resolve(content_sha256, resume_id, 'failed'):
+            mark_failed(waiter_id, error_message)
+    except (ClientError, BotoCoreError) as e:
+        # The claim's lease then runs out instead
+        log.error("Could not release content hash claim", resume_id=resume_id, error=str(e))
+
+
+def validate_upload_request(file_name, content_type, file_size):
+    """Returns (file_extension, None) for an acceptable file, or (None, (status_code, message))."""
+    file_extension = file_extension_for(file_name, content_type)
+    if file_extension not in UPLOAD_CONTENT_TYPES:
+        return None, (400, "Only PDF and DOCX resumes are supported.")
+    if isinstance(file_size, int) and not 0 < file_size <= MAX_UPLOAD_BYTES:
+        return None, (413, f"File must be between 1 and {MAX_UPLOAD_BYTES} bytes.")
+    return file_extension, None
+
+
+def presigned_upload(s3_key, file_name, file_extension):
+    """A presigned POST for s3_key that only accepts the declared type, up to MAX_UPLOAD_BYTES."""
+    content_type = UPLOAD_CONTENT_TYPES[file_extension]
+    # S3 metadata must be ASCII, so the original name is stored URL-encoded
+    encoded_file_name = quote(file_name)
+    return s3_client.generate_presigned_post(
+        Bucket=S3_BUCKET_NAME,
+        Key=s3_key,
+        Fields={
+            'Content-Type': content_type,
+            'x-amz-meta-file-name': encoded_file_name
+        },
+        Conditions=[
+            {'Content-Type': content_type},
+            {'x-amz-meta-file-name': encoded_file_name},
+            ['content-length-range', 1, MAX_UPLOAD_BYTES]
+        ],
+        ExpiresIn=UPLOAD_URL_EXPIRES_SECONDS
+    )
+
+
+def initiate_upload(body_data):
+    """
+    Step 1 of a direct-to-S3 upload: reserves a resume_id and returns a presigned POST
+    that only accepts a file of the declared type and at most MAX_UPLOAD_BYTES.
+    The file itself never passes through Lambda.
+    """
+    file_name = body_data.get('file_name', 'resume_upload') # Default filename
+    content_type = body_data.get('content_type', 'application/octet-stream')
+    file_size = body_data.get('file_size')
+
+    file_extension, error = validate_upload_request(file_name, content_type, file_size)
+    if error:
+        return json_response(error[0], {"message": error[1]})
+
+    resume_id = str(uuid.uuid4())
+    s3_key = f"{resume_id}.{file_extension}"
+    presigned_post = presigned_upload(s3_key, file_name, file_extension)
+    log.info("Presigned upload issued", resume_id=resume_id, s3_key=s3_key)
+    return json_response(200, {
+        "resume_id": resume_id,
+        "s3_key": s3_key,
+        "upload_url": presigned_post['url'],
+        "upload_fields": presigned_post['fields'],
+        "expires_in": UPLOAD_URL_EXPIRES_SECONDS
+    })
+
+
+def complete_upload(body_data, context=None):
+    """
+    Step 2 of a direct-to-S3 upload: checks the object arrived, then creates the
+    DynamoDB record and queues it like a regular upload.
+    """
+    resume_id = body_data.get('resume_id', '')
+    s3_key = body_data.get('s3_key', '')
+    try:
+        uuid.UUID(resume_id)
+    except ValueError:
+        return json_response(400, {"message": "Invalid resume_id."})
+    # Only keys issued by initiate_upload are accepted
+    if s3_key not in {f"{resume_id}.{ext}" for ext in UPLOAD_CONTENT_TYPES}:
+        return json_response(400, {"message": "Invalid s3_key."})
+
+    try:
+        # Only the head of the file, for the preflight sniff; the metadata comes with it
+        s3_object = s3_client.get_object(Bucket=S3_BUCKET_NAME, Key=s3_key, Range=f"bytes=0-{preflight.SNIFF_BYTES - 1}")
+    except ClientError as e:
+        # S3 answers 403 rather than 404 when the role can't list the bucket
+        if e.response.get('Error', {}).get('Code') in ('404', '403', 'NoSuchKey'):
+            return json_response(409, {"message": "File has not been uploaded yet."})
+        raise
+    file_name = unquote(s3_object.get('Metadata', {}).get('file-name', 'resume_upload'))
+
+    head = s3_object['Body'].read()
+    result = preflight.sniff(head)
+    if result.reason is None and s3_key.rsplit('.', 1)[-1] != result.file_type:
+        result = preflight.rejected('type_mismatch', f"File content is {result.file_type.upper()}, not the declared type.")
+    if result.reason:
+        s3_client.delete_object(Bucket=S3_BUCKET_NAME, Key=s3_key)
+        return preflight_rejection(result, 'presigned', declared_type=s3_key.rsplit('.', 1)[-1])
+
+    # "bytes 0-65535/<total size>"
+    content_range = s3_object.get('ContentRange')
+    size_bytes = int(content_range.rsplit('/', 1)[-1]) if content_range else s3_object.get('ContentLength', 0)
+    inline = fast_path_allowed(context, result.file_type, size_bytes)
+    # A file no bigger than the sniffed range is already here in full
+    file_bytes = head if len(head) == size_bytes else None
+
+    # No content_sha256 here: the hash would mean reading the file, and a client-supplied
+    # one can't be trusted as a cache key. The process function hashes it after download.
+    created = create_record_and_enqueue(
+        resume_id, s3_key, file_name, delay_seconds=FAST_PATH_QUEUE_DELAY_SECONDS if inline else 0,
+        file_bytes=file_bytes
+    )
+    if inline and created:
+        item = analyse_inline(resume_id, s3_key, file_bytes=file_bytes)
+        if item:
+            return inline_response(item)
+    return json_response(200, {
+        "message": "Resume uploaded and queued for processing.",
+        "resume_id": resume_id,
+        "status": "processing"
+    })
+
+
+def batch_prefix(batch_id):
+    return f"batches/{batch_id}/"
+
+
+def initiate_batch(body_data):
+    """
+    Step 1 of a bulk upload: {"files": [{"file_name", "content_type", "file_size"}, ...]}
+    (up to MAX_BATCH_FILES). Reserves a batch_id and a resume_id per file, and returns a
+    presigned POST for each, all under the batch's own S3 prefix.
+    """
+    files = body_data.get('files')
+    if not isinstance(files, list) or not 0 < len(files) <= MAX_BATCH_FILES:
+        return json_response(400, {"message": f"'files' must list 1 to {MAX_BATCH_FILES} files."})
+    errors = []
+    extensions = []
+    for index, file_info in enumerate(files):
+        file_extension, error = validate_upload_request(
+            str(file_info.get('file_name', 'resume_upload')),
+            str(file_info.get('content_type', 'application/octet-stream')),
+            file_info.get('file_size')
+        ) if isinstance(file_info, dict) else (None, (400, "Expected an object."))
+        if error:
+            errors.append({"index": index, "message": error[1]})
+        extensions.append(file_extension)
+    if errors:
+        return json_response(400, {"message": "Some files can't be uploaded.", "errors": errors})
+
+    batch_id = str(uuid.uuid4())
+    now = int(time.time())
+    batch_files = []
+    uploads = []
+    for file_info, file_extension in zip(files, extensions):
+        resume_id = str(uuid.uuid4())
+        file_name = str(file_info.get('file_name', 'resume_upload'))
+        s3_key = f"{batch_prefix(batch_id)}{resume_id}.{file_extension}"
+        presigned_post = presigned_upload(s3_key, file_name, file_extension)
+        batch_files.append({'M': {
+            'resume_id': {'S': resume_id},
+            's3_key': {'S': s3_key},
+            'file_name': {'S': file_name}
+        }})
+        uploads.append({
+            "resume_id": resume_id,
+            "file_name": file_name,
+            "s3_key": s3_key,
+            "upload_url": presigned_post['url'],
+            "upload_fields": presigned_post['fields']
+        })
+
+    dynamodb_client.put_item(
+        TableName=BATCH_TABLE_NAME,
+        Item={
+            'batch_id': {'S': batch_id},
+            'status': {'S': 'uploading'},
+            'file_count': {'N': str(len(batch_files))},
+            'files': {'L': batch_files},
+            'created_at': {'N': str(now)},
+            'expires_at': {'N': str(now + BATCH_TTL_SECONDS)}
+        }
+    )
+    log.info("Batch upload issued", batch_id=batch_id, file_count=len(batch_files))
+    return json_response(200, {
+        "batch_id": batch_id,
+        "expires_in": UPLOAD_URL_EXPIRES_SECONDS,
+        "files": uploads
+    })
+
+
+def uploaded_keys(prefix):
+    """Keys under prefix, from one ListObjectsV2 page per 1000 objects."""
+    keys = set()
+    for page in s3_client.get_paginator('list_objects_v2').paginate(Bucket=S3_BUCKET_NAME, Prefix=prefix):
+        keys.update(obj['Key'] for obj in page.get('Contents', []))
+    return keys
+
+
+def set_batch_status(batch_id, status, expected_status, extra_attributes=None):
+    """Moves the batch from expected_status to status; returns False if it wasn't in expected_status."""
+    names = {'#st': 'status'}
+    values = {':status': {'S': status}, ':expected': {'S': expected_status}}
+    assignments = ["#st = :status"]
+    for name, value in (extra_attributes or {}).items():
+        names[f"#{name}"] = name
+        values[f":{name}"] = value
+        assignments.append(f"#{name} = :{name}")
+    try:
+        dynamodb_client.update_item(
+            TableName=BATCH_TABLE_NAME,
+            Key={'batch_id': {'S': batch_id}},
+            UpdateExpression="SET " + ", ".join(assignments),
+            ConditionExpression="#st = :expected",
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values
+        )
+        return True
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+            raise
+        return False
+
+
+def complete_batch(body_data):
+    """
+    Step 2 of a bulk upload, once the client has posted its files: lists what arrived
+    under the batch prefix, writes every record with BatchWriteItem and queues the
+    uploaded ones with SendMessageBatch. Files that never arrived get a failed record,
+    so the batch status accounts for every file. Runs once per batch, or again after
+    a call that failed part way.
+    """
+    batch_id = body_data.get('batch_id', '')
+    try:
+        uuid.UUID(batch_id)
+    except ValueError:
+        return json_response(400, {"message": "Invalid batch_id."})
+
+    batch = dynamodb_client.get_item(
+        TableName=BATCH_TABLE_NAME,
+        Key={'batch_id': {'S': batch_id}},
+        ConsistentRead=True
+    ).get('Item')
+    if not batch:
+        return json_response(404, {"message": "Batch not found."})
+    # The status moves uploading -> queueing -> queued; only one call gets past here.
+    if not set_batch_status(batch_id, 'queueing', 'uploading'):
+        return json_response(409, {
+            "message": "Batch has already been completed.",
+            "batch_id": batch_id,
+            "status": batch['status']['S']
+        })
+
+    try:
+        files = [entry['M'] for entry in batch['files']['L']]
+        arrived = uploaded_keys(batch_prefix(batch_id))
+        # After a failed call some records already exist, and may have moved on. Only
+        # missing records are written: a finished resume is left alone rather than reset
+        # to processing, and one still processing just gets its message again (the
+        # process function's claim drops a duplicate delivery).
+        existing = {
+            item['resume_id']['S']: item.get('status', {}).get('S')
+            for item in batch_get_items(
+                dynamodb_client, DYNAMODB_TABLE_NAME,
+                [{'resume_id': entry['resume_id']} for entry in files],
+                projection="resume_id, #st", expression_attribute_names={'#st': 'status'}
+            )
+        }
+        batch_attribute = {'batch_id': {'S': batch_id}}
+        items, queued, missing, finished = [], [], [], []
+        for entry in files:
+            resume_id, s3_key, file_name = entry['resume_id']['S'], entry['s3_key']['S'], entry['file_name']['S']
+            status = existing.get(resume_id)
+            if status in ('completed', 'failed'):
+                finished.append(resume_id)
+                continue
+            item = record_item(resume_id, s3_key, file_name, batch_attribute)
+            if s3_key in arrived:
+                queued.append((resume_id, s3_key))
+            else:
+                item['status'] = {'S': 'failed'}
+                item['error_message'] = {'S': "File was not uploaded."}
+                missing.append(resume_id)
+            if status is None:
+                items.append(item)
+
+        batch_write_items(dynamodb_client, DYNAMODB_TABLE_NAME, items)
+        unsent = send_message_batches(
+            sqs_client, SQS_QUEUE_URL, [message_body_for(resume_id, s3_key) for resume_id, s3_key in queued]
+        )
+        not_queued = [queued[index][0] for index in unsent]
+        for resume_id in not_queued:
+            mark_failed(resume_id, "Could not be queued for processing.")
+    except Exception:
+        # Let the client retry the whole completion; the retry skips records already
+        # written and resends only the messages of resumes still processing.
+        set_batch_status(batch_id, 'uploading', 'queueing')
+        raise
+
+    queued_count = len(queued) - len(not_queued)
+    set_batch_status(batch_id, 'queued', 'queueing', {'queued_count': {'N': str(queued_count)}})
+    log.info(
+        "Batch queued", batch_id=batch_id, file_count=len(files), queued=queued_count,
+        missing=len(missing), not_queued=len(not_queued), already_finished=len(finished)
+    )
+    return json_response(200, {
+        "message": "Batch queued for processing.",
+        "batch_id": batch_id,
+        "status": "queued",
+        "queued": queued_count,
+        "missing": missing,
+        "not_queued": not_queued,
+        "already_finished": finished
+    })
+
+
+def request_header(event, name):
+    """Case-insensitive header lookup; API Gateway passes headers as the client sent them."""
+    for key, value in (event.get('headers') or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def store_streamed_upload(reader, file_name, content_type):
+    """
+    Streams a file body into S3 while hashing it, then records and queues it.
+    Used for raw binary and multipart bodies, where the file is never held as one
+    bytes object.
+    """
+    hashing_reader = HashingReader(reader, MAX_REQUEST_FILE_BYTES)
+    try:
+        # Only the head is sniffed: the body is never held whole, so the PDF/DOCX probe is skipped.
+        head = read_head(hashing_reader, preflight.SNIFF_BYTES)
+        if not head:
+            return json_response(400, {"message": "No file content provided."})
+        result = preflight.sniff(head)
+        if result.reason:
+            return preflight_rejection(result, 'streamed', declared_type=content_type, size_bytes=len(head))
+        file_extension = result.file_type
+
+        resume_id = str(uuid.uuid4())
+        s3_key = f"{resume_id}.{file_extension}"
+        s3_client.upload_fileobj(
+            PrefixedReader(head, hashing_reader),
+            S3_BUCKET_NAME,
+            s3_key,
+            ExtraArgs={'ContentType': UPLOAD_CONTENT_TYPES[file_extension]},
+            Config=STREAM_TRANSFER_CONFIG
+        )
+    except BodyTooLarge as e:
+        return too_large_response(str(e))
+    log.info("Resume streamed to S3", s3_bucket=S3_BUCKET_NAME, s3_key=s3_key, size_bytes=hashing_reader.size)
+
+    content_sha256 = hashing_reader.hexdigest()
+    # The hash is only known once the stream has been read, so a duplicate's copy is removed afterwards.
+    reused = reuse_existing_job(resume_id, s3_key, file_name, content_sha256)
+    if reused is not None:
+        try:
+            s3_client.delete_object(Bucket=S3_BUCKET_NAME, Key=s3_key)
+        except (ClientError, BotoCoreError) as e:
+            # The resume is already answered from the original; only a stray object is left
+            log.error("Could not delete duplicate upload", s3_key=s3_key, error=str(e))
+        return reused
+    # A body that fit in the sniffed head is at hand in full and can ride in the message
+    file_bytes = head if hashing_reader.size == len(head) else None
+    try:
+        create_record_and_enqueue(resume_id, s3_key, file_name, content_sha256=content_sha256, file_bytes=file_bytes)
+    except (ClientError, BotoCoreError) as e:
+        roll_back_upload(resume_id, [s3_key], recorded=False) # the record is already rolled back
+        abandon_claim(resume_id, content_sha256, str(e))
+        raise
+    return upload_response(resume_id, 'processing')
+
+
+def binary_upload(event, content_type):
+    """
+    Raw application/pdf or DOCX body. Needs the type listed in the API's binary media
+    types, so API Gateway hands it over base64-encoded instead of mangling it as text.
+    The file name comes from the X-File-Name header (URL-encoded) or ?file_name=.
+    """
+    if not event.get('isBase64Encoded'):
+        return json_response(415, {"message": "Binary body was not passed through as binary."})
+    file_name = unquote(
+        request_header(event, 'x-file-name')
+        or (event.get('queryStringParameters') or {}).get('file_name')
+        or 'resume_upload'
+    )
+    return store_streamed_upload(Base64Reader(event.get('body') or ''), file_name, content_type)
+
+
+def multipart_upload(event, content_type):
+    """multipart/form-data body: the first part with a filename is streamed to S3."""
+    body = event.get('body') or ''
+    reader = Base64Reader(body) if event.get('isBase64Encoded') else io.BytesIO(body.encode('utf-8'))
+    fields, file_name, part_content_type, file_reader = open_multipart_file(reader, content_type)
+    file_name = fields.get('file_name') or file_name or 'resume_upload'
+    return store_streamed_upload(file_reader, file_name, fields.get('content_type') or part_content_type)
+
+
+def lambda_handler(event, context):
+    """
+    Handles resume upload via API Gateway.
+    /upload-resume/initiate and /upload-resume/complete implement the presigned
+    direct-to-S3 flow; /upload-resume/batch/initiate and /batch/complete do the same
+    for up to MAX_BATCH_FILES files at once. /upload-resume accepts a raw PDF/DOCX
+    body, multipart/form-data, or the whole file as base64 JSON.
+    Saves the file to S3, creates a DynamoDB record, and queues for processing; small
+    resumes may instead be analysed inline when the fast path is enabled.
+    """
+    # The body is the file itself; only its size is logged.
+    start_invocation()
+    log.info("Received event", **event_summary(event))
+    headers = CORS_HEADERS
 
     # Handle CORS preflight request
     if event['httpMethod'] == 'OPTIONS':
@@ -40,6 +945,22 @@ def lambda_handler(event, context):
         }
 
     try:
+        resource = event.get('resource') or ''
+        if resource.endswith('/batch/initiate'):
+            return initiate_batch(json.loads(event.get('body') or '{}'))
+        if resource.endswith('/batch/complete'):
+            return complete_batch(json.loads(event.get('body') or '{}'))
+        if resource.endswith('/initiate'):
+            return initiate_upload(json.loads(event.get('body') or '{}'))
+        if resource.endswith('/complete'):
+            return complete_upload(json.loads(event.get('body') or '{}'), context)
+
+        request_content_type = (request_header(event, 'content-type') or '').split(';')[0].strip().lower()
+        if request_content_type == 'multipart/form-data':
+            return multipart_upload(event, request_header(event, 'content-type'))
+        if request_content_type in UPLOAD_CONTENT_TYPES.values():
+            return binary_upload(event, request_content_type)
+
         # The Next.js frontend (or its API route) typically sends file as base64 in a JSON body.
         # Or, API Gateway can be configured for binary handling which passes raw bytes.
         # This code assumes JSON with a base64 encoded file.
@@ -56,53 +977,53 @@ def lambda_handler(event, context):
             }
 
         file_content_bytes = base64.b64decode(file_content_base64)
-        
-        # Determine file extension
-        file_extension = 'txt' # Default
-        if 'application/pdf' in content_type:
-            file_extension = 'pdf'
-        elif 'application/vnd.openxmlformats-officedocument.wordprocessingml.document' in content_type or file_name.lower().endswith('.docx'):
-            file_extension = 'docx'
-        elif file_name.lower().endswith('.pdf'):
-             file_extension = 'pdf' # Fallback for names if content-type is generic
-        
+        if len(file_content_bytes) > MAX_REQUEST_FILE_BYTES:
+            return too_large_response(f"File is larger than {MAX_REQUEST_FILE_BYTES} bytes.")
+
+        # Determine file extension from the content itself, and turn away files that can't be analysed
+        result = preflight.check(file_content_bytes)
+        if result.reason:
+            return preflight_rejection(result, 'base64', declared_type=content_type, size_bytes=len(file_content_bytes))
+        log.info(
+            "Preflight passed", file_type=result.file_type, declared_type=content_type,
+            page_count=result.page_count, text_chars=result.text_chars
+        )
+        file_extension = result.file_type
+        content_type = UPLOAD_CONTENT_TYPES[file_extension]
+
         resume_id = str(uuid.uuid4())
         s3_key = f"{resume_id}.{file_extension}"
 
-        # 1. Save file to S3
-        s3_client.put_object(
-            Bucket=S3_BUCKET_NAME,
-            Key=s3_key,
-            Body=file_content_bytes,
-            ContentType=content_type
-        )
-        print(f"Resume {s3_key} saved to S3 bucket {S3_BUCKET_NAME}")
+        # Reuse the job for an identical file, if there is one
+        content_sha256 = hashlib.sha256(file_content_bytes).hexdigest()
+        reused = reuse_existing_job(resume_id, s3_key, file_name, content_sha256)
+        if reused is not None:
+            return reused
 
-        # 2. Create initial DynamoDB record
-        timestamp = str(int(time.time() * 1000)) # Store as string for DynamoDB 'N' type
-        dynamodb_client.put_item(
-            TableName=DYNAMODB_TABLE_NAME,
-            Item={
-                'resume_id': {'S': resume_id},
-                's3_key': {'S': s3_key},
-                'status': {'S': 'processing'},
-                'upload_timestamp': {'N': timestamp},
-                'file_name': {'S': file_name} # Store original filename
-            }
-        )
-        print(f"DynamoDB record created for resume_id: {resume_id}")
+        # Large designer-exported PDFs get a lighter copy for analysis; see pdf_compaction
+        analysis_copy = None
+        if PDF_COMPACTION_ENABLED and file_extension == 'pdf':
+            analysis_copy = timed_compaction(resume_id, file_content_bytes)
 
-        # 3. Queue message to SQS for asynchronous processing
-        message_body = {
-            'resume_id': resume_id,
-            's3_bucket': S3_BUCKET_NAME,
-            's3_key': s3_key
-        }
-        sqs_client.send_message(
-            QueueUrl=SQS_QUEUE_URL,
-            MessageBody=json.dumps(message_body)
-        )
-        print(f"Message sent to SQS for resume_id: {resume_id}")
+        # Small resumes may be analysed right here; see fast_path_allowed
+        inline = fast_path_allowed(context, file_extension, len(file_content_bytes), result.page_count)
+        try:
+            # Save file to S3 and create the DynamoDB record, then queue for asynchronous processing
+            store_record_and_enqueue(
+                resume_id, s3_key, file_name, file_content_bytes, content_type, content_sha256,
+                delay_seconds=FAST_PATH_QUEUE_DELAY_SECONDS if inline else 0, analysis_copy=analysis_copy
+            )
+        except (ClientError, BotoCoreError) as e:
+            abandon_claim(resume_id, content_sha256, str(e))
+            raise
+        if inline:
+            item = analyse_inline(
+                resume_id, s3_key, content_sha256,
+                analysis_copy if analysis_copy is not None else file_content_bytes,
+                analysis_key_for(resume_id) if analysis_copy is not None else None
+            )
+            if item:
+                return inline_response(item)
 
         return {
             'statusCode': 200,
@@ -114,22 +1035,28 @@ def lambda_handler(event, context):
             })
         }
 
+    except BodyTooLarge as e:
+        log.warning("Upload rejected", error=str(e))
+        return json_response(413, {"message": str(e)})
+    except MalformedBody as e:
+        log.warning("Malformed upload body", error=str(e))
+        return json_response(400, {"message": str(e)})
     except ClientError as e:
-        print(f"AWS Client Error: {e}")
+        log.error("AWS Client Error", error=str(e))
         return {
             'statusCode': 500,
             'headers': headers,
             'body': json.dumps({"message": f"AWS Service Error: {str(e)}"})
         }
     except json.JSONDecodeError:
-        print("Invalid JSON in request body.")
+        log.warning("Invalid JSON in request body")
         return {
             'statusCode': 400,
             'headers': headers,
             'body': json.dumps({"message": "Invalid JSON format in request body."})
         }
     except Exception as e:
-        print(f"Unexpected error: {e}")
+        log.exception("Unexpected error", error=str(e))
         return {
             'statusCode': 500,
             'headers': headers,
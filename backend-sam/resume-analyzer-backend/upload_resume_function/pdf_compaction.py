@@ -0,0 +1,76 @@
+"""
+Upload-time compaction of PDFs into an "analysis copy": the same text layer without
+what analysis never uses. Resumes exported from Canva or Word often carry megabytes
+of embedded images and full font programs that would otherwise be stored, downloaded
+and parsed again on every (re)process.
+
+With PyMuPDF's own save options:
+  * every image is replaced by an empty placeholder (text extraction ignores them);
+  * embedded fonts are subset to the glyphs actually used;
+  * unused and duplicate objects are dropped (garbage=4) and streams deflated.
+
+The copy is only kept if it is meaningfully smaller and extracts to exactly the same
+text as the original; otherwise None is returned and the original is analysed.
+"""
+import os
+
+try:
+    import fitz # PyMuPDF
+except ImportError:
+    fitz = None
+
+from structured_logger import get_logger
+
+log = get_logger(__name__)
+
+# Smaller PDFs aren't worth the CPU: there is little to save.
+PDF_COMPACTION_MIN_BYTES = int(os.environ.get('PDF_COMPACTION_MIN_BYTES', str(200 * 1024)))
+# Fraction of the original that must be saved for the copy to be kept.
+PDF_COMPACTION_MIN_SAVING = float(os.environ.get('PDF_COMPACTION_MIN_SAVING', '0.2'))
+
+
+def _page_texts(doc):
+    return [page.get_text() for page in doc]
+
+
+def compact_pdf(pdf_bytes):
+    """Returns the compacted PDF bytes, or None when no worthwhile, faithful copy results."""
+    if fitz is None or len(pdf_bytes) < PDF_COMPACTION_MIN_BYTES:
+        return None
+    try:
+        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    except Exception as e:
+        log.info("PDF not compacted: could not be opened", error=str(e))
+        return None
+    try:
+        original_texts = _page_texts(doc)
+        for page in doc:
+            for image in page.get_images(full=True):
+                try:
+                    page.delete_image(image[0])
+                except Exception:
+                    pass # e.g. an image shared through a form XObject already replaced
+        try:
+            doc.subset_fonts()
+        except Exception as e:
+            # Older MuPDF builds can't subset every font type; the rest still applies.
+            log.info("Font subsetting skipped", error=str(e))
+        compact = doc.tobytes(garbage=4, deflate=True, deflate_images=True, deflate_fonts=True, clean=True)
+    except Exception as e:
+        log.warning("PDF compaction failed", error=str(e))
+        return None
+    finally:
+        doc.close()
+
+    if len(compact) > len(pdf_bytes) * (1 - PDF_COMPACTION_MIN_SAVING):
+        return None
+    try:
+        with fitz.open(stream=compact, filetype="pdf") as compact_doc:
+            compact_texts = _page_texts(compact_doc)
+    except Exception as e:
+        log.warning("PDF compaction produced an unreadable copy; keeping the original", error=str(e))
+        return None
+    if compact_texts != original_texts:
+        log.warning("PDF compaction changed the text layer; keeping the original")
+        return None
+    return compact
@@ -0,0 +1,122 @@
+"""
+Upload preflight: decides from the file's own bytes whether it can be analysed, before
+anything is written to S3, DynamoDB or SQS.
+
+  * sniff() looks only at the first bytes (magic numbers), so it also works on the
+    head of a streamed body;
+  * check() additionally opens the whole file: PDFs with PyMuPDF (encryption, page
+    count, text layer on the first pages) and DOCX archives with zipfile.
+
+The type found replaces the declared content type / file name extension, so a PDF
+sent as application/octet-stream is still processed as a PDF.
+"""
+import io
+import os
+import zipfile
+from collections import namedtuple
+
+try:
+    import fitz # PyMuPDF
+except ImportError:
+    fitz = None
+
+# Leading bytes read for sniffing; also what streamed uploads hold back before sending.
+SNIFF_BYTES = 64 * 1024
+# The PDF header may follow some junk, but must be within the first 1024 bytes.
+PDF_HEADER_WINDOW = 1024
+PREFLIGHT_MAX_PAGES = int(os.environ.get('PREFLIGHT_MAX_PAGES', '30'))
+# Pages looked at for a text layer, and the fewest characters that count as one.
+PREFLIGHT_TEXT_PAGES = 2
+PREFLIGHT_MIN_TEXT_CHARS = int(os.environ.get('PREFLIGHT_MIN_TEXT_CHARS', '50'))
+
+ZIP_MAGIC = b"PK\x03\x04"
+# Compound File Binary: legacy .doc, and any password-protected Office document
+CFB_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+
+# file_type: 'pdf' or 'docx' when accepted.
+# reason: None when accepted, otherwise a short code counted in the logs.
+# page_count / text_chars: only known after a full PDF check.
+Preflight = namedtuple('Preflight', ['file_type', 'reason', 'message', 'page_count', 'text_chars'])
+
+# reason -> HTTP status of the rejection
+REJECTION_STATUS = {
+    'unsupported_type': 415,
+    'type_mismatch': 415,
+    'legacy_or_protected_office': 415,
+    'docx_without_document': 422,
+    'corrupt': 422,
+    'encrypted_pdf': 422,
+    'empty_pdf': 422,
+    'too_many_pages': 422,
+    'no_text_layer': 422,
+}
+
+
+def accepted(file_type, page_count=None, text_chars=None):
+    return Preflight(file_type, None, None, page_count, text_chars)
+
+
+def rejected(reason, message):
+    return Preflight(None, reason, message, None, None)
+
+
+def sniff(head):
+    """Classifies a file from its first bytes (up to SNIFF_BYTES)."""
+    if b"%PDF-" in head[:PDF_HEADER_WINDOW]:
+        return accepted('pdf')
+    if head.startswith(ZIP_MAGIC):
+        # Local file headers carry the entry names and Word writes word/ entries early,
+        # but a head cut off at SNIFF_BYTES can't rule them out.
+        if b"word/" in head or len(head) >= SNIFF_BYTES:
+            return accepted('docx')
+        return rejected('docx_without_document', "Zip archive is not a Word document.")
+    if head.startswith(CFB_MAGIC):
+        return rejected(
+            'legacy_or_protected_office',
+            "Legacy .doc and password-protected Office files aren't supported; save it as an unprotected DOCX or PDF."
+        )
+    return rejected('unsupported_type', "Only PDF and DOCX resumes are supported.")
+
+
+def _check_pdf(file_bytes):
+    if fitz is None:
+        return accepted('pdf')
+    try:
+        doc = fitz.open(stream=file_bytes, filetype="pdf")
+    except Exception as e:
+        return rejected('corrupt', f"PDF could not be opened: {e}")
+    try:
+        if doc.needs_pass:
+            return rejected('encrypted_pdf', "PDF is password-protected.")
+        page_count = doc.page_count
+        if page_count == 0:
+            return rejected('empty_pdf', "PDF has no pages.")
+        if page_count > PREFLIGHT_MAX_PAGES:
+            return rejected('too_many_pages', f"PDF has {page_count} pages; resumes are limited to {PREFLIGHT_MAX_PAGES}.")
+        text_chars = sum(len(doc[i].get_text().strip()) for i in range(min(page_count, PREFLIGHT_TEXT_PAGES)))
+        if text_chars < PREFLIGHT_MIN_TEXT_CHARS:
+            return rejected('no_text_layer', "PDF has no selectable text (scanned?); upload a text PDF or DOCX.")
+        return accepted('pdf', page_count, text_chars)
+    finally:
+        doc.close()
+
+
+def _check_docx(file_bytes):
+    try:
+        with zipfile.ZipFile(io.BytesIO(file_bytes)) as archive:
+            if 'word/document.xml' not in archive.namelist():
+                return rejected('docx_without_document', "DOCX has no word/document.xml.")
+    except zipfile.BadZipFile as e:
+        return rejected('corrupt', f"DOCX could not be opened: {e}")
+    return accepted('docx')
+
+
+def check(file_bytes):
+    """Full preflight of a file held in memory."""
+    result = sniff(file_bytes[:SNIFF_BYTES])
+    if result.file_type == 'pdf':
+        return _check_pdf(file_bytes)
+    if result.file_type == 'docx' or result.reason == 'docx_without_document':
+        # The entry may just start past the sniffed head; the directory is authoritative.
+        return _check_docx(file_bytes)
+    return result
@@ -0,0 +1,227 @@
+import re
+import base64
+import hashlib
+from urllib.parse import unquote
+
+# Bytes pulled from the body per read while looking for multipart boundaries.
+READ_CHUNK_BYTES = 64 * 1024
+# Largest non-file form field or part header block accepted.
+MAX_FIELD_BYTES = 64 * 1024
+
+
+class BodyTooLarge(ValueError):
+    pass
+
+
+class MalformedBody(ValueError):
+    pass
+
+
+class Base64Reader:
+    """
+    File-like view of a base64 string (API Gateway's encoding of binary bodies) that
+    decodes on demand, so the decoded file never exists as one more full copy.
+    """
+
+    def __init__(self, text):
+        self._text = text
+        self._pos = 0
+        self._pending = b"" # decoded bytes of the last quantum not yet returned
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            chars = len(self._text) - self._pos
+        else:
+            # 4 base64 characters per 3 bytes; always decode whole quanta and keep
+            # what goes past `size` for the next read
+            chars = -(-max(size - len(self._pending), 0) // 3) * 4
+        chunk = self._text[self._pos:self._pos + chars]
+        self._pos += len(chunk)
+        try:
+            data = self._pending + base64.b64decode(chunk)
+        except ValueError as e:
+            raise MalformedBody(f"Invalid base64 body: {e}")
+        self._pending = b""
+        if size is not None and 0 <= size < len(data):
+            data, self._pending = data[:size], data[size:]
+        return data
+
+
+class HashingReader:
+    """Passes reads through while computing the SHA-256 and enforcing a size limit."""
+
+    def __init__(self, reader, max_bytes):
+        self._reader = reader
+        self._max_bytes = max_bytes
+        self._sha256 = hashlib.sha256()
+        self.size = 0
+
+    def read(self, size=-1):
+        data = self._reader.read(size)
+        self.size += len(data)
+        if self.size > self._max_bytes:
+            raise BodyTooLarge(f"File is larger than {self._max_bytes} bytes.")
+        self._sha256.update(data)
+        return data
+
+    def hexdigest(self):
+        return self._sha256.hexdigest()
+
+
+def read_head(reader, size):
+    """Reads up to `size` bytes, fewer only at the end of the body."""
+    chunks = []
+    remaining = size
+    while remaining > 0:
+        data = reader.read(remaining)
+        if not data:
+            break
+        chunks.append(data)
+        remaining -= len(data)
+    return b"".join(chunks)
+
+
+class PrefixedReader:
+    """
+    Replays bytes already read from a reader (e.g. for sniffing) before the rest of it.
+
+    read(size) returns `size` bytes unless the body ends first, topping the prefix up
+    from the reader: s3transfer takes a short first read of a non-seekable stream as
+    the whole file, and a short part as too small for multipart.
+    """
+
+    def __init__(self, prefix, reader):
+        self._prefix = prefix
+        self._reader = reader
+
+    def read(self, size=-1):
+        if not self._prefix:
+            return self._reader.read(size)
+        if size is None or size < 0:
+            data, self._prefix = self._prefix + self._reader.read(), b""
+            return data
+        data, self._prefix = self._prefix[:size], self._prefix[size:]
+        if len(data) < size:
+            data += read_head(self._reader, size - len(data))
+        return data
+
+
+class _BufferedStream:
+    """A small look-ahead buffer over a reader, for finding boundaries."""
+
+    def __init__(self, reader):
+        self._reader = reader
+        self.buf = bytearray()
+
+    def fill(self):
+        data = self._reader.read(READ_CHUNK_BYTES)
+        self.buf += data
+        return bool(data)
+
+    def read_until(self, delimiter, limit):
+        """Returns the bytes before `delimiter` and consumes both; for small, bounded pieces."""
+        while True:
+            i = self.buf.find(delimiter)
+            if i >= 0:
+                data = bytes(self.buf[:i])
+                del self.buf[:i + len(delimiter)]
+                return data
+            if len(self.buf) > limit + len(delimiter):
+                raise BodyTooLarge("Multipart field or header block too large.")
+            if not self.fill():
+                raise MalformedBody("Multipart body ended early.")
+
+
+class MultipartFileReader:
+    """Reads one part's content up to the next boundary, without buffering the whole part."""
+
+    def __init__(self, stream, delimiter):
+        self._stream = stream
+        self._delimiter = delimiter
+        self._done = False
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            chunks = []
+            chunk = self.read(READ_CHUNK_BYTES)
+            while chunk:
+                chunks.append(chunk)
+                chunk = self.read(READ_CHUNK_BYTES)
+            return b"".join(chunks)
+
+        buf = self._stream.buf
+        search_from = 0
+        while not self._done:
+            i = buf.find(self._delimiter, search_from)
+            if i >= 0:
+                n = min(size, i)
+                data = bytes(buf[:n])
+                if n == i:
+                    del buf[:i + len(self._delimiter)]
+                    self._done = True
+                else:
+                    del buf[:n]
+                return data
+            # Everything except a possible partial delimiter at the end is file content.
+            safe = len(buf) - len(self._delimiter) + 1
+            if safe >= size:
+                data = bytes(buf[:size])
+                del buf[:size]
+                return data
+            # Only the newly read bytes (and a possible partial delimiter) need searching next time.
+            search_from = max(0, safe)
+            if not self._stream.fill():
+                raise MalformedBody("Multipart body ended before the closing boundary.")
+        return b""
+
+
+def multipart_boundary(content_type):
+    match = re.search(r'boundary="?([^";]+)"?', content_type or '')
+    if not match:
+        raise MalformedBody("multipart/form-data without a boundary.")
+    return match.group(1).encode('latin-1')
+
+
+def _parse_part_headers(raw):
+    headers = {}
+    for line in raw.decode('utf-8', 'replace').split("\r\n"):
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    disposition = headers.get('content-disposition', '')
+    params = dict(
+        (key.lower(), value.strip('"'))
+        for key, value in re.findall(r';\s*([\w*]+)=("[^"]*"|[^;]*)', disposition)
+    )
+    if "filename*" in params: # RFC 5987: utf-8''encoded%20name
+        params["filename"] = unquote(params["filename*"].split("''", 1)[-1])
+    return headers, params
+
+
+def open_multipart_file(reader, content_type):
+    """
+    Scans a multipart/form-data body for the first part carrying a filename.
+    Returns (fields, file_name, part_content_type, file_reader): the small form fields
+    that came before the file, and a reader streaming the file part's bytes.
+    """
+    boundary = multipart_boundary(content_type)
+    stream = _BufferedStream(reader)
+    stream.read_until(b"--" + boundary, MAX_FIELD_BYTES) # preamble
+    delimiter = b"\r\n--" + boundary
+    fields = {}
+    while True:
+        stream.read_until(b"\r\n", MAX_FIELD_BYTES) # rest of the boundary line; "--" after the last one
+        headers, params = _parse_part_headers(stream.read_until(b"\r\n\r\n", MAX_FIELD_BYTES))
+        if params.get("filename") is not None:
+            return (
+                fields,
+                params["filename"],
+                headers.get('content-type', 'application/octet-stream'),
+                MultipartFileReader(stream, delimiter)
+            )
+        value = stream.read_until(delimiter, MAX_FIELD_BYTES)
+        if "name" in params:
+            fields[params["name"]] = value.decode('utf-8', 'replace')
+        while len(stream.buf) < 2 and stream.fill():
+            pass
+        if len(stream.buf) < 2 or stream.buf[:2] == b"--": # closing boundary
+            raise MalformedBody("No file part in multipart body.")
@@ -41,7 +41,14 @@ export async function GET(
     const status = result.Item.status?.S || 'processing'
     
     if (status === 'processing') {
-      return NextResponse.json({ status: 'processing' })
+      // The streaming analyzer publishes the score and top skills before the full result
+      const score = result.Item.compatibility_score?.N
+      const skills = result.Item.top_technical_skills_found?.L
+      return NextResponse.json({
+        status: 'processing',
+        ...(score !== undefined && { compatibility_score: Number(score) }),
+        ...(skills && { top_technical_skills_found: skills.map((skill) => skill.S).filter(Boolean) })
+      })
     }
     
     if (status === 'failed') {
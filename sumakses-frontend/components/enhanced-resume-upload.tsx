@@ -129,44 +129,81 @@ export default function EnhancedResumeUpload({ onComplete, onSkip, userEmail }:
     updateState({ uploading: true, progress: 10, error: '', currentStep: 'Uploading file...' })
 
     try {
-      // Convert file to base64
-      const fileReader = new FileReader()
-      const base64Promise = new Promise<string>((resolve, reject) => {
-        fileReader.onload = () => {
-          const result = fileReader.result as string
-          const base64 = result.split(',')[1]
-          resolve(base64)
-        }
-        fileReader.onerror = reject
-        fileReader.readAsDataURL(uploadState.file!)
-      })
-
-      updateState({ progress: 20, currentStep: 'Processing file...' })
-      const base64Content = await base64Promise
-      
-      updateState({ progress: 30, currentStep: 'Sending to server...' })
-      
-      // Upload to API
+      // Ask the API for a presigned S3 upload, so the file goes straight to S3
       const apiUrl = process.env.NEXT_PUBLIC_RESUME_API_URL
-      const response = await fetch(`${apiUrl}/upload-resume`, {
+      const initiateResponse = await fetch(`${apiUrl}/upload-resume/initiate`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
         },
         body: JSON.stringify({
-          file_content_base64: base64Content,
           file_name: uploadState.file.name,
-          content_type: uploadState.file.type
+          content_type: uploadState.file.type,
+          file_size: uploadState.file.size
+        })
+      })
+
+      const upload = await initiateResponse.json()
+
+      if (!initiateResponse.ok) {
+        throw new Error(upload.message || 'Upload failed')
+      }
+
+      updateState({ progress: 20, currentStep: 'Sending to server...' })
+
+      // The file field must come after the signed fields
+      const formData = new FormData()
+      Object.entries(upload.upload_fields as Record<string, string>).forEach(([name, value]) => {
+        formData.append(name, value)
+      })
+      formData.append('file', uploadState.file)
+
+      const s3Response = await fetch(upload.upload_url, {
+        method: 'POST',
+        body: formData
+      })
+
+      if (!s3Response.ok) {
+        throw new Error('Upload failed')
+      }
+
+      updateState({ progress: 30, currentStep: 'Processing file...' })
+
+      // Tell the API the file is in place so it can queue the analysis
+      const response = await fetch(`${apiUrl}/upload-resume/complete`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+          resume_id: upload.resume_id,
+          s3_key: upload.s3_key
         })
       })
 
       const result = await response.json()
-      
+
       if (!response.ok) {
         throw new Error(result.message || 'Upload failed')
       }
 
-      updateState({ 
+      // Small resumes may come back already analysed (inline fast path)
+      if (result.status === 'completed' && result.analysis_results) {
+        updateState({
+          progress: 100,
+          uploading: false,
+          success: true,
+          resumeId: result.resume_id,
+          analysisResults: result.analysis_results,
+          currentStep: 'Analysis complete!'
+        })
+        return
+      }
+      if (result.status === 'failed') {
+        throw new Error(result.error_message || 'Analysis failed')
+      }
+
+      updateState({
         progress: 50, 
         uploading: false, 
         analyzing: true,
@@ -205,32 +242,42 @@ export default function EnhancedResumeUpload({ onComplete, onSkip, userEmail }:
   }
 
   const pollForResults = async (resumeId: string) => {
-    const maxAttempts = 30 // 5 minutes max
+    const maxWaitMs = 5 * 60 * 1000 // 5 minutes max
+    const apiUrl = process.env.NEXT_PUBLIC_RESUME_API_URL
+    const startedAt = Date.now()
     let attempts = 0
+    let lastState = ''
     
     const poll = async () => {
       try {
         attempts++
-        const response = await fetch(`/api/resume-status/${resumeId}`)
+        // Long poll: the API holds the request until the state moves on from lastState (or 20 s pass)
+        const query = lastState ? `?wait=20&since=${encodeURIComponent(lastState)}` : ''
+        const response = await fetch(`${apiUrl}/resume-status/${resumeId}${query}`)
         
         if (!response.ok) {
           throw new Error(`HTTP ${response.status}`)
         }
         
         const data = await response.json()
+        lastState = data.state || data.status
 
         // Update progress based on status
         if (data.status === 'processing') {
-          const progressValue = Math.min(50 + (attempts * 2), 90)
+          const elapsedSteps = Math.floor((Date.now() - startedAt) / 10000)
+          const progressValue = Math.min(50 + (elapsedSteps * 2), 90)
+          const hasEarlyScore = typeof data.compatibility_score === 'number'
           updateState({ 
-            progress: progressValue,
-            currentStep: attempts < 5 ? 'Extracting text from resume...' : 
-                       attempts < 15 ? 'AI analyzing skills and experience...' :
+            progress: hasEarlyScore ? Math.max(progressValue, 80) : progressValue,
+            currentStep: hasEarlyScore ? `Compatibility score: ${data.compatibility_score}% - writing insights...` :
+                       elapsedSteps < 5 ? 'Extracting text from resume...' : 
+                       elapsedSteps < 15 ? 'AI analyzing skills and experience...' :
                        'Generating compatibility insights...'
           })
           
-          if (attempts < maxAttempts) {
-            setTimeout(poll, 10000) // Poll every 10 seconds
+          if (Date.now() - startedAt < maxWaitMs) {
+            // A long poll that came back early did so because something changed; ask again right away
+            setTimeout(poll, attempts === 1 ? 1000 : 0)
           } else {
             throw new Error('Analysis timeout - please try again')
           }